@@ -1,28 +1,46 @@
 import os
 from dotenv import load_dotenv
 from crewai import Agent
-from tools import AnalyzeActualDataDistributionTool
+from config import Config
+from tools import (
+    COMPACT_FORMAT_PROMPT,
+    ENCODING_COMPACT,
+    AnalyzeActualDataDistributionTool,
+    ProfileColumnDistributionTool,
+    AnalyzeRelationshipCardinalityTool
+)
 
 load_dotenv()
 
+# Tools accept and return the compact data model, so the agent only passes it along
+COMPACT_DATA_MODEL_NOTE = (
+    "The data model and all tool outputs use the compact JSON format. " + COMPACT_FORMAT_PROMPT +
+    "Profiles and other keys are abbreviated. You pass JSON between tools exactly as received, minified. "
+)
+
+
 def GetSqlDataAnalysisAgent():
+    data_model_note = COMPACT_DATA_MODEL_NOTE if Config.SCHEMA_ENCODING == ENCODING_COMPACT else ""
     return Agent(
         role="Expert Data Analyst",
         goal=(
             "You are a factual data analyst who ALWAYS follows the exact systematic approach which is defined below: "
             "1) FIRST: Use the json output from the Systematic Database Analyst agent to analyze the database schema. "
             "2) SECOND: Use AnalyzeActualDataDistributionTool to query database to fetch real data distribution. "
-            "3) THIRD: You MUST return the output of AnalyzeActualDataDistributionTool directly. Do not modify, rewrite, or restate JSON. "
+            "3) THIRD: Use ProfileColumnDistributionTool with the JSON output of AnalyzeActualDataDistributionTool to fetch real per-column value distributions. "
+            "4) FOURTH: Use AnalyzeRelationshipCardinalityTool with the JSON output of ProfileColumnDistributionTool to fetch real foreign key fan-out distributions. "
+            "5) FIFTH: You MUST return the output of AnalyzeRelationshipCardinalityTool directly. Do not modify, rewrite, or restate JSON. "
             "You NEVER deviate from this sequence. You NEVER skip steps. You NEVER invent or assume data. "
             "If there is an error in the sequence, you return the error and stop the process. "
+            f"{data_model_note}"
         ),
         backstory=(
             "YOUE ROLE: You are a highly factual and deterministic data analyst specializing in fetching the actual data database analysis. "
-            "YOUR STYLE: Your methodology is strict: always start by understanding the schema data which was given to you, then query the actual database to fetch the real data distribution, and finally return JSON output generated by the tool. "
+            "YOUR STYLE: Your methodology is strict: always start by understanding the schema data which was given to you, then query the actual database to fetch the real row counts, column value distributions and relationship fan-out, and finally return JSON output generated by the tool. "
             "YOUR RULES: You NEVER invent or assume data. You execute steps in this exact order. "
         ),
         verbose=True,
-        tools=[AnalyzeActualDataDistributionTool],
+        tools=[AnalyzeActualDataDistributionTool, ProfileColumnDistributionTool, AnalyzeRelationshipCardinalityTool],
         llm=f"azure/{os.getenv('AZURE_OPENAI_DEPLOYMENT', 'o4-mini')}",
         llm_params={
             "api_key": os.getenv("AZURE_API_KEY"),
@@ -1,45 +1,65 @@
 import os
 from dotenv import load_dotenv
 from crewai import Agent
+from config import Config
 from tools import (
+    COMPACT_FORMAT_PROMPT,
+    ENCODING_COMPACT,
     GetSchemaInfoTool,
     GetForeignKeysTool
 )
 
 load_dotenv()
 
+# The JSON data model, as built by tools/data_model.py
+JSON_DATA_MODEL_FORMAT = (
+    "3) THIRD: You strictly follow below structure to combine both results into a data model in a single root-level deterministic JSON object as shown below. "
+    "{\n"
+    '  "database_name": "string",\n'
+    '  "tables": [\n'
+    "    {\n"
+    '      "table_name": "string",\n'
+    '      "columns": [\n'
+    "        {\n"
+    '          "column_name": "string",\n'
+    '          "data_type": "string",\n'
+    '          "is_nullable": true\n'
+    "        }\n"
+    "      ]\n"
+    "    }\n"
+    "  ],\n"
+    '  "foreign_keys": [\n'
+    "    {\n"
+    '      "constraint_name": "string",\n'
+    '      "parent_table": "string",\n'
+    '      "parent_column": "string",\n'
+    '      "referenced_table": "string",\n'
+    '      "referenced_column": "string"\n'
+    "    }\n"
+    "  ]\n"
+    "}\n\n"
+    "Table names in foreign_keys use the same 'schema.table' format as GetSchemaInfoTool, built from parent_schema/referenced_schema. "
+)
+
+# The compact data model (tools/compact_encoding.py): both tool outputs are already in their final form
+COMPACT_DATA_MODEL_FORMAT = (
+    "3) THIRD: You combine both results into a single root-level compact JSON object, copying \"fmt\", \"db\", \"ty\" and \"t\" "
+    "from the GetSchemaInfoTool output unchanged and setting \"fk\" to the GetForeignKeysTool output unchanged: "
+    '{"fmt": "c1", "db": "string", "ty": [...], "t": [...], "fk": [...]} '
+    + COMPACT_FORMAT_PROMPT +
+    "You output minified JSON without whitespace. "
+)
+
+
 def GetSqlSchemaAnalysisAgent():
+    data_model_format = COMPACT_DATA_MODEL_FORMAT if Config.SCHEMA_ENCODING == ENCODING_COMPACT else JSON_DATA_MODEL_FORMAT
     return Agent(
         role="Systematic Database Analyst",
         goal=(
             "You are an expert database analyst who ALWAYS follows a systematic approach which is defined below: "
             "1) FIRST: You use GetSchemaInfoTool to fetch complete table schemas and column information. "
             "2) SECOND: You use GetForeignKeysTool to fetch all foreign key relationships. "
-            "3) THIRD: You strictly follow below structure to combine both results into a data model in a single root-level deterministic JSON object as shown below. "
-            "{\n"
-            '  "database_name": "string",\n'
-            '  "tables": [\n'
-            "    {\n"
-            '      "table_name": "string",\n'
-            '      "columns": [\n'
-            "        {\n"
-            '          "column_name": "string",\n'
-            '          "data_type": "string",\n'
-            '          "is_nullable": true\n'
-            "        }\n"
-            "      ]\n"
-            "    }\n"
-            "  ],\n"
-            '  "foreign_keys": [\n'
-            "    {\n"
-            '      "constraint_name": "string",\n'
-            '      "parent_table": "string",\n'
-            '      "parent_column": "string",\n'
-            '      "referenced_table": "string",\n'
-            '      "referenced_column": "string"\n'
-            "    }\n"
-            "  ]\n"
-            "}\n\n"
+            f"{data_model_format}"
             "You NEVER deviate from this sequence. You NEVER skip steps. You NEVER invent or assume data. "
             "If there is an error in the sequence, you return the error and stop the process."
         ),
@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from config import Config
+
+load_dotenv()
+
+'''
+Fleet sweep: runs the analysis crew of main.py for many databases in parallel.
+Every database gets its own main.py process (DB_NAME set in its environment), so the connection pool, schema cache,
+LLM hooks and CrewAI state stay per database. At most --max-parallel databases run at once, and each writes
+<output-dir>/<database>.json (the analysis) and <database>.log (the console output), plus a summary.json for the sweep.
+'''
+
+parser = argparse.ArgumentParser(
+    description="Run the database analysis workflow for several databases in parallel.",
+    epilog="Arguments after -- are passed to every main.py run, e.g. -- --schema-mode builder",
+)
+parser.add_argument("--databases", default=",".join(Config.BATCH_DATABASES), help="comma-separated database names")
+parser.add_argument("--databases-file", default=None, help="file with one database name per line (# starts a comment)")
+parser.add_argument("--max-parallel", type=int, default=Config.BATCH_MAX_PARALLEL, help="databases analyzed at the same time")
+parser.add_argument("--output-dir", default=Config.BATCH_OUTPUT_DIR)
+parser.add_argument("--timeout", type=float, default=Config.BATCH_TIMEOUT_SECONDS, help="seconds before a database run is killed (0 = no limit)")
+parser.add_argument("--profile", action="store_true", help="write a trace per database to <output-dir>/<database>.trace.json")
+parser.add_argument("main_args", nargs=argparse.REMAINDER)
+args = parser.parse_args()
+
+main_args = args.main_args[1:] if args.main_args[:1] == ["--"] else args.main_args
+
+# ============================================================================
+# DATABASES
+# ============================================================================
+
+databases = [name.strip() for name in args.databases.split(",") if name.strip()]
+if args.databases_file:
+    with open(args.databases_file, "r", encoding="utf-8") as f:
+        databases += [line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()]
+databases = list(dict.fromkeys(databases))  # Drop duplicates, keep order
+if not databases:
+    parser.error("no databases given (use --databases, --databases-file or BATCH_DATABASES)")
+
+os.makedirs(args.output_dir, exist_ok=True)
+main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# ============================================================================
+# RUN
+# ============================================================================
+
+def analyze_database(database: str):
+    """Runs main.py for one database in a child process and returns its summary entry."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", database)
+    result_path = os.path.join(args.output_dir, f"{safe_name}.json")
+    log_path = os.path.join(args.output_dir, f"{safe_name}.log")
+    command = [sys.executable, main_script, "--output", result_path, *main_args]
+    if args.profile:
+        command += ["--profile", os.path.join(args.output_dir, f"{safe_name}.trace.json")]
+
+    if os.path.exists(result_path):
+        os.remove(result_path)  # A stale result must not pass for this run's
+
+    env = {**os.environ, "DB_NAME": database, "PYTHONUNBUFFERED": "1"}
+    started = time.monotonic()
+    with open(log_path, "w", encoding="utf-8") as log:
+        try:
+            completed = subprocess.run(
+                command, env=env, stdout=log, stderr=subprocess.STDOUT, timeout=args.timeout or None
+            )
+            status = "ok" if completed.returncode == 0 and os.path.exists(result_path) else "failed"
+            return_code = completed.returncode
+        except subprocess.TimeoutExpired:
+            status, return_code = "timeout", None
+    return {
+        "database": database,
+        "status": status,
+        "return_code": return_code,
+        "seconds": round(time.monotonic() - started, 3),
+        "result": result_path if status == "ok" else None,
+        "log": log_path,
+    }
+
+
+print(f"🚚 Analyzing {len(databases)} databases, at most {args.max_parallel} at a time")
+sweep_started = time.monotonic()
+results = []
+with ThreadPoolExecutor(max_workers=max(1, args.max_parallel)) as executor:
+    futures = [executor.submit(analyze_database, database) for database in databases]
+    for future in as_completed(futures):
+        result = future.result()
+        results.append(result)
+        icon = "✅" if result["status"] == "ok" else "❌"
+        print(f"{icon} {result['database']}: {result['status']} in {result['seconds']:.1f}s (log {result['log']})")
+
+wall_seconds = time.monotonic() - sweep_started
+results.sort(key=lambda result: databases.index(result["database"]))
+summary = {
+    "databases": len(databases),
+    "succeeded": sum(1 for result in results if result["status"] == "ok"),
+    "max_parallel": args.max_parallel,
+    "wall_seconds": round(wall_seconds, 3),
+    "sum_of_database_seconds": round(sum(result["seconds"] for result in results), 3),
+    "results": results,
+}
+summary_path = os.path.join(args.output_dir, "summary.json")
+with open(summary_path, "w", encoding="utf-8") as f:
+    json.dump(summary, f, indent=2)
+
+print("=" * 80)
+print(f"🏁 {summary['succeeded']}/{summary['databases']} databases analyzed in {summary['wall_seconds']:.1f}s "
+      f"(sequential would take about {summary['sum_of_database_seconds']:.1f}s), summary written to {summary_path}")
+print("=" * 80)
+sys.exit(0 if summary["succeeded"] == summary["databases"] else 1)
@@ -0,0 +1,3 @@
+"""
+Benchmarks package for offline performance tracking against the SQLite stand-in database.
+"""
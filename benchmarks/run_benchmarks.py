@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from benchmarks.suite import format_summary, run_suite, save_results
+
+'''
+Offline benchmark suite: no SQL Server and no Azure endpoint needed.
+Each scale factor of the MovieReviews dataset is generated into a fresh SQLite stand-in database created from
+db/create_schema.sql, then the real introspection, row count, profiling and generation/load code runs against it
+and the crew runs with a scripted fake LLM. Results are written to BENCHMARK_RESULTS_DIR for tracking across commits.
+The profiling sketches are also checked against exact answers, and generation is checked at tiny scale factors;
+the run exits with status 1 if a check fails.
+'''
+
+# Keep CrewAI from phoning home during offline runs
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+parser.add_argument("--scales", default=",".join(f"{s:g}" for s in Config.BENCHMARK_SCALES), help="comma-separated MovieReviews scale factors")
+parser.add_argument("--repeats", type=int, default=Config.BENCHMARK_REPEATS, help="runs per latency measurement (median reported)")
+parser.add_argument("--results-dir", default=Config.BENCHMARK_RESULTS_DIR)
+parser.add_argument("--skip-crew", action="store_true", help="skip the end-to-end crew run with the fake LLM")
+args = parser.parse_args()
+
+with tempfile.TemporaryDirectory(prefix="benchmark_") as work_dir:
+    results = run_suite([float(s) for s in args.scales.split(",")], args.repeats, work_dir, include_crew=not args.skip_crew)
+
+path = save_results(results, args.results_dir)
+print(format_summary(results))
+print(f"✅ Benchmark results written to {path}")
+if not results["sketches"]["passed"]:
+    print("❌ Sketch accuracy checks failed (see the sketches section of the results)")
+if not results["small_scales"]["passed"]:
+    print("❌ Small-scale generation checks failed (see the small_scales section of the results)")
+if not results["sketches"]["passed"] or not results["small_scales"]["passed"]:
+    sys.exit(1)
@@ -0,0 +1,491 @@
+"""
+Benchmark Suite
+Offline benchmarks of introspection, row counts, profiling, generation, loading, set-based generation and the crew,
+run against the SQLite stand-in database with a scripted fake LLM, plus accuracy checks of the profiling sketches
+and generation checks at scale factors too small for the default benchmark scales.
+"""
+
+import json
+import math
+import os
+import statistics
+import subprocess
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import sys
+
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import (
+    close_all_pools,
+    fetch_catalog,
+    fetch_foreign_keys,
+    fetch_schema_fingerprint,
+    fetch_schema_info,
+    fetch_table_columns,
+    pooled_connection
+)
+from db.sqlite_standin import create_standin_database
+from generator import (
+    GenerationCheckpoint,
+    LoadOptions,
+    MovieReviewsSpec,
+    StreamingPipeline,
+    TextPools,
+    build_generation_script,
+    generate_chunk,
+    generate_genres,
+    generate_movies,
+    generate_reviews,
+    movie_reviews_set_spec,
+    movie_reviews_sources,
+    plan_genres,
+    plan_reviews,
+    run_generation_script
+)
+from sketches import KIND_NUMERIC, KIND_STRING, ColumnSketch, HyperLogLog, KLLSketch, SpaceSaving, hash_values
+from tools.column_profiler import ProfileSettings, profile_tables
+from tools.data_analysis import fetch_estimated_row_counts, fetch_exact_row_counts
+from tools.data_model import build_data_model
+from tools.relationship_profiler import group_foreign_keys, profile_relationships
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_SCRIPT = os.path.join(REPO_ROOT, "db", "create_schema.sql")
+BENCHMARK_SEED = 42
+BENCHMARK_CHUNK_ROWS = 50_000
+SMALL_SCALES = [0.001, 0.005, 0.009, 0.02]  # 1, 5, 9 and 20 movies: review groups of zero or one movie
+
+
+def timed(func: Callable[[], Any], repeats: int = 1) -> Tuple[float, Any]:
+    """Runs func `repeats` times and returns the median seconds and the last result."""
+    durations, result = [], None
+    for _ in range(max(1, repeats)):
+        started = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations), result
+
+
+def _rate(rows: int, seconds: float) -> float:
+    return round(rows / seconds, 1) if seconds > 0 else 0.0
+
+
+def use_standin_database(path: str) -> str:
+    """Recreates the stand-in database from db/create_schema.sql and points Config and the pool at it."""
+    close_all_pools()
+    Config.DB_BACKEND = "sqlite"
+    Config.DB_STANDIN_PATH = path
+    return create_standin_database(path, SCHEMA_SCRIPT)
+
+
+def _sources(spec: MovieReviewsSpec):
+    pools = TextPools.from_faker(min(spec.text_pool_size, max(spec.total_movies, spec.total_reviews)), seed=BENCHMARK_SEED)
+    return movie_reviews_sources(spec, pools, BENCHMARK_SEED)
+
+
+def bench_generation(spec: MovieReviewsSpec) -> Dict[str, Any]:
+    """Chunk generation alone (no database), rows/sec per table."""
+    sources = _sources(spec)
+    key_starts = {source.table_name: 1 for source in sources}
+    results = {}
+    for table_index, source in enumerate(sources):
+        def generate_all():
+            return sum(
+                len(generate_chunk(source, BENCHMARK_SEED, table_index, chunk_index, BENCHMARK_CHUNK_ROWS, key_starts))
+                for chunk_index in range(source.chunk_count(BENCHMARK_CHUNK_ROWS))
+            )
+        seconds, rows = timed(generate_all)
+        results[source.table_name] = {"rows": rows, "seconds": round(seconds, 4), "rows_per_second": _rate(rows, seconds)}
+    return results
+
+
+def bench_load(spec: MovieReviewsSpec) -> Dict[str, Any]:
+    """Streaming generation plus executemany loading into the stand-in, rows/sec per table."""
+    checkpoint = GenerationCheckpoint(spec={}, seed=BENCHMARK_SEED, chunk_rows=BENCHMARK_CHUNK_ROWS)
+    # fast_executemany and input sizes are pyodbc features; SQLite allows one writer at a time
+    options = LoadOptions(fast_executemany=False, max_parallel_tables=1)
+    pipeline = StreamingPipeline(_sources(spec), checkpoint, checkpoint_path="", options=options, workers=1)
+    started = time.perf_counter()
+    results = pipeline.run(fetch_foreign_keys())
+    seconds = time.perf_counter() - started
+    total_rows = sum(result.rows for result in results)
+    return {
+        "tables": {result.table_name: result.to_dict() for result in results},
+        "rows": total_rows,
+        "seconds": round(seconds, 4),
+        "rows_per_second": _rate(total_rows, seconds),
+    }
+
+
+def bench_set_based(spec: MovieReviewsSpec) -> Dict[str, Any]:
+    """Set-based generation inside the (freshly created) stand-in, rows/sec per table."""
+    pools = TextPools.from_faker(min(spec.text_pool_size, max(spec.total_movies, spec.total_reviews)), seed=BENCHMARK_SEED)
+    set_spec = movie_reviews_set_spec(spec, pools, BENCHMARK_SEED, partition_rows=BENCHMARK_CHUNK_ROWS)
+    schema_info = {"tables": [
+        {"table_name": table_name, "columns": fetch_table_columns(table_name)} for table_name in set_spec.tables
+    ]}
+    started = time.perf_counter()
+    results = run_generation_script(build_generation_script(set_spec, schema_info, fetch_foreign_keys()))
+    seconds = time.perf_counter() - started
+    total_rows = sum(result.rows for result in results)
+    return {
+        "tables": {result.table_name: result.to_dict() for result in results},
+        "rows": total_rows,
+        "seconds": round(seconds, 4),
+        "rows_per_second": _rate(total_rows, seconds),
+    }
+
+
+def bench_introspection(repeats: int) -> Dict[str, Any]:
+    results = {}
+    for name, func in [
+        ("schema_info", fetch_schema_info),
+        ("foreign_keys", fetch_foreign_keys),
+        ("schema_fingerprint", fetch_schema_fingerprint),
+        ("catalog_concurrent", fetch_catalog),
+        ("data_model_builder", lambda: build_data_model(*fetch_catalog())),
+    ]:
+        seconds, _ = timed(func, repeats)
+        results[name] = {"median_ms": round(seconds * 1000, 3)}
+    return results
+
+
+def bench_row_counts(repeats: int) -> Dict[str, Any]:
+    table_names = [table["table_name"] for table in fetch_schema_info()["tables"]]
+
+    def estimated():
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                return fetch_estimated_row_counts(cursor)
+            finally:
+                cursor.close()
+
+    estimated_seconds, counts = timed(estimated, repeats)
+    exact_seconds, _ = timed(lambda: fetch_exact_row_counts(table_names), repeats)
+    total_rows = sum(counts.get(name, 0) for name in table_names)
+    return {
+        "total_rows": total_rows,
+        "estimated": {"median_ms": round(estimated_seconds * 1000, 3), "rows_per_second": _rate(total_rows, estimated_seconds)},
+        "exact": {"median_ms": round(exact_seconds * 1000, 3), "rows_per_second": _rate(total_rows, exact_seconds)},
+    }
+
+
+def bench_profiling(repeats: int) -> Dict[str, Any]:
+    tables = fetch_schema_info()["tables"]
+    row_counts = fetch_exact_row_counts([table["table_name"] for table in tables])
+    total_rows = sum(count for count in row_counts.values() if isinstance(count, int))
+    settings = ProfileSettings.from_config()
+    column_seconds, profiles = timed(lambda: profile_tables(tables, row_counts, settings), repeats)
+
+    relationships = group_foreign_keys(fetch_foreign_keys())
+    relationship_seconds, fan_outs = timed(lambda: profile_relationships(relationships), repeats)
+    child_rows = sum(profile.get("linked_child_rows", 0) for profile in fan_outs)
+    return {
+        "columns": {
+            "tables": len(tables),
+            "scanned_rows": total_rows,
+            "median_seconds": round(column_seconds, 4),
+            "rows_per_second": _rate(total_rows, column_seconds),
+            "errors": [name for name, profile in profiles.items() if "error" in profile],
+        },
+        "relationships": {
+            "relationships": len(relationships),
+            "child_rows": child_rows,
+            "median_seconds": round(relationship_seconds, 4),
+            "rows_per_second": _rate(child_rows, relationship_seconds),
+            "errors": [profile["error"] for profile in fan_outs if "error" in profile],
+        },
+    }
+
+
+def bench_small_scales(scales: List[float] = SMALL_SCALES, chunk_rows: int = 7) -> Dict[str, Any]:
+    """
+    Generates the MovieReviews dataset in memory (generate_*) and through the chunked sources at tiny scale factors,
+    where the hot and remaining review groups round to zero or one movie. Both paths must produce every row, and
+    reviews only for movies outside the no-review group. "passed" is False if any scale fails.
+    """
+    results = {}
+    for scale in scales:
+        spec = MovieReviewsSpec(scale=scale)
+        pools = TextPools.from_faker(10, seed=BENCHMARK_SEED)
+        errors = []
+        try:
+            rng = np.random.default_rng(BENCHMARK_SEED)
+            genre_plan = plan_genres(np.arange(1, len(generate_genres()) + 1), spec, rng)
+            movies = generate_movies(genre_plan, spec, pools, rng)
+            review_plan = plan_reviews(np.arange(1, len(movies) + 1), spec, rng)
+            reviews = generate_reviews(review_plan, spec, pools, rng)
+            if len(reviews) != spec.total_reviews:
+                errors.append(f"in memory: {len(reviews)} of {spec.total_reviews} reviews")
+            if np.isin(reviews.columns["MovieID"], review_plan.no_review_movies).any():
+                errors.append("in memory: reviews of a movie in the no-review group")
+        except ValueError as e:
+            errors.append(f"in memory: {str(e)}")
+        try:
+            sources = movie_reviews_sources(spec, pools, BENCHMARK_SEED)
+            key_starts = {source.table_name: 1 for source in sources}
+            chunked = {
+                source.table_name: [
+                    generate_chunk(source, BENCHMARK_SEED, table_index, chunk_index, chunk_rows, key_starts)
+                    for chunk_index in range(source.chunk_count(chunk_rows))
+                ]
+                for table_index, source in enumerate(sources)
+            }
+            reviewed = np.concatenate([chunk.columns["MovieID"] for chunk in chunked["dbo.Reviews"]] or [np.empty(0)])
+            for source in sources:
+                rows = sum(len(chunk) for chunk in chunked[source.table_name])
+                if rows != source.total_rows:
+                    errors.append(f"chunked: {rows} of {source.total_rows} rows in {source.table_name}")
+            if len(np.unique(reviewed)) > spec.total_movies - int(spec.total_movies * spec.no_review_movie_share):
+                errors.append("chunked: more reviewed movies than movies outside the no-review group")
+        except ValueError as e:
+            errors.append(f"chunked: {str(e)}")
+        results[f"{scale:g}"] = {"movies": spec.total_movies, "reviews": spec.total_reviews, "errors": errors}
+    return {"scales": results, "passed": not any(result["errors"] for result in results.values())}
+
+
+def bench_sketches(rows: int = 1_000_000, parts: int = 4) -> Dict[str, Any]:
+    """
+    Accuracy of the profiling sketches against exact answers, each built from `parts` partial sketches merged
+    like the chunks of a sketched scan: HyperLogLog (precision 14) within 3 standard errors of the distinct count,
+    KLL (k=200) rank error below 2/k, space-saving keeping every value more frequent than rows/capacity, and
+    column sketches unchanged by a JSON round trip. "passed" is False if any check fails.
+    """
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    started = time.perf_counter()
+
+    distinct_values = rng.integers(0, rows, size=rows)
+    hll = HyperLogLog(14)
+    for part in np.array_split(distinct_values, parts):
+        partial = HyperLogLog(14)
+        partial.add_hashes(hash_values(part.tolist()))
+        hll.merge(partial)
+    distinct = len(np.unique(distinct_values))
+    hll_error = abs(hll.estimate() - distinct) / distinct
+    hll_bound = 3 * 1.04 / math.sqrt(1 << 14)
+
+    values = rng.lognormal(mean=3.0, sigma=1.0, size=rows)
+    kll = KLLSketch(200, seed=BENCHMARK_SEED)
+    for index, part in enumerate(np.array_split(values, parts)):
+        partial = KLLSketch(200, seed=BENCHMARK_SEED + index)
+        partial.update(part)
+        kll.merge(partial)
+    fractions = [i / 100 for i in range(1, 100)]
+    ordered = np.sort(values)
+    ranks = np.searchsorted(ordered, kll.quantiles(fractions), side="right") / rows
+    kll_error = float(np.max(np.abs(ranks - np.asarray(fractions))))
+
+    capacity = 100
+    frequent = rng.zipf(1.3, size=rows)
+    space_saving = SpaceSaving(capacity)
+    for part in np.array_split(frequent, parts):
+        partial = SpaceSaving(capacity)
+        for batch in np.array_split(part, 10):
+            partial.update(batch.tolist())
+        space_saving.merge(partial)
+    exact_counts = dict(zip(*np.unique(frequent, return_counts=True)))
+    heavy = [int(value) for value, count in exact_counts.items() if count > rows / capacity]
+    missing = [value for value in heavy if value not in space_saving.counts]
+    misreported = [
+        value for value, count in space_saving.counts.items()
+        if not count - space_saving.errors[value] <= exact_counts.get(value, 0) <= count
+    ]
+
+    def summary(sketch: ColumnSketch):
+        quantiles = (sketch.values or sketch.lengths).quantiles(fractions)
+        return sketch.rows, sketch.nulls, sketch.min, sketch.max, sketch.distinct_count(), sketch.heavy_hitters.top(10), quantiles
+
+    round_trip_failures = []
+    for kind, column_values in [
+        (KIND_NUMERIC, values[:100_000].round(2).tolist()),
+        (KIND_STRING, [f"value-{value}" for value in frequent[:100_000].tolist()]),
+    ]:
+        sketch = ColumnSketch(kind)
+        sketch.update(column_values, nulls=10)
+        restored = ColumnSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        if json.dumps(restored.to_dict()) != json.dumps(sketch.to_dict()) or summary(restored) != summary(sketch):
+            round_trip_failures.append(kind)
+
+    checks = {
+        "hyperloglog": {
+            "distinct": distinct,
+            "estimate": round(hll.estimate()),
+            "relative_error": round(hll_error, 5),
+            "bound": round(hll_bound, 5),
+            "passed": hll_error <= hll_bound,
+        },
+        "kll": {"max_rank_error": round(kll_error, 5), "bound": 2 / kll.k, "passed": kll_error < 2 / kll.k},
+        "space_saving": {
+            "heavy_values": len(heavy),
+            "missing": missing,
+            "misreported": misreported,
+            "passed": not missing and not misreported,
+        },
+        "round_trip": {"failed_kinds": round_trip_failures, "passed": not round_trip_failures},
+    }
+    return {
+        "rows": rows,
+        "parts": parts,
+        "seconds": round(time.perf_counter() - started, 4),
+        "checks": checks,
+        "passed": all(check["passed"] for check in checks.values()),
+    }
+
+
+def bench_crew() -> Dict[str, Any]:
+    """Runs both agents end to end with the real tools and a scripted fake LLM."""
+    from crewai import Crew, Process, Task
+    from agents import GetSqlDataAnalysisAgent, GetSqlSchemaAnalysisAgent
+    from llm import ScriptedLLM, final_answer, install_fake_llm, observation_json, tool_action
+    import litellm
+
+    data_model_json = build_data_model(fetch_schema_info(), fetch_foreign_keys()).to_json()
+
+    def schema_step(turn: int, observation: Optional[str]) -> str:
+        if turn == 0:
+            return tool_action("Get Database Schema", {})
+        if turn == 1:
+            return tool_action("Get Database Foreign Keys", {})
+        return final_answer(data_model_json)
+
+    data_tools = ["Analyze Table Row Counts", "Profile Column Distributions", "Analyze Relationship Cardinality"]
+
+    def data_step(turn: int, observation: Optional[str]) -> str:
+        if turn < len(data_tools):
+            schema_data = data_model_json if turn == 0 else observation_json(observation)
+            return tool_action(data_tools[turn], {"schema_data": schema_data})
+        return final_answer(observation_json(observation))
+
+    fake = ScriptedLLM([("Expert Data Analyst", data_step), ("Systematic Database Analyst", schema_step)])
+    previous_completion = install_fake_llm(fake)
+    try:
+        schema_agent, data_agent = GetSqlSchemaAnalysisAgent(), GetSqlDataAnalysisAgent()
+        schema_task = Task(
+            description="TASK FOR: Systematic Database Analyst Agent ONLY. TASK: Analyze the database structure and provide a comprehensive data model. ",
+            expected_output="A comprehensive JSON object showing the database structure. ",
+            agent=schema_agent,
+        )
+        data_task = Task(
+            description="TASK FOR: Expert Data Analyst Agent ONLY. TASK: Analyze the database schema data and perform comprehensive data distribution analysis. ",
+            expected_output="A comprehensive JSON object containing actual data distribution analysis. ",
+            agent=data_agent,
+            context=[schema_task],
+        )
+        crew = Crew(agents=[schema_agent, data_agent], tasks=[schema_task, data_task], process=Process.sequential, verbose=False)
+        seconds, output = timed(crew.kickoff)
+    finally:
+        litellm.completion = previous_completion
+
+    try:
+        json.loads(output.raw)
+        valid_json = True
+    except ValueError:
+        valid_json = False
+    return {"seconds": round(seconds, 4), "llm_calls": fake.calls, "output_is_json": valid_json}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(scales: List[float], repeats: int, work_dir: str, include_crew: bool = True) -> Dict[str, Any]:
+    """Runs every benchmark at every scale factor on a fresh stand-in database."""
+    results = {
+        "revision": git_revision(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeats": repeats,
+        "chunk_rows": BENCHMARK_CHUNK_ROWS,
+        "sketches": bench_sketches(),
+        "small_scales": bench_small_scales(),
+        "scales": {},
+    }
+    for scale in scales:
+        spec = MovieReviewsSpec(scale=scale)
+        use_standin_database(os.path.join(work_dir, f"MovieReviews-{scale:g}-set-based.sqlite"))
+        set_based = bench_set_based(spec)
+        use_standin_database(os.path.join(work_dir, f"MovieReviews-{scale:g}.sqlite"))
+        scale_results = {
+            "movies": spec.total_movies,
+            "reviews": spec.total_reviews,
+            "generation": bench_generation(spec),
+            "set_based": set_based,
+            "load": bench_load(spec),
+            "introspection": bench_introspection(repeats),
+            "row_counts": bench_row_counts(repeats),
+            "profiling": bench_profiling(repeats),
+        }
+        if include_crew:
+            try:
+                scale_results["crew"] = bench_crew()
+            except Exception as e:
+                scale_results["crew"] = {"error": f"Failed to run the crew: {str(e)}"}
+        results["scales"][f"{scale:g}"] = scale_results
+    close_all_pools()
+    return results
+
+
+def save_results(results: Dict[str, Any], results_dir: str) -> str:
+    """
+    Writes the full results as <timestamp>-<revision>.json and appends one summary line per
+    scale factor to history.jsonl, which is meant to be committed and diffed across revisions.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = results["started_at"].replace(":", "").replace("-", "")
+    path = os.path.join(results_dir, f"{stamp}-{results['revision']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    with open(os.path.join(results_dir, "history.jsonl"), "a", encoding="utf-8") as f:
+        for scale, scale_results in results["scales"].items():
+            f.write(json.dumps({
+                "revision": results["revision"],
+                "started_at": results["started_at"],
+                "scale": float(scale),
+                "generation_rows_per_second": {t: r["rows_per_second"] for t, r in scale_results["generation"].items()},
+                "load_rows_per_second": scale_results["load"]["rows_per_second"],
+                "set_based_rows_per_second": scale_results["set_based"]["rows_per_second"],
+                "introspection_ms": {name: r["median_ms"] for name, r in scale_results["introspection"].items()},
+                "row_count_exact_rows_per_second": scale_results["row_counts"]["exact"]["rows_per_second"],
+                "profiling_rows_per_second": scale_results["profiling"]["columns"]["rows_per_second"],
+                "fan_out_rows_per_second": scale_results["profiling"]["relationships"]["rows_per_second"],
+                "crew_seconds": scale_results.get("crew", {}).get("seconds"),
+                "sketch_checks_passed": results["sketches"]["passed"],
+                "small_scale_checks_passed": results["small_scales"]["passed"],
+            }) + "\n")
+    return path
+
+
+def format_summary(results: Dict[str, Any]) -> str:
+    lines = [f"{'scale':>7} {'gen rows/s':>12} {'load rows/s':>12} {'set rows/s':>12} {'schema ms':>10} {'count rows/s':>13} {'profile rows/s':>15} {'crew s':>8}"]
+    for scale, r in results["scales"].items():
+        generated = sum(t["rows"] for t in r["generation"].values())
+        generation_seconds = sum(t["seconds"] for t in r["generation"].values())
+        crew_seconds = r.get("crew", {}).get("seconds")
+        lines.append(
+            f"{scale:>7} {_rate(generated, generation_seconds):>12,.0f} {r['load']['rows_per_second']:>12,.0f} "
+            f"{r['set_based']['rows_per_second']:>12,.0f} "
+            f"{r['introspection']['schema_info']['median_ms']:>10.2f} {r['row_counts']['exact']['rows_per_second']:>13,.0f} "
+            f"{r['profiling']['columns']['rows_per_second']:>15,.0f} {crew_seconds if crew_seconds is not None else '-':>8}"
+        )
+    checks = results["sketches"]["checks"]
+    lines.append(
+        f"sketch accuracy {'passed' if results['sketches']['passed'] else 'FAILED'}: "
+        f"HLL error {checks['hyperloglog']['relative_error']:.2%} (max {checks['hyperloglog']['bound']:.2%}), "
+        f"KLL rank error {checks['kll']['max_rank_error']:.2%} (max {checks['kll']['bound']:.2%}), "
+        f"heavy hitters missing {len(checks['space_saving']['missing'])}/{checks['space_saving']['heavy_values']}, "
+        f"round trip {'ok' if checks['round_trip']['passed'] else 'failed for ' + ', '.join(checks['round_trip']['failed_kinds'])}"
+    )
+    small_scales = results["small_scales"]["scales"]
+    failed = [f"{scale} ({'; '.join(result['errors'])})" for scale, result in small_scales.items() if result["errors"]]
+    lines.append(
+        f"small scales {', '.join(small_scales)}: "
+        f"{'failed at ' + ', '.join(failed) if failed else 'in-memory and chunked generation passed'}"
+    )
+    return "\n".join(lines)
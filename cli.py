@@ -0,0 +1,196 @@
+import time
+
+_STARTED = time.perf_counter()  # Before any other import, so startup includes them
+
+import argparse
+import json
+import os
+import sys
+
+from config import Config
+
+'''
+Command line entry point with one subcommand per step of the workflow:
+  introspect  builds the data model from the catalog (schema cache first)
+  profile     adds row counts, column profiles and foreign key fan-out to the data model
+  generate    runs db/source_data_generator.py
+  validate    compares a synthetic database with the source (db/validate.py)
+  crew        runs the agentic workflow of main.py (same arguments)
+Every subcommand imports what it needs when it runs; only crew loads CrewAI, and pyodbc is loaded on the first
+SQL Server connection. The startup time (imports included) and run time are reported on stderr after every command.
+'''
+
+_ready_at = None
+
+
+def ready():
+    """Marks the end of startup: the command's imports are done and its work begins."""
+    global _ready_at
+    _ready_at = time.perf_counter()
+
+
+def report_timings(command: str, dispatched_at: float):
+    finished = time.perf_counter()
+    ready_at = _ready_at or dispatched_at
+    loaded = [name for name in ("crewai", "pyodbc", "pyarrow", "numpy") if name in sys.modules]
+    print(
+        f"⏱️ {command}: startup {ready_at - _STARTED:.3f}s (command imports {ready_at - dispatched_at:.3f}s, "
+        f"{len(sys.modules)} modules, loaded: {', '.join(loaded) or 'none'}), run {finished - ready_at:.3f}s",
+        file=sys.stderr,
+    )
+
+
+def write_output(data, output: str, encoding: str):
+    from tools.compact_encoding import ENCODING_COMPACT, encode_data_model
+
+    if encoding == ENCODING_COMPACT:
+        text = json.dumps(encode_data_model(data), separators=(",", ":"), default=str)
+    else:
+        text = json.dumps(data, indent=2, default=str)
+    if not output:
+        print(text)
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(text)
+    print(f"💾 Written to {output}", file=sys.stderr)
+
+
+def load_data_model(path: str):
+    """The data model in a JSON file (full or compact), or else the one built from the catalog."""
+    if path:
+        from tools.compact_encoding import load_schema_data
+
+        with open(path, "r", encoding="utf-8") as f:
+            return load_schema_data(f.read())
+    return introspect_data_model()
+
+
+def introspect_data_model():
+    from db import SchemaCache, fetch_catalog, fetch_schema_fingerprint
+    from tools.data_model import build_data_model
+
+    schema_cache = SchemaCache() if Config.SCHEMA_CACHE_ENABLED else None
+    fingerprint = None
+    if schema_cache:
+        try:
+            fingerprint = fetch_schema_fingerprint()
+            data_model = schema_cache.load(fingerprint)
+            if data_model is not None:
+                print(f"📦 Schema unchanged (fingerprint {fingerprint}), using cached data model", file=sys.stderr)
+                return data_model
+        except Exception as e:
+            print(f"⚠️ Schema cache disabled for this run: {str(e)}", file=sys.stderr)
+            schema_cache = None
+
+    data_model = build_data_model(*fetch_catalog()).to_dict()
+    if schema_cache:
+        schema_cache.save(fingerprint, data_model)
+    return data_model
+
+
+# ============================================================================
+# COMMANDS
+# ============================================================================
+
+def cmd_introspect(args) -> int:
+    import db
+    import tools.data_model
+    ready()
+    data_model = introspect_data_model()
+    print(f"🧱 Data model of {len(data_model['tables'])} tables, {len(data_model['foreign_keys'])} foreign key columns", file=sys.stderr)
+    write_output(data_model, args.output, args.encoding)
+    return 0
+
+
+def cmd_profile(args) -> int:
+    from tools.data_analysis import add_column_profiles, add_relationship_profiles, add_row_counts
+    ready()
+    data = load_data_model(args.input)
+    add_row_counts(data, exact_counts=args.exact_counts)
+    if not args.skip_columns:
+        add_column_profiles(data)
+    if not args.skip_relationships:
+        add_relationship_profiles(data)
+    errors = [table["table_name"] for table in data.get("tables", []) if "profile_error" in table or "row_count_error" in table]
+    errors += [profile["constraint_name"] for profile in data.get("relationship_profiles", []) if "error" in profile]
+    write_output(data, args.output, args.encoding)
+    if errors:
+        print(f"⚠️ Not profiled: {', '.join(errors)}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def cmd_generate(args) -> int:
+    import runpy
+    import db
+    import generator
+    ready()
+    runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "db", "source_data_generator.py"), run_name="__main__")
+    return 0
+
+
+def cmd_validate(args) -> int:
+    from tools.fidelity_validator import ValidationSettings, format_fidelity_report, validate_fidelity
+    ready()
+    if not args.synthetic:
+        print("❌ No synthetic database given (use --synthetic or VALIDATION_SYNTHETIC_DB)", file=sys.stderr)
+        return 2
+    data_model = load_data_model(args.input)
+    report = validate_fidelity(data_model, args.synthetic, settings=ValidationSettings.from_config())
+    print(format_fidelity_report(report))
+    if args.output:
+        write_output(report, args.output, "json")
+    print(f"{'✅ Synthetic data matches the source' if report['passed'] else '❌ Synthetic data does not match the source'}.")
+    return 0 if report["passed"] else 1
+
+
+def cmd_crew(args) -> int:
+    import crewai
+    import main
+    ready()
+    main.run(args)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Database analysis and synthetic data workflow.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    introspect = subparsers.add_parser("introspect", help="build the data model from the catalog, without an LLM")
+    introspect.set_defaults(handler=cmd_introspect)
+
+    profile = subparsers.add_parser("profile", help="row counts, column profiles and foreign key fan-out, without an LLM")
+    profile.add_argument("--input", default=None, metavar="DATA_MODEL_JSON", help="data model to profile (default: introspect the database)")
+    profile.add_argument("--exact-counts", action="store_true", help="count rows with COUNT queries instead of catalog metadata")
+    profile.add_argument("--skip-columns", action="store_true", help="no column profiles")
+    profile.add_argument("--skip-relationships", action="store_true", help="no foreign key fan-out")
+    profile.set_defaults(handler=cmd_profile)
+
+    for command in (introspect, profile):
+        command.add_argument("--output", default=None, metavar="RESULT_JSON", help="write the result to this file instead of stdout")
+        command.add_argument("--encoding", choices=["json", "compact"], default="json", help="full JSON or the compact data model format")
+
+    generate = subparsers.add_parser("generate", help="generate the MovieReviews sample data (GENERATOR_* settings)")
+    generate.set_defaults(handler=cmd_generate)
+
+    validate = subparsers.add_parser("validate", help="check a synthetic database against the source, exit 1 on failure")
+    validate.add_argument("--synthetic", default=Config.VALIDATION_SYNTHETIC_DB, help="synthetic database name (a file path with DB_BACKEND=sqlite)")
+    validate.add_argument("--input", default=None, metavar="DATA_MODEL_JSON", help="source data model (default: introspect the database)")
+    validate.add_argument("--output", default=None, metavar="REPORT_JSON", help="also write the full report to this file")
+    validate.set_defaults(handler=cmd_validate)
+
+    import main  # Cheap: CrewAI is only imported by main.run
+    crew = subparsers.add_parser("crew", help="run the agentic workflow (main.py)")
+    main.add_arguments(crew)
+    crew.set_defaults(handler=cmd_crew)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    dispatched_at = time.perf_counter()
+    try:
+        exit_code = args.handler(args)
+    finally:
+        report_timings(args.command, dispatched_at)
+    sys.exit(exit_code)
@@ -5,13 +5,127 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Config:
-    DB_SERVER = os.getenv("DB_SERVER")  # e.g. myserver (no instance name)
+    DB_SERVER = os.getenv("DB_SERVER")  # e.g. myserver, or myserver\SQLEXPRESS for a named instance
+    DB_PORT = os.getenv("DB_PORT", "1433")  # TCP port; ignored for a named instance
     DB_NAME = os.getenv("DB_NAME")
     DB_DRIVER = os.getenv("DB_DRIVER", "ODBC Driver 18 for SQL Server")
     DB_USER = os.getenv("DB_USER")
     DB_PASSWORD = os.getenv("DB_PASSWORD")
+    DB_BACKEND = os.getenv("DB_BACKEND", "sqlserver")  # "sqlserver" or "sqlite" (local stand-in for offline benchmarks)
+    DB_STANDIN_PATH = os.getenv("DB_STANDIN_PATH", ".cache/standin/MovieReviews.sqlite")
+
+    # Connection pool
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "8"))  # Max open connections per database
+    DB_POOL_MAX_IDLE_SECONDS = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300"))  # Idle connections older than this are closed
+    DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "30"))  # Max seconds to wait for a free connection
+    DB_POOL_HEALTH_CHECK_AFTER = float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "30"))  # Validate connections idle at least this long on checkout (0 = always check)
+
+    # Schema analysis
+    SCHEMA_ANALYSIS_MODE = os.getenv("SCHEMA_ANALYSIS_MODE", "agent")  # "agent" (LLM) or "builder" (in-process, no LLM)
+    SCHEMA_ENCODING = os.getenv("SCHEMA_ENCODING", "compact")  # "compact" (interned types, abbreviated keys) or "json" in agent context
+    SCHEMA_TOKEN_BUDGET = int(os.getenv("SCHEMA_TOKEN_BUDGET", "1500"))  # Larger data models are split into FK-connected parts, one data analysis task each
+
+    # Schema snapshot cache
+    SCHEMA_CACHE_ENABLED = os.getenv("SCHEMA_CACHE_ENABLED", "true").lower() == "true"
+    SCHEMA_CACHE_DIR = os.getenv("SCHEMA_CACHE_DIR", ".cache/schema")
+
+    # Row count analysis
+    ROW_COUNT_MODE = os.getenv("ROW_COUNT_MODE", "estimated")  # "estimated" (catalog metadata) or "exact" (COUNT_BIG per table)
+    ROW_COUNT_WORKERS = int(os.getenv("ROW_COUNT_WORKERS", "4"))  # Max concurrent connections for exact counts
+
+    # Column profiling
+    PROFILE_WORKERS = int(os.getenv("PROFILE_WORKERS", "4"))  # Tables profiled concurrently
+    PROFILE_MAX_SCAN_ROWS = int(os.getenv("PROFILE_MAX_SCAN_ROWS", "1000000"))  # Larger tables are profiled on a TABLESAMPLE of this size
+    PROFILE_HISTOGRAM_BUCKETS = int(os.getenv("PROFILE_HISTOGRAM_BUCKETS", "10"))
+    PROFILE_TOP_K = int(os.getenv("PROFILE_TOP_K", "10"))
+    PROFILE_CATEGORICAL_MAX_DISTINCT = int(os.getenv("PROFILE_CATEGORICAL_MAX_DISTINCT", "1000"))  # Columns with more distinct values get no top-k
+    PROFILE_QUERY_TIMEOUT_SECONDS = int(os.getenv("PROFILE_QUERY_TIMEOUT_SECONDS", "300"))
+    PROFILE_SAMPLE_SEED = int(os.getenv("PROFILE_SAMPLE_SEED", "42"))
+
+    # Incremental profiling
+    PROFILE_INCREMENTAL = os.getenv("PROFILE_INCREMENTAL", "true").lower() == "true"  # Reuse stored profiles of unchanged tables
+    PROFILE_STORE_DIR = os.getenv("PROFILE_STORE_DIR", ".cache/profiles")
+    PROFILE_CHANGE_THRESHOLD = float(os.getenv("PROFILE_CHANGE_THRESHOLD", "0.05"))  # Changed-row fraction that triggers a re-scan
+    PROFILE_MAX_AGE_HOURS = float(os.getenv("PROFILE_MAX_AGE_HOURS", "168"))  # Stored profiles older than this are re-scanned; 0 = never
+
+    # Column sketches
+    PROFILE_METHOD = os.getenv("PROFILE_METHOD", "aggregate").lower()  # "aggregate" (server-side queries), "sketch" (streamed mergeable sketches) or "extract" (local columnar extracts)
+    SKETCH_WORKERS = int(os.getenv("SKETCH_WORKERS", "4"))  # Keyset-paginated chunk streams read concurrently, across all tables
+    SKETCH_PAGE_ROWS = int(os.getenv("SKETCH_PAGE_ROWS", "50000"))  # Rows per keyset page
+    SKETCH_HLL_PRECISION = int(os.getenv("SKETCH_HLL_PRECISION", "14"))  # 2^p HyperLogLog registers, about 0.8% error at 14
+    SKETCH_KLL_K = int(os.getenv("SKETCH_KLL_K", "200"))  # KLL compactor size, about 1% rank error at 200
+    SKETCH_HEAVY_HITTERS = int(os.getenv("SKETCH_HEAVY_HITTERS", "100"))  # Space-saving counters per column
+
+    # Extract cache (PROFILE_METHOD=extract)
+    EXTRACT_CACHE_DIR = os.getenv("EXTRACT_CACHE_DIR", ".cache/extracts")
+    EXTRACT_MAX_ROWS = int(os.getenv("EXTRACT_MAX_ROWS", "1000000"))  # Larger tables are extracted from a TABLESAMPLE of this size; 0 = full copy
+    EXTRACT_PAGE_ROWS = int(os.getenv("EXTRACT_PAGE_ROWS", "100000"))  # Rows per keyset page
+    EXTRACT_ARRAYSIZE = int(os.getenv("EXTRACT_ARRAYSIZE", "10000"))  # cursor.arraysize: rows per fetch round trip and per record batch
+    EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "4"))  # Tables extracted concurrently
+    EXTRACT_MAX_AGE_HOURS = float(os.getenv("EXTRACT_MAX_AGE_HOURS", "168"))  # Older extracts are refreshed; 0 = never
+
+    # Synthetic data generation
+    GENERATOR_SCALE = float(os.getenv("GENERATOR_SCALE", "1.0"))  # 1.0 = 1,000 movies and 10,000 reviews
+    GENERATOR_SEED = int(os.getenv("GENERATOR_SEED")) if os.getenv("GENERATOR_SEED") else None  # Unset = different data every run
+    GENERATOR_CHUNK_ROWS = int(os.getenv("GENERATOR_CHUNK_ROWS", "100000"))  # Rows generated and committed per chunk
+    GENERATOR_CHECKPOINT_PATH = os.getenv("GENERATOR_CHECKPOINT_PATH", ".cache/generation_checkpoint.json")
+    GENERATOR_WORKERS = int(os.getenv("GENERATOR_WORKERS", "1"))  # Processes generating chunks; 1 = in-process
+    GENERATOR_REFERENCE_DATE = os.getenv("GENERATOR_REFERENCE_DATE")  # ISO date that relative dates count back from; unset = today
+    GENERATOR_MODE = os.getenv("GENERATOR_MODE", "stream").lower()  # "stream" (NumPy + bulk load) or "set_based" (T-SQL INSERT ... SELECT on the server)
+    GENERATOR_PARTITION_ROWS = int(os.getenv("GENERATOR_PARTITION_ROWS", "1000000"))  # Set-based: rows per INSERT ... SELECT
+    GENERATOR_SQL_OUTPUT = os.getenv("GENERATOR_SQL_OUTPUT")  # Set-based: also write the generated T-SQL script to this file
+    GENERATOR_TEXT_SOURCE = os.getenv("GENERATOR_TEXT_SOURCE", "faker").lower()  # "faker" or "extract" (text values of the extracted tables)
+
+    # Bulk loading
+    LOAD_STRATEGY = os.getenv("LOAD_STRATEGY", "executemany")  # "executemany", "tvp" or "bcp"
+    LOAD_BATCH_SIZE = int(os.getenv("LOAD_BATCH_SIZE", "10000"))  # Rows per round trip
+    LOAD_COMMIT_INTERVAL = int(os.getenv("LOAD_COMMIT_INTERVAL", "100000"))  # Rows per transaction
+    LOAD_FAST_EXECUTEMANY = os.getenv("LOAD_FAST_EXECUTEMANY", "true").lower() == "true"
+    LOAD_PARALLEL_TABLES = int(os.getenv("LOAD_PARALLEL_TABLES", "4"))  # Tables loaded concurrently per FK wave
+    BCP_EXECUTABLE = os.getenv("BCP_EXECUTABLE", "bcp")
+
+    # LLM response cache
+    LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "record")  # "off", "record" (read-through) or "replay" (cache only, no endpoint)
+    LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".cache/llm")
+    LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))  # Least recently used responses are evicted above this size
+
+    # Tracing (main.py --profile)
+    TRACE_OUTPUT_PATH = os.getenv("TRACE_OUTPUT_PATH", ".cache/trace.json")
+    TRACE_TOP_N = int(os.getenv("TRACE_TOP_N", "15"))  # Hot spots printed after a profiled run
+
+    # Batch analysis
+    BATCH_DATABASES = [name.strip() for name in os.getenv("BATCH_DATABASES", "").split(",") if name.strip()]
+    BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", "4"))  # Databases analyzed at the same time
+    BATCH_OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", "batch_results")
+    BATCH_TIMEOUT_SECONDS = float(os.getenv("BATCH_TIMEOUT_SECONDS", "0"))  # Per database; 0 = no limit
+
+    # Fidelity validation (db/validate.py)
+    VALIDATION_SYNTHETIC_DB = os.getenv("VALIDATION_SYNTHETIC_DB")  # Synthetic database compared with DB_NAME (a file path with DB_BACKEND=sqlite)
+    VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", "8"))  # Aggregate queries run concurrently, across both databases
+    VALIDATION_BINS = int(os.getenv("VALIDATION_BINS", "50"))  # Shared fixed-width bins per numeric, date and string-length histogram
+    VALIDATION_MAX_CATEGORIES = int(os.getenv("VALIDATION_MAX_CATEGORIES", "1000"))  # Columns with more distinct values are compared by length
+    VALIDATION_KS_THRESHOLD = float(os.getenv("VALIDATION_KS_THRESHOLD", "0.1"))  # Max Kolmogorov-Smirnov distance
+    VALIDATION_CHI_SQUARE_THRESHOLD = float(os.getenv("VALIDATION_CHI_SQUARE_THRESHOLD", "0.05"))  # Max chi-square distance (0..1)
+    VALIDATION_DEGREE_THRESHOLD = float(os.getenv("VALIDATION_DEGREE_THRESHOLD", "0.1"))  # Max KS distance of FK degree distributions
+    VALIDATION_NULL_FRACTION_THRESHOLD = float(os.getenv("VALIDATION_NULL_FRACTION_THRESHOLD", "0.05"))  # Max null fraction difference
+    VALIDATION_QUERY_TIMEOUT_SECONDS = int(os.getenv("VALIDATION_QUERY_TIMEOUT_SECONDS", "300"))
+
+    # Benchmarks
+    BENCHMARK_SCALES = [float(s) for s in os.getenv("BENCHMARK_SCALES", "0.1,1,10").split(",")]  # MovieReviews scale factors
+    BENCHMARK_REPEATS = int(os.getenv("BENCHMARK_REPEATS", "5"))  # Runs per latency measurement (the median is reported)
+    BENCHMARK_RESULTS_DIR = os.getenv("BENCHMARK_RESULTS_DIR", "benchmarks/results")
+
+    @staticmethod
+    def get_server_address():
+        # A named instance is resolved by the SQL Server Browser, anything else is reached on DB_PORT
+        if "\\" in (Config.DB_SERVER or ""):
+            return Config.DB_SERVER
+        return f"tcp:{Config.DB_SERVER},{Config.DB_PORT}"
 
     @staticmethod
-    def get_connection_string():
-        server = f"tcp:{Config.DB_SERVER},1433"
-        return f"DRIVER={{{Config.DB_DRIVER}}};SERVER={server};DATABASE={Config.DB_NAME};Encrypt=yes;TrustServerCertificate=yes;Connection Timeout=30;UID={Config.DB_USER};PWD={Config.DB_PASSWORD};"
\ No newline at end of file
+    def get_connection_string(database=None):
+        # database overrides DB_NAME on the same server (a file path for the SQLite stand-in)
+        if Config.DB_BACKEND == "sqlite":
+            return f"STANDIN=sqlite;DATABASE={database or Config.DB_STANDIN_PATH};"
+        server = Config.get_server_address()
+        return f"DRIVER={{{Config.DB_DRIVER}}};SERVER={server};DATABASE={database or Config.DB_NAME};Encrypt=yes;TrustServerCertificate=yes;Connection Timeout=30;UID={Config.DB_USER};PWD={Config.DB_PASSWORD};"
\ No newline at end of file
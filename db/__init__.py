@@ -0,0 +1,61 @@
+"""
+Database package for shared connection handling and sample database scripts.
+"""
+
+from .connection_pool import (
+    ConnectionPool,
+    PoolTimeoutError,
+    get_connection_pool,
+    pooled_connection,
+    get_pool_stats,
+    close_all_pools,
+    database_errors
+)
+from .sql_utils import (
+    quote_identifier,
+    quote_table_name
+)
+from .catalog import (
+    fetch_schema_info,
+    fetch_foreign_keys,
+    fetch_catalog,
+    fetch_table_columns,
+    fetch_primary_key,
+    column_type_declaration
+)
+from .json_store import (
+    JsonStore,
+    read_json,
+    store_name,
+    write_json
+)
+from .schema_cache import (
+    SchemaCache,
+    fetch_schema_fingerprint,
+    parse_json_output
+)
+
+__all__ = [
+    'ConnectionPool',
+    'PoolTimeoutError',
+    'get_connection_pool',
+    'pooled_connection',
+    'get_pool_stats',
+    'close_all_pools',
+    'database_errors',
+    'quote_identifier',
+    'quote_table_name',
+    'fetch_schema_info',
+    'fetch_foreign_keys',
+    'fetch_catalog',
+    'fetch_table_columns',
+    'fetch_primary_key',
+    'column_type_declaration',
+    'JsonStore',
+    'read_json',
+    'store_name',
+    'write_json',
+    'SchemaCache',
+    'fetch_schema_fingerprint',
+    'parse_json_output'
+]
@@ -0,0 +1,199 @@
+"""
+Database Catalog
+Plain catalog queries shared by the CrewAI tools, the data model builder and the loaders.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db.connection_pool import pooled_connection
+from db.sql_utils import quote_table_name
+from tracing import get_tracer
+
+SCHEMA_INFO_QUERY = """
+    SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE
+    FROM INFORMATION_SCHEMA.COLUMNS
+    ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION
+"""
+
+FOREIGN_KEYS_QUERY = """
+    SELECT
+        fk.name AS constraint_name,
+        SCHEMA_NAME(tp.schema_id) AS parent_schema,
+        tp.name AS parent_table,
+        cp.name AS parent_column,
+        SCHEMA_NAME(tr.schema_id) AS referenced_schema,
+        tr.name AS referenced_table,
+        cr.name AS referenced_column
+    FROM sys.foreign_keys fk
+    INNER JOIN sys.foreign_key_columns fkc
+        ON fk.object_id = fkc.constraint_object_id
+    INNER JOIN sys.tables tp
+        ON fkc.parent_object_id = tp.object_id
+    INNER JOIN sys.columns cp
+        ON fkc.parent_object_id = cp.object_id
+       AND fkc.parent_column_id = cp.column_id
+    INNER JOIN sys.tables tr
+        ON fkc.referenced_object_id = tr.object_id
+    INNER JOIN sys.columns cr
+        ON fkc.referenced_object_id = cr.object_id
+       AND fkc.referenced_column_id = cr.column_id
+    ORDER BY tp.name, fk.name
+"""
+
+
+def fetch_schema_info() -> Dict[str, Any]:
+    """Queries INFORMATION_SCHEMA.COLUMNS and groups the columns by 'schema.table'."""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SCHEMA_INFO_QUERY)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+    result: Dict[str, Any] = {
+        "database_name": Config.DB_NAME,
+        "tables": []
+    }
+
+    table_map: Dict[str, List[Dict[str, Any]]] = {}
+    for schema, table, col, dtype, nullable in rows:
+        key = f"{schema}.{table}"
+        table_map.setdefault(key, []).append({
+            "column_name": col,
+            "data_type": dtype,
+            "is_nullable": (nullable.upper() == "YES")
+        })
+
+    # Convert to list structure
+    for table_name, columns in table_map.items():
+        result["tables"].append({
+            "table_name": table_name,
+            "columns": columns
+        })
+    return result
+
+
+def fetch_foreign_keys() -> List[Dict[str, str]]:
+    """Queries sys.foreign_keys for every foreign key column pair in the database."""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(FOREIGN_KEYS_QUERY)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+    return [
+        {
+            "constraint_name": row.constraint_name,
+            "parent_schema": row.parent_schema,
+            "parent_table": row.parent_table,
+            "parent_column": row.parent_column,
+            "referenced_schema": row.referenced_schema,
+            "referenced_table": row.referenced_table,
+            "referenced_column": row.referenced_column
+        }
+        for row in rows
+    ]
+
+
+def fetch_catalog() -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+    """
+    Runs the schema and foreign key queries concurrently on two pooled connections.
+
+    The queries are independent, so the data model costs the slower of the two round trips instead of both.
+    """
+    tracer = get_tracer()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        schema_info = executor.submit(tracer.bind(fetch_schema_info))
+        foreign_keys = executor.submit(tracer.bind(fetch_foreign_keys))
+        return schema_info.result(), foreign_keys.result()
+
+TABLE_COLUMNS_QUERY = """
+    SELECT
+        COLUMN_NAME,
+        DATA_TYPE,
+        CHARACTER_MAXIMUM_LENGTH,
+        NUMERIC_PRECISION,
+        NUMERIC_SCALE,
+        DATETIME_PRECISION,
+        IS_NULLABLE,
+        COLUMNPROPERTY(OBJECT_ID(QUOTENAME(TABLE_SCHEMA) + '.' + QUOTENAME(TABLE_NAME)), COLUMN_NAME, 'IsIdentity') AS is_identity,
+        ORDINAL_POSITION
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?
+    ORDER BY ORDINAL_POSITION
+"""
+
+
+def fetch_table_columns(table_name: str) -> List[Dict[str, Any]]:
+    """Returns the full column definitions (type, length, precision, identity) of one 'schema.table'."""
+    schema, _, table = table_name.rpartition(".")
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(TABLE_COLUMNS_QUERY, schema or "dbo", table)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+    return [
+        {
+            "column_name": name,
+            "data_type": data_type,
+            "max_length": max_length,
+            "precision": precision,
+            "scale": scale,
+            "datetime_precision": datetime_precision,
+            "is_nullable": (nullable.upper() == "YES"),
+            "is_identity": bool(is_identity),
+            "ordinal_position": ordinal_position,
+        }
+        for name, data_type, max_length, precision, scale, datetime_precision, nullable, is_identity, ordinal_position in rows
+    ]
+
+
+PRIMARY_KEY_QUERY = """
+    SELECT c.name AS column_name, TYPE_NAME(c.user_type_id) AS data_type
+    FROM sys.indexes i
+    INNER JOIN sys.index_columns ic
+        ON i.object_id = ic.object_id
+       AND i.index_id = ic.index_id
+    INNER JOIN sys.columns c
+        ON ic.object_id = c.object_id
+       AND ic.column_id = c.column_id
+    WHERE i.is_primary_key = 1
+      AND i.object_id = OBJECT_ID(?)
+    ORDER BY ic.key_ordinal
+"""
+
+
+def fetch_primary_key(table_name: str) -> List[Dict[str, str]]:
+    """Returns the primary key columns (in key order) with their data types; empty for a heap without a key."""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(PRIMARY_KEY_QUERY, quote_table_name(table_name))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+    return [{"column_name": name, "data_type": data_type} for name, data_type in rows]
+
+
+def column_type_declaration(column: Dict[str, Any]) -> str:
+    """Renders a column definition from fetch_table_columns as a T-SQL type, e.g. NVARCHAR(MAX) or DECIMAL(10,2)."""
+    data_type = column["data_type"].upper()
+    if data_type in ("CHAR", "VARCHAR", "NCHAR", "NVARCHAR", "BINARY", "VARBINARY"):
+        length = column.get("max_length")
+        return f"{data_type}({'MAX' if length in (None, -1) else length})"
+    if data_type in ("DECIMAL", "NUMERIC"):
+        return f"{data_type}({column['precision']},{column['scale']})"
+    if data_type in ("DATETIME2", "DATETIMEOFFSET", "TIME") and column.get("datetime_precision") is not None:
+        return f"{data_type}({column['datetime_precision']})"
+    return data_type
@@ -0,0 +1,280 @@
+"""
+Database Connection Pool
+Process-wide pool of pyodbc connections shared by all tools and scripts.
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from tracing import trace_connection
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+def _pyodbc_connect(connection_string: str):
+    from db.sqlite_standin import connect_standin, is_standin_connection_string
+
+    if is_standin_connection_string(connection_string):
+        return connect_standin(connection_string)
+    import pyodbc
+    return pyodbc.connect(connection_string)
+
+
+def database_errors() -> tuple:
+    """
+    The driver's error classes for use in an except clause, e.g. `except database_errors():`.
+    pyodbc is only imported when an exception is actually being matched, and without it there are none.
+    """
+    try:
+        import pyodbc
+    except ImportError:
+        return ()
+    return (pyodbc.Error,)
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of database connections.
+
+    - At most `max_size` connections are open (idle + in use) at any time; callers block
+      up to `checkout_timeout` seconds when the pool is exhausted.
+    - Connections idle for at least `health_check_after` seconds are validated with a
+      cheap query on checkout and replaced if broken (0 validates every checkout, one extra round trip each).
+    - Connections idle for longer than `max_idle_seconds` are closed on the next pool access.
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        name: str = "default",
+        connect: Optional[Callable[[str], Any]] = None,
+        max_size: int = 8,
+        max_idle_seconds: float = 300.0,
+        checkout_timeout: float = 30.0,
+        health_check_after: float = 30.0,
+        health_check_query: str = "SELECT 1",
+    ):
+        self.name = name
+        self._connection_string = connection_string
+        self._connect = connect or _pyodbc_connect
+        self.max_size = max(1, max_size)
+        self.max_idle_seconds = max_idle_seconds
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+        self.health_check_query = health_check_query
+
+        self._idle = deque()  # (connection, returned_at) with the most recently returned on the right
+        self._in_use = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "hits": 0,
+            "misses": 0,
+            "waits": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "connect_seconds_total": 0.0,
+            "health_check_failures": 0,
+            "evicted_idle": 0,
+            "discarded": 0,
+        }
+
+    def acquire(self):
+        """Checks out a connection, reusing an idle one when possible."""
+        started = time.monotonic()
+        waited = False
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"Connection pool '{self.name}' is closed")
+                self._evict_idle_locked()
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    self._in_use += 1
+                    reused = True
+                    break
+                if self._in_use < self.max_size:
+                    conn, returned_at = None, None
+                    self._in_use += 1
+                    reused = False
+                    break
+                remaining = self.checkout_timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.checkout_timeout}s waiting for a connection "
+                        f"from pool '{self.name}' (max_size={self.max_size})"
+                    )
+                waited = True
+                self._condition.wait(remaining)
+
+        try:
+            if reused and time.monotonic() - returned_at >= self.health_check_after and not self._is_healthy(conn):
+                self._close_quietly(conn)
+                with self._condition:
+                    self._stats["health_check_failures"] += 1
+                reused = False
+            if not reused:
+                connect_started = time.monotonic()
+                conn = self._connect(self._connection_string)
+                connect_seconds = time.monotonic() - connect_started
+        except BaseException:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+        wait_seconds = time.monotonic() - started if waited else 0.0
+        with self._condition:
+            self._stats["checkouts"] += 1
+            self._stats["hits" if reused else "misses"] += 1
+            if not reused:
+                self._stats["connect_seconds_total"] += connect_seconds
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_seconds_total"] += wait_seconds
+                self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], wait_seconds)
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """Returns a connection to the pool, rolling back any open transaction first."""
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._condition:
+            self._in_use -= 1
+            if discard:
+                self._stats["discarded"] += 1
+            elif not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._evict_idle_locked()
+            self._condition.notify()
+
+        if conn is not None:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and always returns it."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            # A failed statement may leave the connection unusable; the rollback in release()
+            # or the next health check decides whether it is kept
+            self.release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns a snapshot of pool usage metrics."""
+        with self._condition:
+            stats = dict(self._stats)
+            stats["in_use"] = self._in_use
+            stats["idle"] = len(self._idle)
+            stats["max_size"] = self.max_size
+        checkouts = stats["checkouts"]
+        stats["hit_ratio"] = round(stats["hits"] / checkouts, 4) if checkouts else 0.0
+        stats["avg_connect_seconds"] = (
+            round(stats["connect_seconds_total"] / stats["misses"], 4) if stats["misses"] else 0.0
+        )
+        return stats
+
+    def close(self):
+        """Closes all idle connections; in-use connections are closed when released."""
+        with self._condition:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._condition.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def _evict_idle_locked(self):
+        # Oldest idle connections sit on the left of the deque
+        cutoff = time.monotonic() - self.max_idle_seconds
+        while self._idle and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.popleft()
+            self._stats["evicted_idle"] += 1
+            self._close_quietly(conn)
+
+    def _is_healthy(self, conn) -> bool:
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+        finally:
+            if cursor is not None:
+                self._close_quietly(cursor)
+
+    @staticmethod
+    def _close_quietly(resource):
+        try:
+            resource.close()
+        except Exception:
+            pass
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(database: Optional[str] = None) -> ConnectionPool:
+    """
+    Returns the process-wide pool for the configured database, creating it on first use.
+    Pass database to pool connections to another database on the same server.
+    """
+    connection_string = Config.get_connection_string(database)
+    with _pools_lock:
+        pool = _pools.get(connection_string)
+        if pool is None:
+            pool = ConnectionPool(
+                connection_string,
+                name=database or Config.DB_NAME or "default",
+                max_size=Config.DB_POOL_MAX_SIZE,
+                max_idle_seconds=Config.DB_POOL_MAX_IDLE_SECONDS,
+                checkout_timeout=Config.DB_POOL_CHECKOUT_TIMEOUT,
+                health_check_after=Config.DB_POOL_HEALTH_CHECK_AFTER,
+            )
+            _pools[connection_string] = pool
+        return pool
+
+
+@contextmanager
+def pooled_connection(database: Optional[str] = None):
+    """Borrows a connection from the process-wide pool for the duration of the block (traced when profiling)."""
+    with get_connection_pool(database).connection() as conn:
+        yield trace_connection(conn)
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns usage metrics for every pool created in this process, keyed by pool name."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all_pools)
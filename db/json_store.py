@@ -0,0 +1,66 @@
+"""
+JSON Store
+The on-disk JSON files kept per server/database (schema snapshot, profile and sketch stores, extract
+manifest): their file name, tolerant reads and atomic writes, so a crashed run never leaves a partial file.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+
+def store_name() -> str:
+    """'<database>-<hash of server/database>': readable, and distinct for the same database name on two servers."""
+    key = f"{Config.DB_SERVER}/{Config.DB_NAME}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", Config.DB_NAME or "default")
+    return f"{safe_name}-{digest}"
+
+
+def read_json(path: str) -> Optional[Any]:
+    """The file's JSON content, or None when it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path: str, data: Any, **dump_options):
+    """Writes to a temporary file first and renames it over path."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, default=str, **dump_options)
+    os.replace(tmp_path, path)
+
+
+class JsonStore:
+    """A JSON document of named sections of entries; updates merge entries into a section under a lock."""
+
+    def __init__(self, path: Callable[[], str], sections: Sequence[str] = ("tables",)):
+        self.path = path  # Resolved on every access, so it follows Config.DB_NAME
+        self.sections = tuple(sections)
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Any]:
+        data = read_json(self.path())
+        if not isinstance(data, dict):
+            return {section: {} for section in self.sections}
+        return data
+
+    def update(self, section: str, entries: Dict[str, Any]):
+        """Replaces the given entries of one section and writes the store atomically; other entries are kept."""
+        with self._lock:
+            data = self.load()
+            data.setdefault(section, {}).update(entries)
+            data["database_name"] = Config.DB_NAME
+            data["updated_at"] = datetime.datetime.now().isoformat()
+            write_json(self.path(), data)
@@ -0,0 +1,74 @@
+"""
+Schema Snapshot Cache
+On-disk cache of the JSON data model keyed by a cheap schema fingerprint, so unchanged
+databases skip schema introspection and the schema analysis LLM step.
+"""
+
+import datetime
+import json
+import os
+import re
+from typing import Any, Dict, Optional
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db.connection_pool import pooled_connection
+from db.json_store import read_json, store_name, write_json
+
+# Any DDL on a user object bumps its modify_date, adds or removes a row, or changes the checksum.
+# sys.objects covers tables, columns (via their table), constraints, views and procedures.
+SCHEMA_FINGERPRINT_QUERY = """
+    SELECT
+        COUNT_BIG(*) AS object_count,
+        CONVERT(VARCHAR(33), MAX(modify_date), 126) AS last_modified,
+        CHECKSUM_AGG(CHECKSUM(object_id, name, modify_date)) AS objects_checksum
+    FROM sys.objects
+    WHERE is_ms_shipped = 0
+"""
+
+
+def fetch_schema_fingerprint() -> str:
+    """Returns a fingerprint that changes whenever a user object in the database is created, altered or dropped."""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SCHEMA_FINGERPRINT_QUERY)
+            object_count, last_modified, objects_checksum = cursor.fetchone()
+        finally:
+            cursor.close()
+    return f"{object_count}:{last_modified}:{objects_checksum}"
+
+
+def parse_json_output(raw: str) -> Dict[str, Any]:
+    """Parses agent output that may be wrapped in a markdown code fence."""
+    text = raw.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    return json.loads(text)
+
+
+class SchemaCache:
+    """Stores one data model snapshot per server/database together with the fingerprint it was built from."""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or Config.SCHEMA_CACHE_DIR
+
+    def _path(self) -> str:
+        return os.path.join(self.cache_dir, f"{store_name()}.json")
+
+    def load(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached data model if it was built from the same schema fingerprint."""
+        snapshot = read_json(self._path())
+        if not isinstance(snapshot, dict) or snapshot.get("fingerprint") != fingerprint:
+            return None
+        return snapshot.get("data_model")
+
+    def save(self, fingerprint: str, data_model: Dict[str, Any]):
+        """Writes the data model snapshot atomically so a crashed run never leaves a partial file."""
+        write_json(self._path(), {
+            "fingerprint": fingerprint,
+            "database_name": Config.DB_NAME,
+            "cached_at": datetime.datetime.now().isoformat(),
+            "data_model": data_model,
+        }, indent=2)
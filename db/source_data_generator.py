@@ -1,129 +1,85 @@
 import sys, os
-import pyodbc
+import datetime
 import random
-from faker import Faker
+from dataclasses import asdict
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
+from db import fetch_foreign_keys, fetch_table_columns, get_connection_pool
+from generator import (
+    STRATEGY_SET_BASED,
+    GenerationCheckpoint,
+    MovieReviewsSpec,
+    StreamingPipeline,
+    TextPools,
+    build_generation_script,
+    format_load_report,
+    movie_reviews_set_spec,
+    movie_reviews_sources,
+    render_script,
+    run_generation_script
+)
 
 '''
 This code is going to to insert data into MovieReviews database.
 The MovieReviews Database is used to test tine synthetic data generation by the agentic AI application.
+Rows are generated column-wise with NumPy (see generator/), GENERATOR_SCALE=1.0 gives 1,000 movies and 10,000 reviews.
+Tables are streamed in chunks of GENERATOR_CHUNK_ROWS rows; re-running after a failure resumes from the last committed chunk.
+Chunks are generated by GENERATOR_WORKERS processes; with GENERATOR_SEED and GENERATOR_REFERENCE_DATE set the data is identical for any worker count.
+With GENERATOR_MODE=set_based the rows are built inside SQL Server by generated T-SQL instead (see generator/set_based.py).
 '''
 
 #---------- CONFIG ----------
-conn = pyodbc.connect(Config.get_connection_string())
-cursor = conn.cursor()
-fake = Faker()
-
-#---------- GENRE LIST ----------
-real_genres = [
-    "Action", "Adventure", "Animation", "Biography", "Comedy", "Crime",
-    "Documentary", "Drama", "Family", "Fantasy", "History", "Horror",
-    "Musical", "Mystery", "Romance", "Sci-Fi", "Sport", "Thriller",
-    "War", "Western"
-]
-
-#---------- CLEANUP ----------
-cursor.execute("DELETE FROM Reviews")
-cursor.execute("DELETE FROM Movies")
-cursor.execute("DELETE FROM Genres")
-conn.commit()
-
-#---------- 1. Insert Genres ----------
-for g in real_genres:
-    cursor.execute("INSERT INTO Genres (GenreName) VALUES (?)", g)
-conn.commit()
-
-#Get Genre IDs mapping
-cursor.execute("SELECT GenreID, GenreName FROM Genres ORDER BY GenreID")
-genres_info = cursor.fetchall()
-genre_id_map = {row[0]: row[1] for row in genres_info}
-
-# ---------- 2. Genre Distribution Setup ----------
-total_movies = 1000
-top_3_genres = random.sample(list(genre_id_map.keys()), 3)
-no_movie_genres = random.sample(
-    [g for g in genre_id_map.keys() if g not in top_3_genres], 2
-)
-remaining_genres = [g for g in genre_id_map.keys() if g not in top_3_genres + no_movie_genres]
-
-movies_in_top3 = int(total_movies * 0.60)
-movies_in_remaining_genres = total_movies - movies_in_top3
-
-print("\n--- Genre Distribution ---")
-print("Top 3 genres (60% of movies):", [genre_id_map[g] for g in top_3_genres])
-print("No movie genres:", [genre_id_map[g] for g in no_movie_genres])
-print("Other genres (share remaining movies):", [genre_id_map[g] for g in remaining_genres])
-print("---------------------------\n")
-
-# ---------- 3. Insert Movies ----------
-movies = []
-
-# Movies for top 3 genres
-for _ in range(movies_in_top3):
-    genre = random.choice(top_3_genres)
-    title = fake.sentence(nb_words=3).replace('.', '')
-    release_year = random.randint(1980, 2024)
-    duration = random.randint(80, 180)
-    movies.append((title, release_year, duration, genre))
-
-# Movies for remaining genres
-while movies_in_remaining_genres > 0:
-    genre = random.choice(remaining_genres)
-    title = fake.sentence(nb_words=3).replace('.', '')
-    release_year = random.randint(1980, 2024)
-    duration = random.randint(80, 180)
-    movies.append((title, release_year, duration, genre))
-    movies_in_remaining_genres -= 1
-
-cursor.executemany(
-    "INSERT INTO Movies (Title, ReleaseYear, DurationMinutes, GenreID) VALUES (?, ?, ?, ?)",
-    movies
-)
-conn.commit()
-
-# Get Movie IDs
-cursor.execute("SELECT MovieID FROM Movies ORDER BY MovieID")
-movie_ids = [row[0] for row in cursor.fetchall()]
-
-# ---------- 4. Insert Reviews ----------
-total_reviews = 10000
-no_review_movies = random.sample(movie_ids, 500)
-movies_with_reviews = [m for m in movie_ids if m not in no_review_movies]
-
-top_100_movies = random.sample(movies_with_reviews, 100)
-remaining_movies = [m for m in movies_with_reviews if m not in top_100_movies]
-
-reviews_for_top_100 = int(total_reviews * 0.90)  # 9000
-reviews_for_remaining_400 = total_reviews - reviews_for_top_100  # 1000
-
-reviews = []
-
-# Reviews for top 100 movies
-for _ in range(reviews_for_top_100):
-    movie_id = random.choice(top_100_movies)
-    reviewer = fake.first_name()
-    rating = random.randint(1, 10)
-    review_text = fake.sentence(nb_words=12)
-    review_date = fake.date_between(start_date='-5y', end_date='today')
-    reviews.append((movie_id, reviewer, rating, review_text, review_date))
-
-# Reviews for remaining 400 movies
-for _ in range(reviews_for_remaining_400):
-    movie_id = random.choice(remaining_movies)
-    reviewer = fake.first_name()
-    rating = random.randint(1, 10)
-    review_text = fake.sentence(nb_words=12)
-    review_date = fake.date_between(start_date='-5y', end_date='today')
-    reviews.append((movie_id, reviewer, rating, review_text, review_date))
-
-cursor.executemany(
-    "INSERT INTO Reviews (MovieID, ReviewerName, Rating, ReviewText, ReviewDate) VALUES (?, ?, ?, ?, ?)",
-    reviews
-)
-conn.commit()
-
-print("✅ Data generation completed successfully.")
-
-cursor.close()
-conn.close()
+spec = MovieReviewsSpec(scale=Config.GENERATOR_SCALE)
+today = datetime.date.fromisoformat(Config.GENERATOR_REFERENCE_DATE) if Config.GENERATOR_REFERENCE_DATE else datetime.date.today()
+pool_size = min(spec.text_pool_size, max(spec.total_movies, spec.total_reviews))
+
+
+def text_pools(seed: int) -> TextPools:
+    """Faker text, or with GENERATOR_TEXT_SOURCE=extract the real text values of the local table extracts."""
+    if Config.GENERATOR_TEXT_SOURCE == "extract":
+        from tools.extract_cache import ExtractCache  # Needs pyarrow, so only imported when used
+        return TextPools.from_extract(ExtractCache(), size=pool_size, seed=seed)
+    return TextPools.from_faker(pool_size, seed=seed)
+
+
+if Config.GENERATOR_MODE == STRATEGY_SET_BASED:
+    #---------- Compile the spec to T-SQL and run it on the server ----------
+    seed = Config.GENERATOR_SEED if Config.GENERATOR_SEED is not None else random.randrange(2 ** 31)
+    pools = text_pools(seed)
+    set_spec = movie_reviews_set_spec(spec, pools, seed, today, Config.GENERATOR_PARTITION_ROWS)
+    schema_info = {"tables": [
+        {"table_name": table_name, "columns": fetch_table_columns(table_name)} for table_name in set_spec.tables
+    ]}
+    steps = build_generation_script(set_spec, schema_info, fetch_foreign_keys())
+    if Config.GENERATOR_SQL_OUTPUT:
+        with open(Config.GENERATOR_SQL_OUTPUT, "w", encoding="utf-8") as f:
+            f.write(render_script(steps))
+        print(f"T-SQL script written to {Config.GENERATOR_SQL_OUTPUT}")
+    print(f"Generating on the server with seed {seed} in partitions of {set_spec.partition_rows:,} rows")
+    results = run_generation_script(steps)
+else:
+    run_spec = {**asdict(spec), "reference_date": Config.GENERATOR_REFERENCE_DATE}
+    checkpoint = GenerationCheckpoint.resolve(Config.GENERATOR_CHECKPOINT_PATH, run_spec, Config.GENERATOR_SEED, Config.GENERATOR_CHUNK_ROWS)
+    pools = text_pools(checkpoint.seed)
+
+    #---------- CLEANUP ----------
+    if checkpoint.resumed:
+        print(f"Resuming from {Config.GENERATOR_CHECKPOINT_PATH}: {checkpoint.chunks_done}")
+    else:
+        pool = get_connection_pool()
+        conn = pool.acquire()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Reviews")
+        cursor.execute("DELETE FROM Movies")
+        cursor.execute("DELETE FROM Genres")
+        conn.commit()
+        cursor.close()
+        pool.release(conn)
+
+    #---------- Stream Genres, Movies and Reviews in foreign key order ----------
+    sources = movie_reviews_sources(spec, pools, checkpoint.seed, today)
+    print(f"Generating with seed {checkpoint.seed} on {Config.GENERATOR_WORKERS} worker(s)")
+    results = StreamingPipeline(sources, checkpoint).run(fetch_foreign_keys())
+print(format_load_report(results))
+
+print(f"✅ Data generation completed successfully: {', '.join(f'{r.rows} rows in {r.table_name}' for r in results)}.")
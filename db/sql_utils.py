@@ -0,0 +1,14 @@
+"""
+SQL Utilities
+Helpers for building T-SQL statements from catalog names.
+"""
+
+
+def quote_identifier(name: str) -> str:
+    """Quotes a single identifier, escaping closing brackets."""
+    return f"[{name.replace(']', ']]')}]"
+
+
+def quote_table_name(table_name: str) -> str:
+    """Quotes a 'schema.table' (or bare 'table') name for safe use in T-SQL."""
+    return ".".join(quote_identifier(part) for part in table_name.split(".", 1))
@@ -0,0 +1,474 @@
+"""
+SQLite Stand-in Database
+A local SQLite database behind the same connection interface as SQL Server, for offline benchmarks.
+
+Connections are opened from a "STANDIN=sqlite;DATABASE=<path>;" connection string (see
+Config.get_connection_string with DB_BACKEND=sqlite) and behave like pyodbc connections:
+execute(sql, *params), rows with attribute access, commit/rollback. The T-SQL this repo emits is
+rewritten to SQLite (COUNT_BIG, LEN, DATEDIFF, DATEADD, TABLESAMPLE, TOP, CROSS APPLY, schema prefixes) and the
+catalog queries (INFORMATION_SCHEMA, sys.foreign_keys, primary keys, partition row counts, the schema
+fingerprint) are answered from SQLite's own catalog. It is a stand-in for measuring this code,
+not a general T-SQL emulator.
+"""
+
+import datetime
+import functools
+import math
+import os
+import re
+import sqlite3
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+STANDIN_PREFIX = "STANDIN=sqlite;"
+DEFAULT_SCHEMA = "dbo"
+
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(sep=" "))
+
+
+def standin_connection_string(path: str) -> str:
+    return f"{STANDIN_PREFIX}DATABASE={path};"
+
+
+def is_standin_connection_string(connection_string: str) -> bool:
+    return connection_string.startswith(STANDIN_PREFIX)
+
+
+# ============================================================================
+# T-SQL rewriting
+# ============================================================================
+
+def _closing_paren(sql: str, open_index: int) -> int:
+    depth = 0
+    quoted = False
+    for index in range(open_index, len(sql)):
+        char = sql[index]
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+            if depth == 0:
+                return index
+    raise ValueError("Unbalanced parentheses in SQL")
+
+
+def _split_top_level(text: str, separator: str = ",") -> List[str]:
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == separator and depth == 0 and not quoted:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+def _rewrite_cross_apply(sql: str) -> str:
+    """
+    Rewrites the two CROSS APPLY shapes used here, which SQLite has no LATERAL join for:
+    - FROM src CROSS APPLY (VALUES (...), (...)) AS v(a, b) -> FROM (SELECT ... FROM src UNION ALL ...) AS v
+    - FROM rel r CROSS APPLY (SELECT expr AS name) b          -> FROM (SELECT r.*, expr AS name FROM rel r) r
+    """
+    while True:
+        match = re.search(r"\bCROSS\s+APPLY\s*\(", sql, re.IGNORECASE)
+        if not match:
+            return sql
+        open_index = match.end() - 1
+        close_index = _closing_paren(sql, open_index)
+        body = sql[open_index + 1:close_index].strip()
+        alias_match = re.match(r"\s*(?:AS\s+)?(\w+)\s*(?:\(([^)]*)\))?", sql[close_index + 1:], re.IGNORECASE)
+        alias, alias_columns = alias_match.group(1), alias_match.group(2)
+        rest = " " + sql[close_index + 1 + alias_match.end():]
+
+        from_match = None
+        for from_match in re.finditer(r"\bFROM\s+", sql[:match.start()], re.IGNORECASE):
+            pass
+        if from_match is None:
+            raise ValueError("CROSS APPLY without a FROM clause")
+        source = sql[from_match.end():match.start()].strip()
+        head = sql[:from_match.start()]
+
+        if re.match(r"VALUES\b", body, re.IGNORECASE):
+            columns = [c.strip() for c in alias_columns.split(",")]
+            selects = []
+            for row in _split_top_level(body[len("VALUES"):].strip()):
+                values = _split_top_level(row.strip()[1:-1])
+                selects.append("SELECT " + ", ".join(f"{v} AS {c}" for v, c in zip(values, columns)) + f" FROM {source}")
+            sql = f"{head}FROM ({' UNION ALL '.join(selects)}) AS {alias}{rest}"
+        else:
+            select_list = re.sub(r"^SELECT\s+", "", body, flags=re.IGNORECASE)
+            source_alias = source.split()[-1]
+            rest = re.sub(rf"\b{re.escape(alias)}\.", f"{source_alias}.", rest)
+            head = re.sub(rf"\b{re.escape(alias)}\.", f"{source_alias}.", head)
+            sql = f"{head}FROM (SELECT {source_alias}.*, {select_list} FROM {source}) {source_alias}{rest}"
+
+
+def _rewrite_top(sql: str) -> str:
+    """SELECT TOP (n) ... -> SELECT ... LIMIT n, for the statement and for parenthesized subqueries."""
+    while True:
+        top = re.search(r"\bSELECT\s+TOP\s*\(\s*(\d+)\s*\)\s+", sql, re.IGNORECASE)
+        if not top:
+            return sql
+        limit = f" LIMIT {top.group(1)}"
+        opening = sql.rfind("(", 0, top.start())
+        if opening != -1 and not sql[opening + 1:top.start()].strip():
+            closing = _closing_paren(sql, opening)
+            sql = sql[:top.start()] + "SELECT " + sql[top.end():closing] + limit + sql[closing:]
+        else:
+            sql = sql[:top.start()] + "SELECT " + sql[top.end():].rstrip().rstrip(";") + limit
+
+
+@functools.lru_cache(maxsize=1024)
+def translate_tsql(sql: str) -> str:
+    """Rewrites a T-SQL statement emitted by this repo into SQLite."""
+    sql = re.sub(r"\[dbo\]\.|\bdbo\.", "", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bN'", "'", sql)
+    sql = re.sub(r"\bCOUNT_BIG\s*\(", "COUNT(", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bLEN\s*\(", "LENGTH(", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\s+TABLESAMPLE\s*\([^)]*\)\s*REPEATABLE\s*\(\s*\d+\s*\)", "", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\s+WITH\s*\(\s*TABLOCK\s*\)", "", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\b(N?VAR(?:CHAR|BINARY))\s*\(\s*MAX\s*\)", r"\1(-1)", sql, flags=re.IGNORECASE)
+    sql = _rewrite_top(sql)
+    sql = re.sub(r"\bDATEADD\s*\(\s*(\w+)\s*,", r"DATEADD('\1',", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bDATEDIFF(?:_BIG)?\s*\(\s*(\w+)\s*,", r"DATEDIFF('\1',", sql, flags=re.IGNORECASE)
+    return _rewrite_cross_apply(sql)
+
+
+def _parse_moment(value: Any) -> Optional[datetime.datetime]:
+    if value is None:
+        return None
+    text = str(value)
+    if re.fullmatch(r"\d{8}", text):
+        text = f"{text[:4]}-{text[4:6]}-{text[6:]}"
+    return datetime.datetime.fromisoformat(text)
+
+
+DATEDIFF_UNITS = {"DAY": 86400, "HOUR": 3600, "MINUTE": 60, "SECOND": 1}
+
+
+def _datediff(unit: str, start: Any, end: Any) -> Optional[int]:
+    start, end = _parse_moment(start), _parse_moment(end)
+    if start is None or end is None:
+        return None
+    unit = unit.upper()
+    if unit == "DAY":
+        return (end.date() - start.date()).days
+    return int((end - start).total_seconds() // DATEDIFF_UNITS[unit])
+
+
+def _dateadd(unit: str, number: Optional[int], moment: Any) -> Optional[str]:
+    start = _parse_moment(moment)
+    if start is None or number is None:
+        return None
+    unit = unit.upper()
+    shifted = start + (datetime.timedelta(days=number) if unit == "DAY" else datetime.timedelta(seconds=number * DATEDIFF_UNITS[unit]))
+    # Date-only input stays a date, like DATEADD on a DATE column
+    return shifted.date().isoformat() if re.fullmatch(r"\d{8}|\d{4}-\d{2}-\d{2}", str(moment)) else shifted.isoformat(sep=" ")
+
+
+def _log(value: Optional[float], base: Optional[float] = None) -> Optional[float]:
+    # T-SQL LOG(x, base) takes the base second; SQLite's built-in takes it first
+    if value is None or value <= 0:
+        return None
+    return math.log(value) if base is None else math.log(value, base)
+
+
+# ============================================================================
+# Connection and cursor
+# ============================================================================
+
+@functools.lru_cache(maxsize=256)
+def _row_type(names: Tuple[str, ...]):
+    index = {name.lower(): position for position, name in enumerate(names)}
+
+    class Row(tuple):
+        """Tuple with attribute access by column name, like pyodbc.Row."""
+        __slots__ = ()
+
+        def __getattr__(self, name: str) -> Any:
+            try:
+                return self[index[name.lower()]]
+            except KeyError:
+                raise AttributeError(name) from None
+
+    return Row
+
+
+class StandInCursor:
+    def __init__(self, connection: "StandInConnection"):
+        self.connection = connection
+        self._cursor = connection._sqlite.cursor()
+        self._static_rows: Optional[List[tuple]] = None
+        self._static_description = None
+        self.rowcount = -1
+        self.arraysize = 1
+
+    @property
+    def description(self):
+        return self._static_description if self._static_rows is not None else self._cursor.description
+
+    def execute(self, sql: str, *params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = tuple(params[0])
+        self._static_rows = None
+        catalog_result = self.connection._catalog.answer(sql, params)
+        if catalog_result is not None:
+            names, rows = catalog_result
+            self._static_description = [(name, None, None, None, None, None, None) for name in names]
+            self._static_rows = [_row_type(tuple(names))(row) for row in rows]
+            self.rowcount = -1
+            return self
+        if re.match(r"\s*SET\s+IDENTITY_INSERT\b", sql, re.IGNORECASE):
+            # INTEGER PRIMARY KEY columns always accept explicit values
+            self._static_description, self._static_rows, self.rowcount = None, [], -1
+            return self
+        self._cursor.execute(translate_tsql(sql), params)
+        self.rowcount = self._cursor.rowcount
+        return self
+
+    def executemany(self, sql: str, seq_of_params: Sequence[Sequence[Any]]):
+        self._static_rows = None
+        self._cursor.executemany(translate_tsql(sql), seq_of_params)
+        self.rowcount = self._cursor.rowcount
+        return self
+
+    def _wrap(self, rows: List[tuple]) -> List[tuple]:
+        description = self._cursor.description
+        if not description:
+            return rows
+        row_type = _row_type(tuple(column[0] for column in description))
+        return [row_type(row) for row in rows]
+
+    def fetchone(self):
+        if self._static_rows is not None:
+            return self._static_rows.pop(0) if self._static_rows else None
+        row = self._cursor.fetchone()
+        return self._wrap([row])[0] if row is not None else None
+
+    def fetchmany(self, size: Optional[int] = None):
+        size = size or self.arraysize
+        if self._static_rows is not None:
+            rows, self._static_rows = self._static_rows[:size], self._static_rows[size:]
+            return rows
+        return self._wrap(self._cursor.fetchmany(size))
+
+    def fetchall(self):
+        if self._static_rows is not None:
+            rows, self._static_rows = self._static_rows, []
+            return rows
+        return self._wrap(self._cursor.fetchall())
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+    def setinputsizes(self, sizes):
+        pass
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    def __init__(self, path: str):
+        self.path = path
+        self.timeout = 0  # Accepted like pyodbc's query timeout; not enforced
+        self._sqlite = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._sqlite.execute("PRAGMA foreign_keys = ON")
+        self._sqlite.create_function("DATEDIFF", 3, _datediff, deterministic=True)
+        self._sqlite.create_function("DATEADD", 3, _dateadd, deterministic=True)
+        self._sqlite.create_function("LOG", 2, _log, deterministic=True)
+        self._sqlite.create_function("LOG", 1, _log, deterministic=True)
+        self._sqlite.create_function("FLOOR", 1, lambda x: None if x is None else math.floor(x), deterministic=True)
+        self._catalog = StandInCatalog(self._sqlite)
+
+    def cursor(self) -> StandInCursor:
+        return StandInCursor(self)
+
+    def execute(self, sql: str, *params) -> StandInCursor:
+        return self.cursor().execute(sql, *params)
+
+    def commit(self):
+        self._sqlite.commit()
+
+    def rollback(self):
+        self._sqlite.rollback()
+
+    def close(self):
+        self._sqlite.close()
+
+
+def connect_standin(connection_string: str) -> StandInConnection:
+    settings = dict(part.split("=", 1) for part in connection_string.split(";") if "=" in part)
+    return StandInConnection(settings["DATABASE"])
+
+
+# ============================================================================
+# Catalog emulation
+# ============================================================================
+
+def _declared_type(declared: str) -> Tuple[str, Optional[int], Optional[int], Optional[int]]:
+    """'NVARCHAR(100)' -> ('nvarchar', 100, None, None); NVARCHAR(MAX) is stored as NVARCHAR(-1)."""
+    match = re.match(r"\s*(\w+)\s*(?:\(\s*(-?\d+)\s*(?:,\s*(\d+))?\s*\))?", declared or "")
+    if not match:
+        return "sql_variant", None, None, None
+    data_type = match.group(1).lower()
+    data_type = "int" if data_type == "integer" else data_type
+    first = int(match.group(2)) if match.group(2) else None
+    second = int(match.group(3)) if match.group(3) else None
+    if data_type in ("decimal", "numeric"):
+        return data_type, None, first, second
+    return data_type, first, None, None
+
+
+class StandInCatalog:
+    """Answers the SQL Server catalog queries of this repo from SQLite's PRAGMAs."""
+
+    def __init__(self, sqlite: sqlite3.Connection):
+        self._sqlite = sqlite
+
+    def answer(self, sql: str, params: Sequence[Any]) -> Optional[Tuple[List[str], List[tuple]]]:
+        normalized = re.sub(r"\s+", " ", sql)
+        if "INFORMATION_SCHEMA.COLUMNS" in normalized and "COLUMNPROPERTY" in normalized:
+            return self._table_columns(params[1])
+        if "INFORMATION_SCHEMA.COLUMNS" in normalized:
+            return self._schema_info()
+        if "is_primary_key" in normalized:
+            return self._primary_key(params[0])
+        if "sys.foreign_keys" in normalized:
+            return self._foreign_keys()
+        if "sys.dm_db_index_usage_stats" in normalized:
+            return self._change_markers()
+        if "CHANGE_TRACKING_CURRENT_VERSION" in normalized:
+            return ["version"], [(None,)]
+        if "sys.dm_db_partition_stats" in normalized or "sys.partitions" in normalized:
+            return self._row_counts()
+        if "FROM sys.objects" in normalized and "is_ms_shipped" in normalized:
+            return self._fingerprint()
+        return None
+
+    def _tables(self) -> List[str]:
+        rows = self._sqlite.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _columns(self, table: str) -> List[Dict[str, Any]]:
+        columns = []
+        for cid, name, declared, not_null, _, primary_key in self._sqlite.execute(f'PRAGMA table_info("{table}")'):
+            data_type, max_length, precision, scale = _declared_type(declared)
+            columns.append({
+                "name": name,
+                "data_type": data_type,
+                "max_length": max_length,
+                "precision": precision,
+                "scale": scale,
+                # INTEGER PRIMARY KEY is SQLite's auto-assigned rowid, the counterpart of IDENTITY
+                "is_identity": bool(primary_key) and (declared or "").upper() == "INTEGER",
+                "is_nullable": not not_null and not primary_key,
+                "ordinal_position": cid + 1,
+            })
+        return columns
+
+    def _schema_info(self):
+        rows = []
+        for table in self._tables():
+            for column in self._columns(table):
+                rows.append((DEFAULT_SCHEMA, table, column["name"], column["data_type"],
+                             "YES" if column["is_nullable"] else "NO"))
+        return ["TABLE_SCHEMA", "TABLE_NAME", "COLUMN_NAME", "DATA_TYPE", "IS_NULLABLE"], rows
+
+    def _table_columns(self, table: str):
+        rows = [
+            (c["name"], c["data_type"], c["max_length"], c["precision"], c["scale"], None,
+             "YES" if c["is_nullable"] else "NO", 1 if c["is_identity"] else 0, c["ordinal_position"])
+            for c in self._columns(table)
+        ]
+        names = ["COLUMN_NAME", "DATA_TYPE", "CHARACTER_MAXIMUM_LENGTH", "NUMERIC_PRECISION", "NUMERIC_SCALE",
+                 "DATETIME_PRECISION", "IS_NULLABLE", "is_identity", "ORDINAL_POSITION"]
+        return names, rows
+
+    def _primary_key(self, quoted_table: str):
+        table = quoted_table.rsplit(".", 1)[-1].strip("[]")
+        key = sorted((primary_key, name, declared) for _, name, declared, _, _, primary_key
+                     in self._sqlite.execute(f'PRAGMA table_info("{table}")') if primary_key)
+        return ["column_name", "data_type"], [(name, _declared_type(declared)[0]) for _, name, declared in key]
+
+    def _foreign_keys(self):
+        rows = []
+        for table in self._tables():
+            for fk_id, _, referenced, column, referenced_column, *_ in self._sqlite.execute(f'PRAGMA foreign_key_list("{table}")'):
+                rows.append((f"FK_{table}_{referenced}_{fk_id}", DEFAULT_SCHEMA, table, column,
+                             DEFAULT_SCHEMA, referenced, referenced_column))
+        names = ["constraint_name", "parent_schema", "parent_table", "parent_column",
+                 "referenced_schema", "referenced_table", "referenced_column"]
+        return names, sorted(rows, key=lambda row: (row[2], row[0]))
+
+    def _row_counts(self):
+        rows = [
+            (DEFAULT_SCHEMA, table, self._sqlite.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0])
+            for table in self._tables()
+        ]
+        return ["schema_name", "table_name", "row_count"], rows
+
+    def _change_markers(self):
+        # SQLite has neither usage stats nor change tracking, so only row-count deltas are detected
+        _, rows = self._row_counts()
+        names = ["schema_name", "table_name", "row_count", "last_user_update", "ct_min_valid_version"]
+        return names, [(schema, table, row_count, None, None) for schema, table, row_count in rows]
+
+    def _fingerprint(self):
+        definitions = self._sqlite.execute(
+            "SELECT name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()
+        checksum = zlib.crc32(repr(definitions).encode("utf-8"))
+        return ["object_count", "last_modified", "objects_checksum"], [(len(definitions), None, checksum)]
+
+
+# ============================================================================
+# Seeding
+# ============================================================================
+
+def schema_ddl_to_sqlite(tsql: str) -> List[str]:
+    """Extracts the CREATE TABLE statements of a T-SQL script (e.g. db/create_schema.sql) as SQLite DDL."""
+    statements = []
+    for match in re.finditer(r"CREATE\s+TABLE\s+(?:\[?dbo\]?\.)?\[?(\w+)\]?\s*\(", tsql, re.IGNORECASE):
+        close_index = _closing_paren(tsql, match.end() - 1)
+        body = tsql[match.end():close_index]
+        body = re.sub(r"\[dbo\]\.|\bdbo\.", "", body, flags=re.IGNORECASE)
+        body = re.sub(r"\b\w*INT\s+IDENTITY\s*\(\s*\d+\s*,\s*\d+\s*\)\s+PRIMARY\s+KEY", "INTEGER PRIMARY KEY", body, flags=re.IGNORECASE)
+        body = re.sub(r"\(\s*MAX\s*\)", "(-1)", body, flags=re.IGNORECASE)
+        body = re.sub(r"\bGETDATE\s*\(\s*\)", "CURRENT_TIMESTAMP", body, flags=re.IGNORECASE)
+        statements.append(f'CREATE TABLE IF NOT EXISTS "{match.group(1)}" ({body})')
+    return statements
+
+
+def create_standin_database(path: str, schema_script: str, reset: bool = True) -> str:
+    """Creates the stand-in database file from a T-SQL schema script and returns its connection string."""
+    if reset and os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(schema_script, "r", encoding="utf-8") as f:
+        statements = schema_ddl_to_sqlite(f.read())
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")  # Readers do not block the loader
+        for statement in statements:
+            conn.execute(statement)
+        conn.commit()
+    finally:
+        conn.close()
+    return standin_connection_string(path)
@@ -0,0 +1,41 @@
+import argparse
+import json
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import fetch_catalog
+from tools.data_model import build_data_model
+from tools.fidelity_validator import ValidationSettings, format_fidelity_report, validate_fidelity
+
+'''
+Checks a synthetic database against the source database (DB_NAME) without exporting rows.
+Every table and foreign key of the source data model is aggregated on the server in both databases at the same time,
+and the returned histograms are compared: KS distance for numbers, dates and text lengths, chi-square distance for
+categorical values, KS distance of the degree distribution (child rows per referenced key) for every foreign key.
+Exits with status 1 when any check fails.
+'''
+
+parser = argparse.ArgumentParser(description="Validate the fidelity of a synthetic database against the source database.")
+parser.add_argument("--synthetic", default=Config.VALIDATION_SYNTHETIC_DB, help="synthetic database name (a file path with DB_BACKEND=sqlite)")
+parser.add_argument("--output", default=None, metavar="REPORT_JSON", help="also write the full report to this file")
+args = parser.parse_args()
+if not args.synthetic:
+    parser.error("no synthetic database given (use --synthetic or VALIDATION_SYNTHETIC_DB)")
+
+#---------- Data model of the source ----------
+data_model = build_data_model(*fetch_catalog()).to_dict()
+
+#---------- Compare ----------
+settings = ValidationSettings.from_config()
+print(f"🔍 Comparing {args.synthetic} with {Config.DB_NAME or Config.DB_STANDIN_PATH}: "
+      f"{len(data_model['tables'])} tables, {len(data_model['foreign_keys'])} foreign key columns")
+report = validate_fidelity(data_model, args.synthetic, settings=settings)
+print(format_fidelity_report(report))
+
+if args.output:
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Report written to {args.output}")
+
+print(f"{'✅ Synthetic data matches the source' if report['passed'] else '❌ Synthetic data does not match the source'}.")
+sys.exit(0 if report["passed"] else 1)
@@ -0,0 +1,124 @@
+"""
+Generator package for vectorized synthetic data generation.
+"""
+
+from .engine import (
+    GeneratedTable,
+    TextPool,
+    integers,
+    dates_between,
+    weighted_choice,
+    from_sketch,
+    from_extract,
+    split_counts,
+    grouped_choice,
+    partition_keys,
+    AffinePermutation
+)
+from .movie_reviews import (
+    REAL_GENRES,
+    MovieReviewsSpec,
+    TextPools,
+    GenrePlan,
+    ReviewPlan,
+    plan_genres,
+    plan_reviews,
+    review_movie_counts,
+    review_counts,
+    generate_genres,
+    generate_movies,
+    generate_reviews,
+    movie_reviews_sources,
+    movie_reviews_set_spec
+)
+from .bulk_loader import (
+    STRATEGY_EXECUTEMANY,
+    STRATEGY_TVP,
+    STRATEGY_BCP,
+    LoadOptions,
+    LoadResult,
+    BulkLoader,
+    plan_load_waves,
+    format_load_report
+)
+from .set_based import (
+    STRATEGY_SET_BASED,
+    ColumnRule,
+    ForeignKeyRule,
+    TableTarget,
+    SetBasedSpec,
+    ScriptStep,
+    tally_cte,
+    hashed_rows,
+    build_generation_script,
+    render_script,
+    run_generation_script
+)
+from .pipeline import (
+    ChunkedTableSource,
+    GenerationCheckpoint,
+    StreamingPipeline,
+    chunk_rng,
+    generate_chunk
+)
+
+__all__ = [
+    # Column generators
+    'GeneratedTable',
+    'TextPool',
+    'integers',
+    'dates_between',
+    'weighted_choice',
+    'from_sketch',
+    'from_extract',
+    'split_counts',
+    'grouped_choice',
+    'partition_keys',
+    'AffinePermutation',
+
+    # MovieReviews spec
+    'REAL_GENRES',
+    'MovieReviewsSpec',
+    'TextPools',
+    'GenrePlan',
+    'ReviewPlan',
+    'plan_genres',
+    'plan_reviews',
+    'review_movie_counts',
+    'review_counts',
+    'generate_genres',
+    'generate_movies',
+    'generate_reviews',
+    'movie_reviews_sources',
+    'movie_reviews_set_spec',
+
+    # Bulk loading
+    'STRATEGY_EXECUTEMANY',
+    'STRATEGY_TVP',
+    'STRATEGY_BCP',
+    'LoadOptions',
+    'LoadResult',
+    'BulkLoader',
+    'plan_load_waves',
+    'format_load_report',
+
+    # Set-based generation
+    'STRATEGY_SET_BASED',
+    'ColumnRule',
+    'ForeignKeyRule',
+    'TableTarget',
+    'SetBasedSpec',
+    'ScriptStep',
+    'tally_cte',
+    'hashed_rows',
+    'build_generation_script',
+    'render_script',
+    'run_generation_script',
+
+    # Streaming pipeline
+    'ChunkedTableSource',
+    'GenerationCheckpoint',
+    'StreamingPipeline',
+    'chunk_rng',
+    'generate_chunk'
+]
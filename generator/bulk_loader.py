@@ -0,0 +1,311 @@
+"""
+Bulk Loader
+Loads generated tables into SQL Server in batches with configurable commit intervals, using one of:
+- executemany: parameterized INSERTs with pyodbc fast_executemany (one round trip per batch),
+- tvp: one INSERT ... SELECT FROM a table-valued parameter per batch,
+- bcp: a character-mode data file handed to the bcp utility, for very large tables.
+Tables are loaded in waves ordered by the foreign key graph; tables within a wave load in parallel.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import column_type_declaration, fetch_table_columns, pooled_connection, quote_identifier, quote_table_name
+from .engine import GeneratedTable
+
+STRATEGY_EXECUTEMANY = "executemany"
+STRATEGY_TVP = "tvp"
+STRATEGY_BCP = "bcp"
+
+WIDE_STRING_TYPES = {"nchar", "nvarchar", "ntext"}
+NARROW_STRING_TYPES = {"char", "varchar", "text"}
+
+
+@dataclass
+class LoadOptions:
+    strategy: str = STRATEGY_EXECUTEMANY
+    batch_size: int = 10_000  # Rows sent per round trip
+    commit_interval: int = 100_000  # Rows per transaction
+    fast_executemany: bool = True
+    max_parallel_tables: int = 4  # Tables loaded concurrently within one wave
+    bcp_executable: str = "bcp"
+
+    @classmethod
+    def from_config(cls) -> "LoadOptions":
+        return cls(
+            strategy=Config.LOAD_STRATEGY,
+            batch_size=Config.LOAD_BATCH_SIZE,
+            commit_interval=Config.LOAD_COMMIT_INTERVAL,
+            fast_executemany=Config.LOAD_FAST_EXECUTEMANY,
+            max_parallel_tables=Config.LOAD_PARALLEL_TABLES,
+            bcp_executable=Config.BCP_EXECUTABLE,
+        )
+
+
+@dataclass
+class LoadResult:
+    table_name: str
+    strategy: str
+    rows: int = 0
+    seconds: float = 0.0
+    batches: int = 0
+    commits: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "table_name": self.table_name,
+            "strategy": self.strategy,
+            "rows": self.rows,
+            "seconds": round(self.seconds, 3),
+            "batches": self.batches,
+            "commits": self.commits,
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def _fk_table(fk: Dict[str, str], side: str) -> str:
+    """Returns the 'schema.table' of the parent/referenced side of a GetForeignKeysTool or data model entry."""
+    schema = fk.get(f"{side}_schema")
+    table = fk[f"{side}_table"]
+    return f"{schema}.{table}" if schema else table
+
+
+def plan_load_waves(table_names: List[str], foreign_keys: List[Dict[str, str]]) -> List[List[str]]:
+    """
+    Orders tables into waves so every table loads after the tables it references.
+
+    Raises:
+        ValueError: if the foreign keys between the given tables form a cycle.
+    """
+    pending = {name: set() for name in table_names}
+    for fk in foreign_keys:
+        child, parent = _fk_table(fk, "parent"), _fk_table(fk, "referenced")
+        if child in pending and parent in pending and child != parent:
+            pending[child].add(parent)
+
+    waves = []
+    loaded = set()
+    while pending:
+        wave = sorted(name for name, parents in pending.items() if parents <= loaded)
+        if not wave:
+            raise ValueError(f"Foreign keys form a cycle between tables: {sorted(pending)}")
+        waves.append(wave)
+        loaded.update(wave)
+        for name in wave:
+            del pending[name]
+    return waves
+
+
+class BulkLoader:
+    def __init__(self, options: Optional[LoadOptions] = None):
+        self.options = options or LoadOptions.from_config()
+        self._table_columns: Dict[str, List[Dict[str, Any]]] = {}
+
+    def load_table(self, table: GeneratedTable) -> LoadResult:
+        """Loads a generated table; explicit values for identity columns are inserted with IDENTITY_INSERT."""
+        if table.table_name not in self._table_columns:
+            self._table_columns[table.table_name] = fetch_table_columns(table.table_name)
+        definitions = {column["column_name"]: column for column in self._table_columns[table.table_name]}
+        missing = [name for name in table.column_names if name not in definitions]
+        if missing:
+            raise ValueError(f"Columns {missing} do not exist in {table.table_name}")
+        columns = [definitions[name] for name in table.column_names]
+
+        result = LoadResult(table_name=table.table_name, strategy=self.options.strategy)
+        started = time.monotonic()
+        if self.options.strategy == STRATEGY_EXECUTEMANY:
+            self._load_executemany(table, columns, result)
+        elif self.options.strategy == STRATEGY_TVP:
+            self._load_tvp(table, columns, result)
+        elif self.options.strategy == STRATEGY_BCP:
+            self._load_bcp(table, columns, result)
+        else:
+            raise ValueError(f"Unknown load strategy: {self.options.strategy}")
+        result.seconds = time.monotonic() - started
+        return result
+
+    def load_waves(self, producers: Dict[str, Callable[[], GeneratedTable]],
+                   foreign_keys: List[Dict[str, str]]) -> List[LoadResult]:
+        """
+        Loads tables wave by wave. Producers run inside their wave, so a child table's producer
+        can read the keys of parent tables loaded in earlier waves.
+        """
+        results = []
+        for wave in plan_load_waves(list(producers), foreign_keys):
+            workers = max(1, min(self.options.max_parallel_tables, len(wave)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results.extend(executor.map(lambda name: self.load_table(producers[name]()), wave))
+        return results
+
+    def _insert_statement(self, table: GeneratedTable, source: str) -> str:
+        column_list = ", ".join(quote_identifier(name) for name in table.column_names)
+        return f"INSERT INTO {quote_table_name(table.table_name)} ({column_list}) {source}"
+
+    def _load_executemany(self, table: GeneratedTable, columns: List[Dict[str, Any]], result: LoadResult):
+        placeholders = ", ".join("?" for _ in table.column_names)
+        statement = self._insert_statement(table, f"VALUES ({placeholders})")
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                if self.options.fast_executemany:
+                    cursor.fast_executemany = True
+                    # Without explicit sizes fast_executemany sizes string buffers from the first
+                    # batch and either truncates later values or over-allocates for (MAX) columns
+                    cursor.setinputsizes(_input_sizes(columns))
+                self._run_batches(conn, table, columns, result, lambda batch: cursor.executemany(statement, batch))
+            finally:
+                cursor.close()
+
+    def _load_tvp(self, table: GeneratedTable, columns: List[Dict[str, Any]], result: LoadResult):
+        schema, _, name = table.table_name.rpartition(".")
+        schema = schema or "dbo"
+        type_columns = ", ".join(f"{quote_identifier(c['column_name'])} {column_type_declaration(c)}" for c in columns)
+        # The column hash in the name makes an ALTER TABLE create a new type instead of reusing a stale one
+        type_name = f"{name}_BulkLoadType_{hashlib.sha256(type_columns.encode('utf-8')).hexdigest()[:8]}"
+        qualified_type = f"{quote_identifier(schema)}.{quote_identifier(type_name)}"
+        column_list = ", ".join(quote_identifier(n) for n in table.column_names)
+        statement = self._insert_statement(table, f"SELECT {column_list} FROM ?")
+
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT TYPE_ID(?)", f"{schema}.{type_name}")
+                if cursor.fetchone()[0] is None:
+                    cursor.execute(f"CREATE TYPE {qualified_type} AS TABLE ({type_columns})")
+                    conn.commit()
+                # pyodbc takes the table type name and schema as the first two elements of the TVP
+                self._run_batches(conn, table, columns, result, lambda batch: cursor.execute(statement, [[type_name, schema, *batch]]))
+            finally:
+                cursor.close()
+
+    def _run_batches(self, conn, table: GeneratedTable, columns: List[Dict[str, Any]], result: LoadResult,
+                     send_batch: Callable[[List[tuple]], Any]):
+        identity_insert = any(column["is_identity"] for column in columns)
+        if identity_insert:
+            conn.execute(f"SET IDENTITY_INSERT {quote_table_name(table.table_name)} ON")
+        try:
+            rows_since_commit = 0
+            for batch in table.iter_batches(self.options.batch_size):
+                send_batch(batch)
+                result.rows += len(batch)
+                result.batches += 1
+                rows_since_commit += len(batch)
+                if rows_since_commit >= self.options.commit_interval:
+                    conn.commit()
+                    result.commits += 1
+                    rows_since_commit = 0
+            if rows_since_commit:
+                conn.commit()
+                result.commits += 1
+        finally:
+            if identity_insert:
+                conn.execute(f"SET IDENTITY_INSERT {quote_table_name(table.table_name)} OFF")
+
+    def _load_bcp(self, table: GeneratedTable, columns: List[Dict[str, Any]], result: LoadResult):
+        if shutil.which(self.options.bcp_executable) is None:
+            raise RuntimeError(f"bcp utility '{self.options.bcp_executable}' not found on PATH")
+
+        work_dir = tempfile.mkdtemp(prefix="bulk_load_")
+        try:
+            format_path = os.path.join(work_dir, "table.fmt")
+            data_path = os.path.join(work_dir, "table.dat")
+            with open(format_path, "w", encoding="utf-8") as f:
+                f.write(_bcp_format_file(columns))
+            with open(data_path, "w", encoding="utf-8", newline="") as f:
+                for batch in table.iter_batches(self.options.batch_size):
+                    f.writelines(_bcp_line(row) for row in batch)
+                    result.batches += 1
+
+            if Config.DB_USER:
+                # No -P: bcp prompts for the password and reads it from stdin, so it never shows up in the process list
+                login, password = ["-U", Config.DB_USER], f"{Config.DB_PASSWORD or ''}\n"
+            else:
+                login, password = ["-T"], None  # Integrated authentication
+            try:
+                subprocess.run(
+                    [
+                        self.options.bcp_executable, quote_table_name(table.table_name), "in", data_path,
+                        "-S", Config.get_server_address(), "-d", Config.DB_NAME,
+                        *login,
+                        "-f", format_path,
+                        "-b", str(self.options.commit_interval),  # bcp commits every -b rows
+                        "-C", "65001", "-k", "-u",
+                        *(["-E"] if any(column["is_identity"] for column in columns) else []),  # keep explicit identity values
+                    ],
+                    input=password,
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                )
+            except subprocess.CalledProcessError as e:
+                output = (e.stderr or "").strip() or (e.stdout or "").strip()  # bcp reports most errors on stdout
+                raise RuntimeError(f"bcp failed for {table.table_name} (exit code {e.returncode}): {output}") from e
+            result.rows = len(table)
+            result.commits = -(-len(table) // self.options.commit_interval)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _input_sizes(columns: List[Dict[str, Any]]) -> List[Optional[tuple]]:
+    import pyodbc
+
+    sizes = []
+    for column in columns:
+        data_type = column["data_type"].lower()
+        # Size 0 binds (MAX) columns as streamed LOB parameters instead of fixed-size buffers
+        length = 0 if column.get("max_length") in (None, -1) else column["max_length"]
+        if data_type in WIDE_STRING_TYPES:
+            sizes.append((pyodbc.SQL_WVARCHAR, length, 0))
+        elif data_type in NARROW_STRING_TYPES:
+            sizes.append((pyodbc.SQL_VARCHAR, length, 0))
+        else:
+            sizes.append(None)
+    return sizes
+
+
+def _bcp_format_file(columns: List[Dict[str, Any]]) -> str:
+    """
+    Non-XML format file mapping tab-separated fields to server columns (identity columns are skipped).
+    bcp maps fields by the server column ordinal; the whitespace-delimited name field is informational only,
+    so names are reduced to [A-Za-z0-9_] to keep spaces or quotes in a column name from shifting the line.
+    """
+    lines = ["14.0", str(len(columns))]
+    for index, column in enumerate(columns, start=1):
+        terminator = "\\n" if index == len(columns) else "\\t"
+        name = re.sub(r"[^A-Za-z0-9_]", "_", column["column_name"])
+        lines.append(f'{index} SQLCHAR 0 0 "{terminator}" {column["ordinal_position"]} {name} ""')
+    return "\n".join(lines) + "\n"
+
+
+def _bcp_line(row: tuple) -> str:
+    fields = []
+    for value in row:
+        if value is None:
+            fields.append("")
+        else:
+            fields.append(str(value).replace("\t", " ").replace("\n", " ").replace("\r", " "))
+    return "\t".join(fields) + "\n"
+
+
+def format_load_report(results: List[LoadResult]) -> str:
+    lines = [f"{'table':<30} {'strategy':<12} {'rows':>12} {'seconds':>10} {'rows/sec':>12}"]
+    for result in results:
+        lines.append(
+            f"{result.table_name:<30} {result.strategy:<12} {result.rows:>12,} "
+            f"{result.seconds:>10.2f} {result.rows_per_second:>12,.0f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,188 @@
+"""
+Generation Engine
+Vectorized column generators: every function produces a whole column with NumPy in one call
+instead of one Python/Faker call per row.
+"""
+
+import datetime
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Sketched dates are days since this epoch (tools.column_profiler.DATE_EPOCH)
+SKETCH_DATE_EPOCH = np.datetime64("1900-01-01", "D")
+
+
+@dataclass
+class GeneratedTable:
+    """A generated table held column-wise; all columns have the same length."""
+    table_name: str
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns)
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Tuple]:
+        """Converts a slice of the columns to DB-API row tuples of plain Python values."""
+        return list(zip(*(column[start:stop].tolist() for column in self.columns.values())))
+
+    def iter_batches(self, batch_size: int) -> Iterator[List[Tuple]]:
+        for start in range(0, len(self), batch_size):
+            yield self.rows(start, start + batch_size)
+
+
+class TextPool:
+    """
+    A pool of pre-generated text values (e.g. from Faker) sampled by index.
+
+    Calling Faker once per row dominates generation time; drawing indexes into a fixed pool
+    keeps the value distribution while making per-row cost a NumPy gather.
+    """
+
+    def __init__(self, values: Sequence[str]):
+        if len(values) == 0:
+            raise ValueError("TextPool needs at least one value")
+        self.values = np.asarray(values, dtype=object)
+
+    @classmethod
+    def from_factory(cls, factory: Callable[[], str], size: int) -> "TextPool":
+        return cls([factory() for _ in range(size)])
+
+    @classmethod
+    def from_extract(cls, column) -> "TextPool":
+        """A pool of the non-null values of an extracted column (a pyarrow array, e.g. from tools.extract_cache.ExtractCache)."""
+        return cls(column.drop_null().to_numpy(zero_copy_only=False))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        return self.values[rng.integers(0, len(self.values), size=n)]
+
+
+def integers(low: int, high: int, n: int, rng: np.random.Generator) -> np.ndarray:
+    """Uniform integers in [low, high], inclusive like random.randint."""
+    return rng.integers(low, high + 1, size=n, dtype=np.int64)
+
+
+def dates_between(start: datetime.date, end: datetime.date, n: int, rng: np.random.Generator) -> np.ndarray:
+    """Uniform dates in [start, end] as datetime64[D]."""
+    span_days = (end - start).days
+    return np.datetime64(start, "D") + rng.integers(0, span_days + 1, size=n).astype("timedelta64[D]")
+
+
+def weighted_choice(keys: Sequence, weights: Sequence[float], n: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draws n keys with probability proportional to their weights.
+
+    Uses one cumulative-weight array and a binary search per draw, so it stays O(n log k)
+    for millions of keys (e.g. skewed foreign key assignment).
+    """
+    keys = np.asarray(keys)
+    cumulative = np.cumsum(np.asarray(weights, dtype=np.float64))
+    if len(cumulative) == 0 or cumulative[-1] <= 0:
+        raise ValueError("weighted_choice needs at least one key with a positive weight")
+    draws = rng.random(n) * cumulative[-1]
+    return keys[np.searchsorted(cumulative, draws, side="right")]
+
+
+def from_sketch(sketch, n: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draws a column that follows a stored column sketch (sketches.ColumnSketch, e.g. from
+    tools.sketch_profiler.SketchStore) with its null fraction; nulls are None, dates are datetime64[D].
+    """
+    values = sketch.sample(n, rng)
+    if sketch.kind == "date":
+        present = values != None  # noqa: E711 - elementwise comparison on an object array
+        days = np.floor(values[present].astype(np.float64)).astype("timedelta64[D]")
+        values[present] = list(SKETCH_DATE_EPOCH + days)
+    return values
+
+
+def from_extract(column, n: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draws a column by resampling an extracted column (a pyarrow array, e.g. ExtractCache.column) with
+    replacement, so its value distribution and null fraction carry over. Only the n drawn values are
+    gathered out of the memory-mapped column; nulls are None.
+    """
+    import pyarrow as pa
+
+    if len(column) == 0:
+        raise ValueError("Cannot resample an empty column")
+    drawn = column.take(pa.array(rng.integers(0, len(column), size=n)))
+    return drawn.to_numpy(zero_copy_only=False)
+
+
+def split_counts(total: int, shares: Sequence[float]) -> List[int]:
+    """Splits total into integer counts by share; the rounding remainder goes to the last group."""
+    counts = [int(total * share) for share in shares]
+    counts[-1] += total - sum(counts)
+    return counts
+
+
+def grouped_choice(key_groups: Sequence[Sequence], counts: Sequence[int], rng: np.random.Generator) -> np.ndarray:
+    """
+    Draws exactly counts[i] keys uniformly from key_groups[i] for every group and concatenates them.
+
+    This reproduces "group X gets exactly this share of the rows" targets such as
+    "100 movies receive 90% of the reviews".
+    """
+    parts = []
+    for keys, count in zip(key_groups, counts):
+        if count == 0:
+            continue
+        keys = np.asarray(keys)
+        if len(keys) == 0:
+            raise ValueError("grouped_choice cannot draw rows from an empty key group")
+        parts.append(keys[rng.integers(0, len(keys), size=count)])
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+def partition_keys(keys: Sequence, sizes: Sequence[int], rng: np.random.Generator) -> List[np.ndarray]:
+    """Randomly partitions keys into disjoint groups of the given sizes (the last group takes the rest)."""
+    shuffled = rng.permutation(np.asarray(keys))
+    bounds = np.cumsum([0, *sizes])
+    groups = [shuffled[bounds[i]:bounds[i + 1]] for i in range(len(sizes))]
+    groups.append(shuffled[bounds[-1]:])
+    return groups
+
+
+class AffinePermutation:
+    """
+    A random bijection of [0, n) computed on the fly as i -> (a * i + b) mod n.
+
+    Lets a chunk map "the k-th movie of the hot group" to a movie index (and back) without
+    materializing a permutation of all n keys, so memory stays constant as n grows.
+    """
+
+    def __init__(self, n: int, rng: np.random.Generator):
+        if n <= 0:
+            raise ValueError("AffinePermutation needs n > 0")
+        self.n = n
+        multiplier = int(rng.integers(1, n)) if n > 1 else 1
+        while np.gcd(multiplier, n) != 1:
+            multiplier = multiplier % (n - 1) + 1
+        self.multiplier = multiplier
+        self.offset = int(rng.integers(0, n))
+        self.inverse_multiplier = pow(multiplier, -1, n) if n > 1 else 1
+
+    def _multiply_mod(self, values: np.ndarray, factor: int) -> np.ndarray:
+        # values and factor are < n, so the product fits in uint64 while n < 2^32
+        if self.n < 2 ** 32:
+            return (values.astype(np.uint64) * np.uint64(factor)) % np.uint64(self.n)
+        return (values.astype(object) * factor) % self.n
+
+    def forward(self, indexes: np.ndarray) -> np.ndarray:
+        """Position of each index in the permuted order."""
+        indexes = np.asarray(indexes, dtype=np.int64)
+        return ((self._multiply_mod(indexes, self.multiplier).astype(np.int64) + self.offset) % self.n)
+
+    def inverse(self, positions: np.ndarray) -> np.ndarray:
+        """Index found at each position of the permuted order."""
+        shifted = (np.asarray(positions, dtype=np.int64) - self.offset) % self.n
+        return self._multiply_mod(shifted, self.inverse_multiplier).astype(np.int64)
@@ -0,0 +1,326 @@
+"""
+MovieReviews Generation Spec
+Vectorized generation of the MovieReviews sample database with the distributions of
+db/source_data_generator.py, scaled by a scale factor (1.0 = 1,000 movies and 10,000 reviews).
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .engine import (
+    AffinePermutation,
+    GeneratedTable,
+    TextPool,
+    dates_between,
+    grouped_choice,
+    integers,
+    partition_keys,
+    split_counts,
+)
+from .pipeline import ChunkedTableSource
+from .set_based import ColumnRule, ForeignKeyRule, SetBasedSpec, TableTarget
+
+REAL_GENRES = [
+    "Action", "Adventure", "Animation", "Biography", "Comedy", "Crime",
+    "Documentary", "Drama", "Family", "Fantasy", "History", "Horror",
+    "Musical", "Mystery", "Romance", "Sci-Fi", "Sport", "Thriller",
+    "War", "Western"
+]
+
+
+@dataclass
+class MovieReviewsSpec:
+    scale: float = 1.0
+    base_movies: int = 1000
+    base_reviews: int = 10000
+
+    # Genres: 3 genres hold 60% of movies, 2 genres have none, the rest share 40%
+    top_genre_count: int = 3
+    top_genre_movie_share: float = 0.60
+    empty_genre_count: int = 2
+
+    # Reviews: 50% of movies have none, 10% of movies hold 90% of reviews, the rest share 10%
+    no_review_movie_share: float = 0.50
+    hot_movie_share: float = 0.10
+    hot_movie_review_share: float = 0.90
+
+    release_years: tuple = (1980, 2024)
+    durations: tuple = (80, 180)
+    ratings: tuple = (1, 10)
+    review_window_days: int = 5 * 365
+
+    # Distinct Faker values pre-generated per text column
+    text_pool_size: int = 5000
+
+    def __post_init__(self):
+        self.validate()
+
+    def validate(self):
+        """Raises ValueError for settings no dataset can satisfy, before any row is generated."""
+        if self.scale <= 0:
+            raise ValueError(f"MovieReviews scale must be positive, got {self.scale}")
+        for name in ("top_genre_movie_share", "no_review_movie_share", "hot_movie_share", "hot_movie_review_share"):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"MovieReviews {name} must be between 0 and 1, got {getattr(self, name)}")
+        if self.no_review_movie_share + self.hot_movie_share > 1:
+            raise ValueError("MovieReviews no_review_movie_share and hot_movie_share add up to more than 1")
+        remaining_genres = len(REAL_GENRES) - self.top_genre_count - self.empty_genre_count
+        if self.top_genre_count < 0 or self.empty_genre_count < 0 or remaining_genres < 0:
+            raise ValueError(f"MovieReviews top and empty genre counts must fit the {len(REAL_GENRES)} genres")
+        if (self.top_genre_count == 0 and self.top_genre_movie_share > 0) or (remaining_genres == 0 and self.top_genre_movie_share < 1):
+            raise ValueError("MovieReviews top_genre_movie_share gives movies to a genre group without genres")
+        if self.total_reviews and int(self.total_movies * self.no_review_movie_share) >= self.total_movies:
+            raise ValueError(f"MovieReviews has {self.total_reviews} reviews but every one of its {self.total_movies} movies has none")
+
+    @property
+    def total_movies(self) -> int:
+        return max(1, round(self.base_movies * self.scale))
+
+    @property
+    def total_reviews(self) -> int:
+        return max(0, round(self.base_reviews * self.scale))
+
+
+@dataclass
+class TextPools:
+    titles: TextPool
+    reviewer_names: TextPool
+    review_texts: TextPool
+
+    @classmethod
+    def from_faker(cls, size: int, seed: Optional[int] = None) -> "TextPools":
+        from faker import Faker
+
+        fake = Faker()
+        if seed is not None:
+            fake.seed_instance(seed)
+        return cls(
+            titles=TextPool.from_factory(lambda: fake.sentence(nb_words=3).replace('.', ''), size),
+            reviewer_names=TextPool.from_factory(fake.first_name, size),
+            review_texts=TextPool.from_factory(lambda: fake.sentence(nb_words=12), size),
+        )
+
+    @classmethod
+    def from_extract(cls, cache, size: Optional[int] = None, seed: Optional[int] = None) -> "TextPools":
+        """
+        Pools of the real titles, reviewer names and review texts in the extracts of an ExtractCache (refreshed first),
+        each cut to `size` values drawn without replacement when given.
+        """
+        from db import fetch_table_columns
+
+        tables = {
+            table_name: {"table_name": table_name, "columns": fetch_table_columns(table_name)}
+            for table_name in ("dbo.Movies", "dbo.Reviews")
+        }
+        entries = cache.refresh(list(tables.values()))
+        errors = [entry["error"] for entry in entries.values() if "error" in entry]
+        if errors:
+            raise RuntimeError(errors[0])
+        rng = np.random.default_rng(seed)
+
+        def pool(table_name: str, column_name: str) -> TextPool:
+            values = TextPool.from_extract(cache.column(table_name, column_name)).values
+            if size is not None and len(values) > size:
+                values = values[rng.choice(len(values), size=size, replace=False)]
+            return TextPool(values)
+
+        return cls(
+            titles=pool("dbo.Movies", "Title"),
+            reviewer_names=pool("dbo.Reviews", "ReviewerName"),
+            review_texts=pool("dbo.Reviews", "ReviewText"),
+        )
+
+
+@dataclass
+class GenrePlan:
+    top_genres: np.ndarray
+    empty_genres: np.ndarray
+    remaining_genres: np.ndarray
+
+
+def plan_genres(genre_ids: Sequence[int], spec: MovieReviewsSpec, rng: np.random.Generator) -> GenrePlan:
+    top, empty, remaining = partition_keys(genre_ids, [spec.top_genre_count, spec.empty_genre_count], rng)
+    return GenrePlan(top_genres=top, empty_genres=empty, remaining_genres=remaining)
+
+
+def generate_genres() -> GeneratedTable:
+    return GeneratedTable("dbo.Genres", {"GenreName": np.asarray(REAL_GENRES, dtype=object)})
+
+
+def generate_movies(plan: GenrePlan, spec: MovieReviewsSpec, pools: TextPools,
+                    rng: np.random.Generator, count: Optional[int] = None) -> GeneratedTable:
+    n = spec.total_movies if count is None else count
+    genre_counts = split_counts(n, [spec.top_genre_movie_share, 1 - spec.top_genre_movie_share])
+    return GeneratedTable("dbo.Movies", {
+        "Title": pools.titles.sample(n, rng),
+        "ReleaseYear": integers(*spec.release_years, n, rng),
+        "DurationMinutes": integers(*spec.durations, n, rng),
+        "GenreID": grouped_choice([plan.top_genres, plan.remaining_genres], genre_counts, rng),
+    })
+
+
+@dataclass
+class ReviewPlan:
+    no_review_movies: np.ndarray
+    hot_movies: np.ndarray
+    remaining_movies: np.ndarray
+
+
+def review_movie_counts(n_movies: int, n_reviews: int, spec: MovieReviewsSpec) -> Tuple[int, int]:
+    """
+    (movies without reviews, hot movies). Below 10 movies the hot share rounds to none, so one movie outside
+    the no-review group is made hot whenever there are reviews.
+    """
+    no_review_count = int(n_movies * spec.no_review_movie_share)
+    hot_count = int(n_movies * spec.hot_movie_share)
+    if n_reviews and hot_count == 0 and n_movies > no_review_count:
+        hot_count = 1
+    return no_review_count, hot_count
+
+
+def review_counts(n_reviews: int, hot_movies: int, remaining_movies: int, spec: MovieReviewsSpec) -> List[int]:
+    """[reviews of hot movies, reviews of the remaining movies]; a group without movies passes its share to the other."""
+    if hot_movies == 0:
+        return [0, n_reviews]
+    if remaining_movies == 0:
+        return [n_reviews, 0]
+    return split_counts(n_reviews, [spec.hot_movie_review_share, 1 - spec.hot_movie_review_share])
+
+
+def plan_reviews(movie_ids: Sequence[int], spec: MovieReviewsSpec, rng: np.random.Generator) -> ReviewPlan:
+    no_review_count, hot_count = review_movie_counts(len(movie_ids), spec.total_reviews, spec)
+    no_review, hot, remaining = partition_keys(movie_ids, [no_review_count, hot_count], rng)
+    return ReviewPlan(no_review_movies=no_review, hot_movies=hot, remaining_movies=remaining)
+
+
+def generate_reviews(plan: ReviewPlan, spec: MovieReviewsSpec, pools: TextPools,
+                     rng: np.random.Generator, count: Optional[int] = None,
+                     today: Optional[datetime.date] = None) -> GeneratedTable:
+    n = spec.total_reviews if count is None else count
+    today = today or datetime.date.today()
+    counts = review_counts(n, len(plan.hot_movies), len(plan.remaining_movies), spec)
+    return GeneratedTable("dbo.Reviews", {
+        "MovieID": grouped_choice([plan.hot_movies, plan.remaining_movies], counts, rng),
+        "ReviewerName": pools.reviewer_names.sample(n, rng),
+        "Rating": integers(*spec.ratings, n, rng),
+        "ReviewText": pools.review_texts.sample(n, rng),
+        "ReviewDate": dates_between(today - datetime.timedelta(days=spec.review_window_days), today, n, rng),
+    })
+
+
+def _uniform_positions(low: int, high: int, n: int, rng: np.random.Generator) -> np.ndarray:
+    if n and high <= low:
+        raise ValueError("Cannot draw rows from an empty movie group")
+    return rng.integers(low, high, size=n, dtype=np.int64)
+
+
+class _MovieReviewsChunks:
+    """
+    Chunk builders for the streaming pipeline with the same distributions as generate_*.
+
+    Group membership is decided by row index instead of materialized key lists: the first 60% of
+    movies get a top genre, and reviews pick movie positions in a seeded AffinePermutation of all
+    movies (positions [0, no_review) get no reviews, the next hot_count positions are the hot movies).
+    A plain class rather than closures, so the bound methods pickle to worker processes.
+    """
+
+    def __init__(self, spec: MovieReviewsSpec, pools: TextPools, seed: int, today: datetime.date):
+        self.spec = spec
+        self.pools = pools
+        self.today = today
+        plan_rng = np.random.default_rng(np.random.SeedSequence(seed))
+        self.genre_plan = plan_genres(np.arange(len(REAL_GENRES)), spec, plan_rng)
+
+        self.n_movies = spec.total_movies
+        self.top_movies = split_counts(self.n_movies, [spec.top_genre_movie_share, 1 - spec.top_genre_movie_share])[0]
+        self.movie_order = AffinePermutation(self.n_movies, plan_rng)
+        self.no_review_count, self.hot_count = review_movie_counts(self.n_movies, spec.total_reviews, spec)
+        remaining_count = self.n_movies - self.no_review_count - self.hot_count
+        self.hot_reviews = review_counts(spec.total_reviews, self.hot_count, remaining_count, spec)[0]
+
+    def genres(self, start: int, stop: int, key_starts: Dict[str, int], rng: np.random.Generator) -> GeneratedTable:
+        return GeneratedTable("dbo.Genres", {"GenreName": np.asarray(REAL_GENRES[start:stop], dtype=object)})
+
+    def movies(self, start: int, stop: int, key_starts: Dict[str, int], rng: np.random.Generator) -> GeneratedTable:
+        n = stop - start
+        top_count = max(0, min(stop, self.top_movies) - start)
+        genre_plan = self.genre_plan
+        genre_indexes = grouped_choice([genre_plan.top_genres, genre_plan.remaining_genres], [top_count, n - top_count], rng)
+        return GeneratedTable("dbo.Movies", {
+            "Title": self.pools.titles.sample(n, rng),
+            "ReleaseYear": integers(*self.spec.release_years, n, rng),
+            "DurationMinutes": integers(*self.spec.durations, n, rng),
+            "GenreID": key_starts["dbo.Genres"] + genre_indexes,
+        })
+
+    def reviews(self, start: int, stop: int, key_starts: Dict[str, int], rng: np.random.Generator) -> GeneratedTable:
+        n = stop - start
+        hot_n = max(0, min(stop, self.hot_reviews) - start)
+        hot_start = self.no_review_count
+        remaining_start = self.no_review_count + self.hot_count
+        positions = np.concatenate([
+            _uniform_positions(hot_start, remaining_start, hot_n, rng),
+            _uniform_positions(remaining_start, self.n_movies, n - hot_n, rng),
+        ])
+        return GeneratedTable("dbo.Reviews", {
+            "MovieID": key_starts["dbo.Movies"] + self.movie_order.inverse(positions),
+            "ReviewerName": self.pools.reviewer_names.sample(n, rng),
+            "Rating": integers(*self.spec.ratings, n, rng),
+            "ReviewText": self.pools.review_texts.sample(n, rng),
+            "ReviewDate": dates_between(self.today - datetime.timedelta(days=self.spec.review_window_days), self.today, n, rng),
+        })
+
+
+def movie_reviews_sources(spec: MovieReviewsSpec, pools: TextPools, seed: int,
+                          today: Optional[datetime.date] = None) -> List[ChunkedTableSource]:
+    """Chunked Genres, Movies and Reviews sources; the output depends only on spec, pools, seed and today."""
+    chunks = _MovieReviewsChunks(spec, pools, seed, today or datetime.date.today())
+    return [
+        ChunkedTableSource("dbo.Genres", "GenreID", len(REAL_GENRES), chunks.genres),
+        ChunkedTableSource("dbo.Movies", "MovieID", chunks.n_movies, chunks.movies),
+        ChunkedTableSource("dbo.Reviews", "ReviewID", spec.total_reviews, chunks.reviews),
+    ]
+
+
+def movie_reviews_set_spec(spec: MovieReviewsSpec, pools: TextPools, seed: int,
+                           today: Optional[datetime.date] = None, partition_rows: int = 1_000_000) -> SetBasedSpec:
+    """
+    The MovieReviews distributions as a set-based generation spec: the same ranges and text pools, with the
+    genre and review skew expressed as foreign key tiers (e.g. 50% of movies get no reviews, 10% get 90%).
+    """
+    today = today or datetime.date.today()
+    genres = len(REAL_GENRES)
+    remaining_movie_share = 1 - spec.no_review_movie_share - spec.hot_movie_share
+    return SetBasedSpec(
+        tables={
+            "dbo.Genres": TableTarget(genres, {"GenreName": ColumnRule(values=list(REAL_GENRES), cycle=True)}),
+            "dbo.Movies": TableTarget(spec.total_movies, {
+                "Title": ColumnRule(values=pools.titles.values.tolist()),
+                "ReleaseYear": ColumnRule(*spec.release_years),
+                "DurationMinutes": ColumnRule(*spec.durations),
+            }),
+            "dbo.Reviews": TableTarget(spec.total_reviews, {
+                "ReviewerName": ColumnRule(values=pools.reviewer_names.values.tolist()),
+                "Rating": ColumnRule(*spec.ratings),
+                "ReviewText": ColumnRule(values=pools.review_texts.values.tolist()),
+                "ReviewDate": ColumnRule(today - datetime.timedelta(days=spec.review_window_days), today),
+            }),
+        },
+        foreign_keys={
+            "dbo.Movies.GenreID": ForeignKeyRule(tiers=[
+                (spec.top_genre_count / genres, spec.top_genre_movie_share),
+                (spec.empty_genre_count / genres, 0.0),
+                (1 - (spec.top_genre_count + spec.empty_genre_count) / genres, 1 - spec.top_genre_movie_share),
+            ]),
+            "dbo.Reviews.MovieID": ForeignKeyRule(tiers=[
+                (spec.no_review_movie_share, 0.0),
+                (spec.hot_movie_share, spec.hot_movie_review_share),
+                (remaining_movie_share, 1 - spec.hot_movie_review_share),
+            ]),
+        },
+        seed=seed,
+        partition_rows=partition_rows,
+    )
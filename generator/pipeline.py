@@ -0,0 +1,253 @@
+"""
+Streaming Generation Pipeline
+Generates and loads tables chunk by chunk so peak memory stays flat at any scale factor, with a
+checkpoint file that lets a failed run resume from the last committed chunk.
+
+Keys are not read back from the database: every table gets a reserved key range starting at
+MAX(key) + 1, chunk i of a table owns keys [start + i * chunk_rows, ...) and is inserted with
+IDENTITY_INSERT, so child chunks can compute parent keys from the range alone.
+
+Chunks can be generated on a process pool (GENERATOR_WORKERS > 1). Every chunk draws from its own
+seed-derived random stream, so the same seed gives byte-identical data for any number of workers.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import pooled_connection, quote_identifier, quote_table_name
+from .bulk_loader import BulkLoader, LoadOptions, LoadResult, plan_load_waves
+from .engine import GeneratedTable
+
+
+def chunk_rng(seed: int, table_index: int, chunk_index: int) -> np.random.Generator:
+    """
+    Independent random stream per (table, chunk), so a chunk regenerates identical rows wherever it runs.
+
+    Same stream as SeedSequence(seed).spawn(...)[table_index].spawn(...)[chunk_index], without
+    spawning every earlier child first.
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(table_index, chunk_index)))
+
+
+@dataclass
+class ChunkedTableSource:
+    """
+    A table generated in chunks of rows [start, stop).
+
+    make_chunk(start, stop, key_starts, rng) returns the non-key columns of the chunk; key_starts
+    maps every table of the run to the first key of its reserved range (for parent key lookups).
+    make_chunk must be picklable (a module-level function or a bound method) to run on a process pool.
+    """
+    table_name: str
+    key_column: str
+    total_rows: int
+    make_chunk: Callable[[int, int, Dict[str, int], np.random.Generator], GeneratedTable]
+
+    def chunk_count(self, chunk_rows: int) -> int:
+        return -(-self.total_rows // chunk_rows)
+
+
+def generate_chunk(source: ChunkedTableSource, seed: int, table_index: int, chunk_index: int,
+                   chunk_rows: int, key_starts: Dict[str, int]) -> GeneratedTable:
+    """Generates one chunk including its key column; depends only on the arguments, never on the worker."""
+    start = chunk_index * chunk_rows
+    stop = min(start + chunk_rows, source.total_rows)
+    chunk = source.make_chunk(start, stop, key_starts, chunk_rng(seed, table_index, chunk_index))
+    key_start = key_starts[source.table_name]
+    keys = np.arange(key_start + start, key_start + stop, dtype=np.int64)
+    return GeneratedTable(source.table_name, {source.key_column: keys, **chunk.columns})
+
+
+# Sources handed to each worker process once by the pool initializer instead of with every chunk
+_worker_sources: Dict[str, ChunkedTableSource] = {}
+
+
+def _init_worker(sources: Dict[str, ChunkedTableSource]):
+    _worker_sources.update(sources)
+
+
+def _generate_in_worker(table_name: str, *args) -> GeneratedTable:
+    return generate_chunk(_worker_sources[table_name], *args)
+
+
+@dataclass
+class GenerationCheckpoint:
+    spec: Dict[str, Any]
+    seed: int
+    chunk_rows: int
+    key_starts: Dict[str, int] = field(default_factory=dict)
+    chunks_done: Dict[str, int] = field(default_factory=dict)
+    resumed: bool = False
+
+    @classmethod
+    def load(cls, path: str) -> Optional["GenerationCheckpoint"]:
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(resumed=True, **data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    @classmethod
+    def resolve(cls, path: Optional[str], spec: Dict[str, Any], seed: Optional[int],
+                chunk_rows: int) -> "GenerationCheckpoint":
+        """Returns the checkpoint of an unfinished run with the same spec, or a new one (random seed if None)."""
+        spec = json.loads(json.dumps(spec))  # tuples become lists, as in the saved file
+        existing = cls.load(path)
+        if (existing is not None and existing.spec == spec and existing.chunk_rows == chunk_rows
+                and (seed is None or existing.seed == seed)):
+            return existing
+        if seed is None:
+            seed = int(np.random.SeedSequence().generate_state(1, dtype=np.uint64)[0])
+        return cls(spec=spec, seed=seed, chunk_rows=chunk_rows)
+
+    def save(self, path: str):
+        """Writes the checkpoint atomically so a crash never leaves a half-written file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {
+            "spec": self.spec,
+            "seed": self.seed,
+            "chunk_rows": self.chunk_rows,
+            "key_starts": self.key_starts,
+            "chunks_done": self.chunks_done,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class StreamingPipeline:
+    def __init__(self, sources: List[ChunkedTableSource], checkpoint: GenerationCheckpoint,
+                 checkpoint_path: Optional[str] = None, options: Optional[LoadOptions] = None,
+                 workers: Optional[int] = None):
+        self.sources = {source.table_name: source for source in sources}
+        self.table_indexes = {source.table_name: index for index, source in enumerate(sources)}
+        self.checkpoint = checkpoint
+        self.checkpoint_path = checkpoint_path if checkpoint_path is not None else Config.GENERATOR_CHECKPOINT_PATH
+        options = options or LoadOptions.from_config()
+        # One transaction per chunk, so the checkpoint and the committed rows always agree
+        self.loader = BulkLoader(replace(options, commit_interval=checkpoint.chunk_rows))
+        self.workers = max(1, workers if workers is not None else Config.GENERATOR_WORKERS)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def run(self, foreign_keys: List[Dict[str, str]]) -> List[LoadResult]:
+        """Streams every table in foreign key order; tables within one wave stream in parallel."""
+        self._reserve_key_ranges()
+        results = []
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.sources,))
+            # Start the workers now, before the loader threads exist
+            self._executor.submit(int).result()
+        try:
+            for wave in plan_load_waves(list(self.sources), foreign_keys):
+                workers = max(1, min(self.loader.options.max_parallel_tables, len(wave)))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results.extend(executor.map(self._stream_table, wave))
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return results
+
+    def _reserve_key_ranges(self):
+        missing = [name for name in self.sources if name not in self.checkpoint.key_starts]
+        if missing:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    for name in missing:
+                        key = quote_identifier(self.sources[name].key_column)
+                        cursor.execute(f"SELECT COALESCE(MAX({key}), 0) + 1 FROM {quote_table_name(name)}")
+                        self.checkpoint.key_starts[name] = int(cursor.fetchone()[0])
+                finally:
+                    cursor.close()
+        self._save_checkpoint()
+
+    def _save_checkpoint(self):
+        if self.checkpoint_path:
+            with self._lock:
+                self.checkpoint.save(self.checkpoint_path)
+
+    def _stream_table(self, table_name: str) -> LoadResult:
+        source = self.sources[table_name]
+        chunk_rows = self.checkpoint.chunk_rows
+        key_start = self.checkpoint.key_starts[table_name]
+        total = LoadResult(table_name=table_name, strategy=self.loader.options.strategy)
+
+        first_chunk = self.checkpoint.chunks_done.get(table_name, 0)
+        # The first chunk after a resume may have committed right before the crash
+        if self.checkpoint.resumed and first_chunk < source.chunk_count(chunk_rows):
+            start = first_chunk * chunk_rows
+            if self._chunk_committed(source, key_start, start, min(start + chunk_rows, source.total_rows)):
+                self._mark_done(table_name, first_chunk)
+                first_chunk += 1
+
+        for chunk_index, chunk in self._generate_chunks(table_name, range(first_chunk, source.chunk_count(chunk_rows))):
+            result = self.loader.load_table(chunk)
+            total.rows += result.rows
+            total.seconds += result.seconds
+            total.batches += result.batches
+            total.commits += result.commits
+            self._mark_done(table_name, chunk_index)
+        return total
+
+    def _generate_chunks(self, table_name: str, chunk_indexes: Iterable[int]) -> Iterator[Tuple[int, GeneratedTable]]:
+        """
+        Yields chunks in order. With a process pool, up to `workers` chunks are generated ahead of
+        the one being loaded, which bounds memory to a few chunks per table.
+        """
+        args = (self.checkpoint.seed, self.table_indexes[table_name])
+        tail = (self.checkpoint.chunk_rows, self.checkpoint.key_starts)
+        if self._executor is None:
+            for chunk_index in chunk_indexes:
+                yield chunk_index, generate_chunk(self.sources[table_name], *args, chunk_index, *tail)
+            return
+
+        pending = deque()
+        for chunk_index in chunk_indexes:
+            pending.append((chunk_index, self._executor.submit(_generate_in_worker, table_name, *args, chunk_index, *tail)))
+            if len(pending) > self.workers:
+                done_index, future = pending.popleft()
+                yield done_index, future.result()
+        while pending:
+            done_index, future = pending.popleft()
+            yield done_index, future.result()
+
+    def _chunk_committed(self, source: ChunkedTableSource, key_start: int, start: int, stop: int) -> bool:
+        key = quote_identifier(source.key_column)
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"SELECT COUNT_BIG(*) FROM {quote_table_name(source.table_name)} WHERE {key} BETWEEN ? AND ?",
+                    key_start + start, key_start + stop - 1
+                )
+                committed = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+        if committed not in (0, stop - start):
+            raise RuntimeError(
+                f"Chunk rows [{start}, {stop}) of {source.table_name} are partially committed ({committed} rows); "
+                f"delete the key range or the checkpoint file and start over"
+            )
+        return committed == stop - start
+
+    def _mark_done(self, table_name: str, chunk_index: int):
+        with self._lock:
+            self.checkpoint.chunks_done[table_name] = chunk_index + 1
+        self._save_checkpoint()
@@ -0,0 +1,430 @@
+"""
+Set-Based Generation
+Builds synthetic data inside SQL Server: a target spec plus the table and foreign key metadata is compiled
+into T-SQL that generates rows from a tally (numbers) CTE with INSERT ... SELECT, so no row crosses ODBC.
+
+- Randomness is an integer hash of the row number, seeded per table, column and partition, so the same
+  spec and seed give the same data on every run (CHECKSUM(NEWID()) could not be reproduced).
+- Value lists (text pools, weighted categories) become small helper tables of cumulative weights,
+  looked up with one index seek per row.
+- Foreign keys draw parent keys from a cumulative-weight table built on the server from the parent table:
+  parents are shuffled by hash, split into tiers (e.g. 10% of movies get 90% of reviews) and searched
+  like weighted_choice's binary search.
+Tables are generated in foreign key order, one INSERT per partition of partition_rows rows.
+"""
+
+import datetime
+import hashlib
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db import column_type_declaration, pooled_connection, quote_identifier, quote_table_name
+from .bulk_loader import LoadResult, _fk_table, plan_load_waves
+
+STRATEGY_SET_BASED = "set_based"
+
+INTEGER_TYPES = {"tinyint", "smallint", "int", "bigint"}
+DECIMAL_TYPES = {"decimal", "numeric", "float", "real", "money", "smallmoney"}
+DATE_TYPES = {"date", "datetime", "datetime2", "smalldatetime", "datetimeoffset"}
+STRING_TYPES = {"char", "varchar", "nchar", "nvarchar", "text", "ntext"}
+DEFAULT_RANGES = {"tinyint": (0, 255), "bit": (0, 1)}
+
+# Hash constants: every intermediate value stays below 2^63, so BIGINT arithmetic never overflows
+GOLDEN = "CAST(2654435761 AS BIGINT)"
+MODULUS = "CAST(4294967296 AS BIGINT)"
+MIXER = "73244475"
+HASH_RANGE = "CAST(4294967296 AS FLOAT)"  # FLOAT keeps T-SQL from dividing in DECIMAL with 6 decimal places
+
+
+@dataclass
+class ColumnRule:
+    """How one column is generated; columns without a rule get a default for their data type."""
+    low: Any = None  # Uniform range [low, high]: integers, floats or dates (ISO text or datetime.date)
+    high: Any = None
+    values: Optional[List[Any]] = None  # Drawn from this list, uniformly or by weights
+    weights: Optional[List[float]] = None
+    cycle: bool = False  # Take values in order (row n gets values[(n - 1) % len(values)]) instead of drawing
+    null_fraction: float = 0.0
+
+
+@dataclass
+class ForeignKeyRule:
+    """Parent tiers as (share of parent rows, share of child rows); parents are shuffled before the split."""
+    tiers: List[Tuple[float, float]] = field(default_factory=lambda: [(1.0, 1.0)])
+    null_fraction: float = 0.0
+
+
+@dataclass
+class TableTarget:
+    rows: int
+    columns: Dict[str, ColumnRule] = field(default_factory=dict)
+
+
+@dataclass
+class SetBasedSpec:
+    tables: Dict[str, TableTarget]  # Keyed by 'schema.table'
+    foreign_keys: Dict[str, ForeignKeyRule] = field(default_factory=dict)  # Keyed by the child 'schema.table.column'
+    seed: int = 42
+    partition_rows: int = 1_000_000  # Rows per INSERT ... SELECT
+
+
+@dataclass
+class ScriptStep:
+    """One statement of the generation script; rows is set for executemany steps that fill a helper table."""
+    table_name: str
+    label: str
+    sql: str
+    rows: Optional[List[Tuple]] = None
+    generated_rows: int = 0
+
+
+def _base_type(data_type: str) -> str:
+    return (data_type or "").lower().split("(", 1)[0].strip()
+
+
+def _stream_seed(seed: int, *parts: Any) -> int:
+    """A 31-bit seed for one hash stream, e.g. (table, column, partition)."""
+    digest = hashlib.blake2b(repr((seed, *parts)).encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little") & 0x7FFFFFFF
+
+
+def _xor(a: str, b: str) -> str:
+    # (a | b) - (a & b) is XOR for non-negative integers and also runs on the SQLite stand-in
+    return f"(({a}) | ({b})) - (({a}) & ({b}))"
+
+
+def _mix(x: str) -> str:
+    return f"(({_xor(x, f'{x} / 65536')}) * {MIXER}) % {MODULUS}"
+
+
+def hashed_rows(source: str, streams: Dict[str, int], carry: List[str]) -> str:
+    """
+    Wraps a row source that has an integer column n into derived tables adding one 32-bit hash column per
+    stream (h_<name>, uniform in [0, 2^32)). Each hash is an xorshift-multiply integer hash of n and the
+    stream's seed, staged over nested derived tables so no expression is repeated.
+    """
+    columns = ["n", *carry]
+    if not streams:
+        return f"SELECT {', '.join(columns)} FROM ({source}) s"
+    stage = f"SELECT {', '.join(columns)}, " + ", ".join(
+        f"(n * {GOLDEN} + {seed}) % {MODULUS} AS a_{name}" for name, seed in streams.items()
+    ) + f" FROM ({source}) s0"
+    stage = f"SELECT {', '.join(columns)}, " + ", ".join(f"{_mix(f'a_{name}')} AS b_{name}" for name in streams) + f" FROM ({stage}) s1"
+    stage = f"SELECT {', '.join(columns)}, " + ", ".join(f"{_mix(f'b_{name}')} AS c_{name}" for name in streams) + f" FROM ({stage}) s2"
+    return f"SELECT {', '.join(columns)}, " + ", ".join(
+        f"{_xor(f'c_{name}', f'c_{name} / 65536')} AS h_{name}" for name in streams
+    ) + f" FROM ({stage}) s3"
+
+
+def tally_cte(rows: int) -> str:
+    """Numbers 1..rows from stacked cross joins of ten rows, sized to the smallest power of ten that fits."""
+    levels = max(1, math.ceil(math.log10(max(rows, 2))))
+    ctes = ["e1(n) AS (" + " UNION ALL ".join(["SELECT 1"] * 10) + ")"]
+    for level in range(2, levels + 1):
+        ctes.append(f"e{level}(n) AS (SELECT 1 FROM e{level - 1} a CROSS JOIN e1 b)")
+    ctes.append(f"tally(n) AS (SELECT TOP ({int(rows)}) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) FROM e{levels})")
+    return "WITH " + ",\n     ".join(ctes)
+
+
+def _literal(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return f"'{value.isoformat()}'"
+    return "N'" + str(value).replace("'", "''") + "'"
+
+
+def _date_literal(value: Any) -> str:
+    """Dates as 'YYYYMMDD', which SQL Server parses the same way under every DATEFORMAT setting."""
+    if isinstance(value, str):
+        value = datetime.date.fromisoformat(value[:10])
+    return f"'{value.strftime('%Y%m%d')}'"
+
+
+def _helper_type(column: Dict[str, Any]) -> str:
+    """SQL type of a helper table's value column: the column's own declaration when known."""
+    if column.get("max_length") is not None or column.get("precision") is not None:
+        return column_type_declaration(column)
+    base_type = _base_type(column["data_type"])
+    if base_type in STRING_TYPES:
+        return "NVARCHAR(4000)"
+    if base_type in INTEGER_TYPES or base_type == "bit":
+        return "BIGINT"
+    if base_type in DECIMAL_TYPES:
+        return "FLOAT"
+    return column["data_type"].upper()
+
+
+class _ScriptBuilder:
+    def __init__(self, spec: SetBasedSpec, tables: Dict[str, List[Dict[str, Any]]], foreign_keys: List[Dict[str, str]]):
+        self.spec = spec
+        self.tables = tables
+        self.steps: List[ScriptStep] = []
+        self.helpers: List[str] = []
+        self.fk_by_column: Dict[str, Dict[str, str]] = {}
+        constraints: Dict[str, List[Dict[str, str]]] = {}
+        for fk in foreign_keys:
+            constraints.setdefault(f"{_fk_table(fk, 'parent')}|{fk['constraint_name']}", []).append(fk)
+        for (child, _), columns in ((key.split("|", 1), value) for key, value in constraints.items()):
+            if child not in spec.tables:
+                continue
+            if len(columns) > 1:
+                raise ValueError(f"Composite foreign key {columns[0]['constraint_name']} is not supported by set-based generation")
+            self.fk_by_column[f"{child}.{columns[0]['parent_column']}"] = columns[0]
+        self.referenced_keys = {(_fk_table(fk, "referenced"), fk["referenced_column"]) for fk in foreign_keys}
+
+    def _helper_table(self, table_name: str, purpose: str, value_type: str) -> str:
+        schema = table_name.split(".", 1)[0] if "." in table_name else "dbo"
+        helper = f"{schema}.__setgen_{purpose}_{len(self.helpers)}"
+        self.helpers.append(helper)
+        self.steps.append(ScriptStep(table_name, f"create {helper}", f"DROP TABLE IF EXISTS {quote_table_name(helper)}"))
+        self.steps.append(ScriptStep(
+            table_name, f"create {helper}",
+            f"CREATE TABLE {quote_table_name(helper)} (cum_hi FLOAT NOT NULL PRIMARY KEY, value {value_type} NULL)",
+        ))
+        return quote_table_name(helper)
+
+    def _value_pool(self, table_name: str, column: Dict[str, Any], values: List[Any], weights: Optional[List[float]]) -> str:
+        """Helper table of (cumulative weight, value); the last cumulative weight is exactly 1.0."""
+        if not values:
+            raise ValueError(f"Empty value list for {table_name}.{column['column_name']}")
+        weights = weights or [1.0] * len(values)
+        total = float(sum(weights))
+        pool = self._helper_table(table_name, "pool", _helper_type(column))
+        rows, cumulative = [], 0.0
+        for value, weight in zip(values, weights):
+            if weight <= 0:
+                continue
+            cumulative += weight
+            rows.append((cumulative / total, value))
+        rows[-1] = (1.0, rows[-1][1])
+        self.steps.append(ScriptStep(table_name, f"fill {pool}", f"INSERT INTO {pool} (cum_hi, value) VALUES (?, ?)", rows=rows))
+        return pool
+
+    def _foreign_key_weights(self, table_name: str, column: Dict[str, Any], fk: Dict[str, str], rule: ForeignKeyRule) -> str:
+        """
+        Cumulative-weight table of parent keys, built on the server: parents are ranked by a hash of their
+        position in key order (never the key value itself, so keys of any type and size work), the rank decides
+        the tier, every parent of a tier gets an equal part of the tier's child share, and zero-weight parents
+        are left out.
+        """
+        parent = _fk_table(fk, "referenced")
+        weights_table = self._helper_table(table_name, "fk", _helper_type(column))
+        total_share = sum(share for _, share in rule.tiers) or 1.0
+        cases, bound, previous = [], 0.0, "0"
+        for parent_share, child_share in rule.tiers:
+            bound += parent_share
+            upper = "total" if math.isclose(bound, 1.0) else f"ROUND(total * {bound!r}, 0)"
+            cases.append(f"WHEN r <= {upper} THEN CAST({child_share / total_share!r} AS FLOAT) / NULLIF({upper} - {previous}, 0)")
+            previous = upper
+        key = quote_identifier(fk["referenced_column"])
+        seed = _stream_seed(self.spec.seed, table_name, column["column_name"], "parents")
+        ranked = hashed_rows(
+            f"SELECT ROW_NUMBER() OVER (ORDER BY {key}) AS n, {key} AS parent_key FROM {quote_table_name(parent)}",
+            {"rank": seed}, ["parent_key"],
+        )
+        self.steps.append(ScriptStep(table_name, f"weights {column['column_name']}", f"""
+            INSERT INTO {weights_table} (cum_hi, value)
+            SELECT SUM(w) OVER (ORDER BY r ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) / SUM(w) OVER (), parent_key
+            FROM (
+                SELECT parent_key, r, CASE {' '.join(cases)} ELSE 0 END AS w
+                FROM (
+                    SELECT parent_key, ROW_NUMBER() OVER (ORDER BY h_rank, n) AS r, COUNT(*) OVER () AS total
+                    FROM ({ranked}) g
+                ) ranked
+            ) weighted
+            WHERE w > 0
+        """))
+        return weights_table
+
+    def _column_expression(self, table_name: str, column: Dict[str, Any], streams: Dict[str, int], partition: int,
+                           lookups: Dict[str, str]) -> Optional[str]:
+        """The SELECT expression for one column, registering the hash streams it needs; None skips the column."""
+        name = column["column_name"]
+        qualified = f"{table_name}.{name}"
+        base_type = _base_type(column["data_type"])
+        rule = self.spec.tables[table_name].columns.get(name)
+        stream = f"c{len(streams)}"
+        if column.get("is_identity"):
+            return None
+
+        if qualified in self.fk_by_column:
+            fk_rule = self.spec.foreign_keys.get(qualified, ForeignKeyRule())
+            streams[stream] = _stream_seed(self.spec.seed, table_name, name, partition)
+            expression = f"(SELECT TOP (1) f.value FROM {lookups[name]} f WHERE f.cum_hi > g.h_{stream} / {HASH_RANGE} ORDER BY f.cum_hi)"
+            null_fraction = fk_rule.null_fraction
+        elif rule is not None and rule.values is not None:
+            if rule.cycle:
+                position = f"((g.n - 1) % {len(rule.values)} + 0.5) / CAST({len(rule.values)} AS FLOAT)"
+            else:
+                streams[stream] = _stream_seed(self.spec.seed, table_name, name, partition)
+                position = f"g.h_{stream} / {HASH_RANGE}"
+            expression = f"(SELECT TOP (1) p.value FROM {lookups[name]} p WHERE p.cum_hi > {position} ORDER BY p.cum_hi)"
+            null_fraction = rule.null_fraction
+        elif rule is not None and rule.low is not None:
+            streams[stream] = _stream_seed(self.spec.seed, table_name, name, partition)
+            if base_type in DATE_TYPES:
+                low = datetime.date.fromisoformat(str(rule.low)[:10])
+                span = (datetime.date.fromisoformat(str(rule.high)[:10]) - low).days + 1
+                expression = f"DATEADD(DAY, g.h_{stream} % {span}, {_date_literal(low)})"
+            elif isinstance(rule.low, float) or isinstance(rule.high, float):
+                expression = f"CAST({rule.low!r} AS FLOAT) + g.h_{stream} / {HASH_RANGE} * {float(rule.high) - float(rule.low)!r}"
+            else:
+                expression = f"{int(rule.low)} + g.h_{stream} % {int(rule.high) - int(rule.low) + 1}"
+            null_fraction = rule.null_fraction
+        elif (table_name, name) in self.referenced_keys:
+            expression, null_fraction = "g.n", 0.0  # Referenced keys without IDENTITY are numbered 1..rows
+        else:
+            null_fraction = rule.null_fraction if rule is not None else 0.0
+            if base_type in INTEGER_TYPES or base_type in DECIMAL_TYPES or base_type == "bit":
+                low, high = DEFAULT_RANGES.get(base_type, (1, 1000))
+                streams[stream] = _stream_seed(self.spec.seed, table_name, name, partition)
+                expression = f"{low} + g.h_{stream} % {high - low + 1}"
+            elif base_type in DATE_TYPES:
+                streams[stream] = _stream_seed(self.spec.seed, table_name, name, partition)
+                expression = f"DATEADD(DAY, g.h_{stream} % 9132, '20000101')"  # 2000-01-01 .. 2024-12-31
+            elif base_type in STRING_TYPES:
+                streams[stream] = _stream_seed(self.spec.seed, table_name, name, partition)
+                expression = f"(SELECT TOP (1) p.value FROM {lookups[name]} p WHERE p.cum_hi > g.h_{stream} / {HASH_RANGE} ORDER BY p.cum_hi)"
+            elif column.get("is_nullable"):
+                return "NULL"
+            else:
+                raise ValueError(f"No generation rule for NOT NULL column {qualified} of type {column['data_type']}")
+
+        if null_fraction > 0:
+            null_stream = f"n{len(streams)}"
+            streams[null_stream] = _stream_seed(self.spec.seed, table_name, name, partition, "null")
+            expression = f"CASE WHEN g.h_{null_stream} < {int(null_fraction * 4294967296)} THEN NULL ELSE {expression} END"
+        return expression
+
+    def _lookups(self, table_name: str) -> Dict[str, str]:
+        """Creates the helper tables of one table's value lists and foreign keys."""
+        lookups = {}
+        for column in self.tables[table_name]:
+            name = column["column_name"]
+            qualified = f"{table_name}.{name}"
+            rule = self.spec.tables[table_name].columns.get(name)
+            if column.get("is_identity"):
+                continue
+            if qualified in self.fk_by_column:
+                fk_rule = self.spec.foreign_keys.get(qualified, ForeignKeyRule())
+                lookups[name] = self._foreign_key_weights(table_name, column, self.fk_by_column[qualified], fk_rule)
+            elif rule is not None and rule.values is not None:
+                lookups[name] = self._value_pool(table_name, column, rule.values, None if rule.cycle else rule.weights)
+            elif (rule is None or rule.low is None) and (table_name, name) not in self.referenced_keys \
+                    and _base_type(column["data_type"]) in STRING_TYPES:
+                limit = column.get("max_length") if column.get("max_length") not in (None, -1) else None
+                lookups[name] = self._value_pool(table_name, column, [f"{name} {i}"[:limit] for i in range(1, 1001)], None)
+        return lookups
+
+    def build(self, reset: bool) -> List[ScriptStep]:
+        waves = plan_load_waves(list(self.spec.tables), [
+            fk for fk in self.fk_by_column.values()
+        ])
+        if reset:
+            for wave in reversed(waves):
+                for table_name in wave:
+                    self.steps.append(ScriptStep(table_name, "reset", f"DELETE FROM {quote_table_name(table_name)}"))
+
+        for wave in waves:
+            for table_name in wave:
+                target = self.spec.tables[table_name]
+                lookups = self._lookups(table_name)
+                partition_rows = max(1, min(self.spec.partition_rows, 100_000_000))
+                for partition, start in enumerate(range(0, target.rows, partition_rows)):
+                    rows = min(partition_rows, target.rows - start)
+                    streams: Dict[str, int] = {}
+                    names, expressions = [], []
+                    for column in self.tables[table_name]:
+                        expression = self._column_expression(table_name, column, streams, partition, lookups)
+                        if expression is not None:
+                            names.append(quote_identifier(column["column_name"]))
+                            expressions.append(expression)
+                    source = hashed_rows(f"SELECT {start} + n AS n FROM tally", streams, [])
+                    sql = (
+                        f"{tally_cte(rows)}\n"
+                        f"INSERT INTO {quote_table_name(table_name)} WITH (TABLOCK) ({', '.join(names)})\n"
+                        f"SELECT {', '.join(expressions)}\n"
+                        f"FROM ({source}) g"
+                    )
+                    self.steps.append(ScriptStep(table_name, f"insert partition {partition}", sql, generated_rows=rows))
+
+        for helper in self.helpers:
+            self.steps.append(ScriptStep(helper, "drop", f"DROP TABLE IF EXISTS {quote_table_name(helper)}"))
+        return self.steps
+
+
+def build_generation_script(spec: SetBasedSpec, schema_info: Dict[str, Any], foreign_keys: List[Dict[str, str]],
+                            reset: bool = True) -> List[ScriptStep]:
+    """
+    Compiles a spec into the statements that generate it on the server.
+
+    Args:
+        spec: target row counts and column/foreign key rules
+        schema_info: GetSchemaInfoTool output ({"tables": [{"table_name", "columns"}]}); columns may carry
+            is_identity and max_length from fetch_table_columns
+        foreign_keys: GetForeignKeysTool output
+        reset: start with DELETE of every target table, children first
+
+    Raises:
+        ValueError: for a target table missing from schema_info, a composite foreign key, a foreign key cycle,
+            or a NOT NULL column no rule or default covers
+    """
+    tables = {table["table_name"]: table.get("columns", []) for table in schema_info.get("tables", [])}
+    missing = [table_name for table_name in spec.tables if table_name not in tables]
+    if missing:
+        raise ValueError(f"Tables not found in the schema: {missing}")
+    return _ScriptBuilder(spec, tables, foreign_keys).build(reset)
+
+
+def render_script(steps: List[ScriptStep]) -> str:
+    """The script as one T-SQL file for sqlcmd or SSMS; helper table rows become INSERT ... VALUES batches."""
+    batches = []
+    for step in steps:
+        if step.rows is None:
+            batches.append(f"-- {step.table_name}: {step.label}\n{step.sql.strip()};")
+            continue
+        insert = step.sql.split(" VALUES ", 1)[0]
+        for start in range(0, len(step.rows), 1000):  # SQL Server accepts at most 1000 rows per VALUES list
+            values = ",\n".join(f"({', '.join(_literal(value) for value in row)})" for row in step.rows[start:start + 1000])
+            batches.append(f"-- {step.table_name}: {step.label}\n{insert} VALUES\n{values};")
+    return "\nGO\n".join(batches) + "\nGO\n"
+
+
+def run_generation_script(steps: List[ScriptStep]) -> List[LoadResult]:
+    """Runs the steps in order on one pooled connection, committing after each, and reports rows and time per table."""
+    results: Dict[str, LoadResult] = {}
+    with pooled_connection() as conn:
+        previous_timeout = getattr(conn, "timeout", 0)
+        conn.timeout = 0  # Large partitions can run for minutes
+        cursor = conn.cursor()
+        try:
+            for step in steps:
+                started = time.perf_counter()
+                if step.rows is not None:
+                    cursor.executemany(step.sql, step.rows)
+                else:
+                    cursor.execute(step.sql)
+                conn.commit()
+                if step.label == "drop":
+                    continue
+                result = results.setdefault(step.table_name, LoadResult(step.table_name, STRATEGY_SET_BASED))
+                result.seconds += time.perf_counter() - started
+                if step.generated_rows:
+                    result.rows += step.generated_rows
+                    result.batches += 1
+                    result.commits += 1
+        finally:
+            cursor.close()
+            conn.timeout = previous_timeout
+    # Report tables in generation (parents first) order rather than reset order
+    order = list(dict.fromkeys(step.table_name for step in steps if step.generated_rows))
+    return sorted(results.values(), key=lambda result: order.index(result.table_name) if result.table_name in order else len(order))
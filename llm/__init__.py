@@ -0,0 +1,40 @@
+"""
+LLM package for caching and replaying the crew's model calls.
+"""
+
+from .response_cache import (
+    CACHE_MODE_OFF,
+    CACHE_MODE_RECORD,
+    CACHE_MODE_REPLAY,
+    CACHE_MODES,
+    CacheMissError,
+    LLMResponseCache,
+    request_key,
+    install_llm_cache
+)
+from .fake_llm import (
+    ScriptedLLM,
+    tool_action,
+    final_answer,
+    observation_json,
+    install_fake_llm
+)
+
+__all__ = [
+    # Response cache
+    'CACHE_MODE_OFF',
+    'CACHE_MODE_RECORD',
+    'CACHE_MODE_REPLAY',
+    'CACHE_MODES',
+    'CacheMissError',
+    'LLMResponseCache',
+    'request_key',
+    'install_llm_cache',
+
+    # Scripted fake LLM
+    'ScriptedLLM',
+    'tool_action',
+    'final_answer',
+    'observation_json',
+    'install_fake_llm'
+]
@@ -0,0 +1,87 @@
+"""
+Scripted Fake LLM
+Replaces litellm.completion with scripted ReAct turns so the crew runs offline and deterministically.
+
+A script is chosen by a marker found in the system prompt (e.g. the agent role); its step function
+receives the turn index (the number of tool observations so far) and the last observation and
+returns the assistant text ("Action: ... / Action Input: ..." or "Final Answer: ...").
+"""
+
+import ast
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Step = Callable[[int, Optional[str]], str]
+
+
+def tool_action(tool_name: str, arguments: Dict[str, Any]) -> str:
+    return f"Thought: I should use {tool_name}.\nAction: {tool_name}\nAction Input: {json.dumps(arguments)}"
+
+
+def final_answer(answer: str) -> str:
+    return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+
+def observation_json(observation: Optional[str]) -> str:
+    """Tool results reach the LLM as str(dict); turns them back into JSON for the next tool input."""
+    if observation is None:
+        return "{}"
+    text = observation.strip()
+    try:
+        return json.dumps(json.loads(text))
+    except ValueError:
+        return json.dumps(ast.literal_eval(text))
+
+
+def _content(message: Dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+class ScriptedLLM:
+    def __init__(self, scripts: List[Tuple[str, Step]], prompt_tokens_per_char: float = 0.25):
+        self.scripts = scripts
+        self.prompt_tokens_per_char = prompt_tokens_per_char
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def respond(self, messages: List[Dict[str, Any]]) -> str:
+        system = "\n".join(_content(m) for m in messages if m.get("role") == "system") or _content(messages[0])
+        step = next((step for marker, step in self.scripts if marker in system), None)
+        if step is None:
+            raise RuntimeError("No fake LLM script matches this agent's system prompt")
+
+        # Tool results are appended to the assistant turn as "Observation: <result>"
+        observations = [
+            _content(m).split("Observation:", 1)[1]
+            for m in messages if m.get("role") == "assistant" and "Observation:" in _content(m)
+        ]
+        return step(len(observations), observations[-1] if observations else None)
+
+    def completion(self, **request) -> Any:
+        from litellm import ModelResponse
+
+        messages = request.get("messages") or []
+        text = self.respond(messages)
+        with self._lock:
+            self.calls += 1
+        prompt_tokens = int(sum(len(_content(m)) for m in messages) * self.prompt_tokens_per_char)
+        completion_tokens = int(len(text) * self.prompt_tokens_per_char)
+        return ModelResponse(
+            model=request.get("model"),
+            choices=[{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+            usage={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                   "total_tokens": prompt_tokens + completion_tokens},
+        )
+
+
+def install_fake_llm(fake: ScriptedLLM) -> Callable[..., Any]:
+    """Points litellm.completion at the fake and returns the previous function so it can be restored."""
+    import litellm
+
+    previous = litellm.completion
+    litellm.completion = lambda *args, **kwargs: fake.completion(**kwargs)
+    return previous
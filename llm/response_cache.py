@@ -0,0 +1,198 @@
+"""
+LLM Response Cache
+Content-addressed on-disk cache of LLM completions for record/replay runs of the crew.
+
+CrewAI sends every agent turn through litellm.completion, so the cache wraps that function. The key
+is a hash of the model, the full message list (prompts and tool outputs) and the sampling params;
+credentials and endpoints are not part of the key. Entries are evicted least-recently-used once the
+cache grows past its size limit. The cache size is tracked in memory, so the directory is only scanned
+when the limit is exceeded, and eviction then frees some headroom so a full cache is not rescanned on
+every store.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from tracing import get_tracer
+
+CACHE_MODE_OFF = "off"
+CACHE_MODE_RECORD = "record"  # Serve hits, call the endpoint on a miss and store the response
+CACHE_MODE_REPLAY = "replay"  # Serve hits only; a miss raises instead of calling the endpoint
+CACHE_MODES = [CACHE_MODE_OFF, CACHE_MODE_RECORD, CACHE_MODE_REPLAY]
+
+EVICT_TO_FRACTION = 0.9  # Eviction stops once the cache is back under this share of its size limit
+
+# Request fields that do not change the response
+NON_KEY_PARAMS = {
+    "api_key", "api_base", "api_version", "base_url", "azure_ad_token", "timeout",
+    "callbacks", "stream_options", "metadata", "num_retries", "extra_headers",
+}
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON of the request without credentials and transport settings."""
+    keyed = {name: value for name, value in request.items() if name not in NON_KEY_PARAMS and value is not None}
+    canonical = json.dumps(keyed, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None, mode: Optional[str] = None):
+        self.cache_dir = cache_dir or Config.LLM_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else Config.LLM_CACHE_MAX_MB * 1024 * 1024
+        self.mode = mode or Config.LLM_CACHE_MODE
+        if self.mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode: {self.mode} (expected one of {CACHE_MODES})")
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "seconds_saved": 0.0}
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    def _path(self, key: str) -> str:
+        # Two-level fan-out keeps directories small for large caches
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # The modification time is the LRU clock
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key: str, response: Dict[str, Any], latency_seconds: float):
+        """Writes the entry atomically, then evicts the least recently used entries over the size limit."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {"key": key, "cached_at": time.time(), "latency_seconds": latency_seconds, "response": response}
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, default=str)
+        size = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._stats["stores"] += 1
+            self._total_bytes += size - replaced
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """(modification time, size, path) of every entry on disk."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """Removes the least recently used entries until the cache fits; the scan also resyncs the tracked size."""
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_TO_FRACTION
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                with self._lock:
+                    self._stats["evictions"] += 1
+                if total <= target:
+                    break
+        with self._lock:
+            self._total_bytes = total
+
+    def complete(self, completion: Callable[..., Any], request: Dict[str, Any]) -> Any:
+        """Serves the request from the cache or, in record mode, from completion(**request)."""
+        if self.mode == CACHE_MODE_OFF or request.get("stream"):
+            if self.mode == CACHE_MODE_REPLAY:
+                raise CacheMissError("Streaming LLM calls cannot be replayed from the cache")
+            return completion(**request)
+
+        key = request_key(request)
+        entry = self.get(key)
+        get_tracer().annotate(cache="hit" if entry is not None else "miss")
+        if entry is not None:
+            with self._lock:
+                self._stats["hits"] += 1
+                self._stats["seconds_saved"] += entry.get("latency_seconds", 0.0)
+            return _restore_response(entry["response"])
+
+        with self._lock:
+            self._stats["misses"] += 1
+        if self.mode == CACHE_MODE_REPLAY:
+            raise CacheMissError(
+                f"No recorded LLM response for request {key[:12]} (model {request.get('model')}); "
+                f"run once with LLM_CACHE_MODE=record to record it"
+            )
+        started = time.monotonic()
+        response = completion(**request)
+        self.put(key, _dump_response(response), time.monotonic() - started)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["mode"] = self.mode
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["seconds_saved"] = round(stats["seconds_saved"], 3)
+        return stats
+
+
+def _dump_response(response: Any) -> Dict[str, Any]:
+    if hasattr(response, "model_dump"):
+        return response.model_dump()
+    return dict(response)
+
+
+def _restore_response(data: Dict[str, Any]) -> Any:
+    from litellm import ModelResponse
+
+    return ModelResponse(**data)
+
+
+_installed: Optional[LLMResponseCache] = None
+
+
+def install_llm_cache(cache: Optional[LLMResponseCache] = None) -> LLMResponseCache:
+    """Routes litellm.completion (used by every CrewAI agent) through the cache; idempotent."""
+    global _installed
+    import litellm
+
+    cache = cache or LLMResponseCache()
+    if _installed is None:
+        live_completion = litellm.completion
+
+        def cached_completion(*args, **kwargs):
+            if args:
+                kwargs = {"model": args[0], "messages": args[1] if len(args) > 1 else kwargs.get("messages"), **kwargs}
+            return _installed.complete(live_completion, kwargs)
+
+        litellm.completion = cached_completion
+    _installed = cache
+    return cache
@@ -1,62 +1,236 @@
-from crewai import Process, Task, Crew
-from dotenv import load_dotenv
+import argparse
+import json
+import os
 
-from agents import GetSqlSchemaAnalysisAgent, GetSqlDataAnalysisAgent
+from config import Config
+from llm import CACHE_MODE_OFF, CACHE_MODES
 
-load_dotenv()
+'''
+Agentic workflow: the schema analysis and data analysis agents as a CrewAI crew.
+`python main.py` runs it directly, `python cli.py crew` (same arguments) runs it next to the non-agent subcommands.
+CrewAI, the agents and their tools are only imported inside run(), so importing this module stays cheap.
+'''
 
-# ============================================================================
-# AGENT
-# ============================================================================
 
-sql_schema_analysis_agent = GetSqlSchemaAnalysisAgent()
-sql_data_analysis_agent = GetSqlDataAnalysisAgent()
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--schema-mode",
+        choices=["agent", "builder"],
+        default=Config.SCHEMA_ANALYSIS_MODE,
+        help="agent: the schema analysis agent builds the data model; builder: build it in-process without an LLM call",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        choices=CACHE_MODES,
+        default=Config.LLM_CACHE_MODE,
+        help="off: always call the endpoint; record: serve cached responses and record new ones; replay: serve cached responses only",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=Config.TRACE_OUTPUT_PATH,
+        default=None,
+        metavar="TRACE_JSON",
+        help=f"record spans for tasks, agents, LLM calls, tools and SQL, write them as JSON (default {Config.TRACE_OUTPUT_PATH}) and print the top hot spots",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        metavar="RESULT_JSON",
+        help="also write the final analysis to this file",
+    )
 
-# ============================================================================
-# Tasks
-# ============================================================================
 
-sql_schema_analysis_task = Task(
-    description=(
-        "TASK FOR: Systematic Database Analyst Agent ONLY. "
-        "TASK: Analyze the database structure and provide a comprehensive data model. "
-    ),
-    expected_output=(
-        "A comprehensive JSON object showing the database structure, including tables, columns, data types, and relationships between tables. "
-        "The JSON output must be factual, well-structured, valid parsable JSON, and easy to understand for database professionals. "
-    ),
-    agent=sql_schema_analysis_agent
-)
+def run(args: argparse.Namespace):
+    from crewai import Process, Task, Crew
 
+    from agents import GetSqlSchemaAnalysisAgent, GetSqlDataAnalysisAgent
+    from db import SchemaCache, fetch_catalog, fetch_schema_fingerprint, get_pool_stats, parse_json_output
+    from llm import LLMResponseCache, install_llm_cache
+    from tools import (
+        ENCODING_COMPACT,
+        build_data_model,
+        decode_data_model,
+        encode_data_model,
+        merge_data_models,
+        split_data_model
+    )
+    from tracing import SPAN_PHASE, format_hot_spots, get_tracer, install_crewai_tracing, install_llm_tracing
 
-data_analysis_task = Task(
-    description=(
+    # ============================================================================
+    # LLM RESPONSE CACHE
+    # ============================================================================
+
+    llm_cache = install_llm_cache(LLMResponseCache(mode=args.llm_cache)) if args.llm_cache != CACHE_MODE_OFF else None
+
+    # ============================================================================
+    # PROFILING
+    # ============================================================================
+
+    tracer = get_tracer()
+    if args.profile:
+        tracer.enable()
+        install_llm_tracing()  # Installed after the cache, so LLM spans also cover cache hits
+        if not install_crewai_tracing():
+            print("⚠️ This CrewAI version has no event bus, task and agent spans are not recorded")
+
+    # ============================================================================
+    # SCHEMA CACHE
+    # ============================================================================
+
+    schema_cache = SchemaCache() if Config.SCHEMA_CACHE_ENABLED else None
+    schema_fingerprint = None
+    data_model = None  # A data model available up front skips sql_schema_analysis_task
+
+    if schema_cache:
+        try:
+            with tracer.span(SPAN_PHASE, "schema cache lookup"):
+                schema_fingerprint = fetch_schema_fingerprint()
+                data_model = schema_cache.load(schema_fingerprint)
+        except Exception as e:
+            print(f"⚠️ Schema cache disabled for this run: {str(e)}")
+            schema_cache = None
+
+    if data_model is not None:
+        print(f"📦 Schema unchanged (fingerprint {schema_fingerprint}), using cached data model")
+
+    # ============================================================================
+    # DATA MODEL BUILDER
+    # ============================================================================
+
+    if data_model is None and args.schema_mode == "builder":
+        with tracer.span(SPAN_PHASE, "data model builder"):
+            data_model = build_data_model(*fetch_catalog()).to_dict()
+        print(f"🧱 Data model built in-process for {len(data_model['tables'])} tables")
+        if schema_cache:
+            schema_cache.save(schema_fingerprint, data_model)
+
+    # ============================================================================
+    # AGENT
+    # ============================================================================
+
+    sql_schema_analysis_agent = GetSqlSchemaAnalysisAgent() if data_model is None else None
+    sql_data_analysis_agent = GetSqlDataAnalysisAgent()
+
+    # ============================================================================
+    # Tasks
+    # ============================================================================
+
+    sql_schema_analysis_task = None
+    if data_model is None:
+        sql_schema_analysis_task = Task(
+            description=(
+                "TASK FOR: Systematic Database Analyst Agent ONLY. "
+                "TASK: Analyze the database structure and provide a comprehensive data model. "
+            ),
+            expected_output=(
+                "A comprehensive JSON object showing the database structure, including tables, columns, data types, and relationships between tables. "
+                "The JSON output must be factual, well-structured, valid parsable JSON, and easy to understand for database professionals. "
+            ),
+            agent=sql_schema_analysis_agent
+        )
+
+    data_analysis_description = (
         "TASK FOR: Expert Data Analyst Agent ONLY. "
-        "TASK: Analyze the database schema data provided by the Systematic Database Analyst Agent and perform comprehensive data distribution analysis. The analysis should have actual data distribution by querying the database for real row counts. "
-    ),
-    expected_output=(
-        "A comprehensive JSON object containing actual data distribution analysis, including actual row counts for all tables, total tables analyzed, and analysis timestamp. "
+        "TASK: Analyze the database schema data provided by the Systematic Database Analyst Agent and perform comprehensive data distribution analysis. The analysis should have actual data distribution by querying the database for real row counts, per-column value distributions and foreign key fan-out. "
+    )
+    data_analysis_expected_output = (
+        "A comprehensive JSON object containing actual data distribution analysis, including actual row counts for all tables, per-column profiles (null fraction, distinct count, min/max, histograms, top values, string lengths), foreign key fan-out profiles (zero-degree keys, degree histograms, orphans), total tables analyzed, and analysis timestamp. "
         "The JSON output should be factual, well-structured, valid parsable JSON, and easy to understand for database professionals. "
-    ),
-    agent=sql_data_analysis_agent,
-    context=[sql_schema_analysis_task]
-)
-
-# Create a crew that processes SQL agent output through data analysis agent
-crew = Crew(
-    agents=[sql_schema_analysis_agent, sql_data_analysis_agent],
-    tasks=[sql_schema_analysis_task, data_analysis_task],
-    process=Process.sequential,
-    verbose=True
-)
-
-# Execute the workflow
-crew_output = crew.kickoff()
-
-print("=" * 80)
-print(crew_output.raw)
-print("=" * 80)
-
-print("=" * 80)
-print("🚀 CREW WORKFLOW COMPLETED")
-print("=" * 80)
+    )
+
+    # A known data model goes into the prompt directly; in compact mode it is split into FK-connected
+    # parts that fit SCHEMA_TOKEN_BUDGET, each analyzed by its own task
+    data_model_parts = []
+    if data_model is not None:
+        data_model_parts = split_data_model(data_model) if Config.SCHEMA_ENCODING == ENCODING_COMPACT else [data_model]
+        if len(data_model_parts) > 1:
+            print(f"✂️ Data model split into {len(data_model_parts)} FK-connected parts of at most {Config.SCHEMA_TOKEN_BUDGET} tokens")
+
+    data_analysis_tasks = []
+    for part in data_model_parts or [None]:
+        description = data_analysis_description
+        if part is not None and Config.SCHEMA_ENCODING == ENCODING_COMPACT:
+            description += (
+                "The Systematic Database Analyst Agent output for this database is the following compact JSON data model"
+                + (f" (part {part['part'][0]} of {part['part'][1]}, analyze only these tables)" if "part" in part else "")
+                + f": {json.dumps(encode_data_model(part), separators=(',', ':'))} "
+            )
+        elif part is not None:
+            description += (
+                "The Systematic Database Analyst Agent output for this database is the following JSON data model: "
+                f"{json.dumps(part)} "
+            )
+        data_analysis_tasks.append(Task(
+            description=description,
+            expected_output=data_analysis_expected_output,
+            agent=sql_data_analysis_agent,
+            context=[sql_schema_analysis_task] if sql_schema_analysis_task else []
+        ))
+
+    # Create a crew that processes SQL agent output through data analysis agent
+    agents = [sql_data_analysis_agent]
+    tasks = list(data_analysis_tasks)
+    if sql_schema_analysis_task:
+        agents.insert(0, sql_schema_analysis_agent)
+        tasks.insert(0, sql_schema_analysis_task)
+
+    crew = Crew(
+        agents=agents,
+        tasks=tasks,
+        process=Process.sequential,
+        verbose=True
+    )
+
+    # Execute the workflow
+    with tracer.span(SPAN_PHASE, "crew kickoff"):
+        crew_output = crew.kickoff()
+
+    # Cache the freshly built data model for the next run against the same schema
+    if schema_cache and sql_schema_analysis_task and sql_schema_analysis_task.output:
+        try:
+            schema_cache.save(schema_fingerprint, decode_data_model(parse_json_output(sql_schema_analysis_task.output.raw)))
+        except ValueError as e:
+            print(f"⚠️ Data model not cached, schema analysis output is not valid JSON: {str(e)}")
+
+    # Compact or split outputs are printed as one full JSON analysis
+    try:
+        analysis = merge_data_models([parse_json_output(task.output.raw) for task in data_analysis_tasks])
+        analysis_output = json.dumps(analysis, indent=2, default=str)
+    except (ValueError, AttributeError):
+        analysis_output = crew_output.raw
+
+    print("=" * 80)
+    print(analysis_output)
+    print("=" * 80)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(analysis_output)
+        print(f"💾 Analysis written to {args.output}")
+
+    print("=" * 80)
+    print("🚀 CREW WORKFLOW COMPLETED")
+    print("=" * 80)
+
+    print("🔌 CONNECTION POOL METRICS")
+    print(json.dumps(get_pool_stats(), indent=2))
+    print("=" * 80)
+
+    if llm_cache:
+        print("🗄️ LLM CACHE METRICS")
+        print(json.dumps(llm_cache.stats(), indent=2))
+        print("=" * 80)
+
+    if args.profile:
+        tracer.save(args.profile)
+        print(f"⏱️ TOP {Config.TRACE_TOP_N} HOT SPOTS (by self time, trace written to {args.profile})")
+        print(format_hot_spots(tracer.hot_spots(Config.TRACE_TOP_N)))
+        print("=" * 80)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the agentic database analysis workflow.")
+    add_arguments(parser)
+    run(parser.parse_args())
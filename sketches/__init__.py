@@ -0,0 +1,42 @@
+"""
+Sketches package: small, mergeable summaries of column values.
+"""
+
+from .hashing import (
+    hash_values
+)
+from .hyperloglog import (
+    HyperLogLog
+)
+from .kll import (
+    KLLSketch
+)
+from .space_saving import (
+    SpaceSaving
+)
+from .column_sketch import (
+    KIND_NUMERIC,
+    KIND_DATE,
+    KIND_STRING,
+    KIND_BOOLEAN,
+    KIND_OTHER,
+    ColumnSketch,
+    merge_column_sketches
+)
+
+__all__ = [
+    # Building blocks
+    'hash_values',
+    'HyperLogLog',
+    'KLLSketch',
+    'SpaceSaving',
+
+    # Column sketches
+    'KIND_NUMERIC',
+    'KIND_DATE',
+    'KIND_STRING',
+    'KIND_BOOLEAN',
+    'KIND_OTHER',
+    'ColumnSketch',
+    'merge_column_sketches'
+]
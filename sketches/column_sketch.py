@@ -0,0 +1,145 @@
+"""
+Column Sketch
+All sketches of one column: row and null counts, a HyperLogLog for distinct values, a KLL sketch of
+the values (numbers, or dates as days since an epoch) or of string lengths, and space-saving heavy
+hitters. Column sketches of the same column merge, whether they come from chunks of one scan,
+partitions of a table or separate runs.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .hashing import hash_values
+from .hyperloglog import HyperLogLog
+from .kll import KLLSketch
+from .space_saving import SpaceSaving
+
+KIND_NUMERIC = "numeric"
+KIND_DATE = "date"
+KIND_STRING = "string"
+KIND_BOOLEAN = "boolean"
+KIND_OTHER = "other"  # Only null counts and distinct values (e.g. uniqueidentifier, time)
+
+
+class ColumnSketch:
+    def __init__(self, kind: str, hll_precision: int = 14, kll_k: int = 200, heavy_hitters: int = 100):
+        self.kind = kind
+        self.rows = 0
+        self.nulls = 0
+        self.min: Any = None
+        self.max: Any = None
+        self.hll = HyperLogLog(hll_precision)
+        self.values = KLLSketch(kll_k) if kind in (KIND_NUMERIC, KIND_DATE) else None
+        self.lengths = KLLSketch(kll_k) if kind == KIND_STRING else None
+        self.length_total = 0
+        self.heavy_hitters = SpaceSaving(heavy_hitters)
+
+    def update(self, values: Sequence[Any], nulls: int = 0, numbers: Optional[np.ndarray] = None):
+        """
+        Adds a batch of non-null values (JSON-ready: numbers, strings, ISO dates) plus a count of nulls.
+        numbers holds the float form of the values for the value sketch of numeric and date columns.
+        """
+        self.rows += len(values) + nulls
+        self.nulls += nulls
+        if not values:
+            return
+        self.hll.add_hashes(hash_values(values))
+        self.heavy_hitters.update(values)
+        low, high = min(values), max(values)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        if self.values is not None:
+            self.values.update(numbers if numbers is not None else np.asarray(values, dtype=np.float64))
+        if self.lengths is not None:
+            lengths = np.fromiter((len(value) for value in values), dtype=np.float64, count=len(values))
+            self.lengths.update(lengths)
+            self.length_total += int(lengths.sum())
+
+    def merge(self, other: "ColumnSketch") -> "ColumnSketch":
+        if other.kind != self.kind:
+            raise ValueError(f"Cannot merge a {other.kind} column sketch into a {self.kind} one")
+        self.rows += other.rows
+        self.nulls += other.nulls
+        for bound in (other.min, other.max):
+            if bound is not None:
+                self.min = bound if self.min is None else min(self.min, bound)
+                self.max = bound if self.max is None else max(self.max, bound)
+        self.hll.merge(other.hll)
+        self.heavy_hitters.merge(other.heavy_hitters)
+        if self.values is not None:
+            self.values.merge(other.values)
+        if self.lengths is not None:
+            self.lengths.merge(other.lengths)
+            self.length_total += other.length_total
+        return self
+
+    def distinct_count(self) -> int:
+        """HyperLogLog estimate, exact when every value still has its own heavy hitter counter."""
+        non_null = self.rows - self.nulls
+        if self.heavy_hitters.floor == 0:
+            return len(self.heavy_hitters.counts)
+        return int(min(non_null, max(round(self.hll.estimate()), len(self.heavy_hitters.counts))))
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Draws n values that follow the sketched column, with nulls at the sketched null fraction.
+        Columns whose values all fit the heavy hitters are drawn from those exact frequencies, numeric
+        and date columns from the value sketch (dates as floats, i.e. days since the epoch), and other
+        columns from the heavy hitters as the best available approximation.
+        """
+        result = np.full(n, None, dtype=object)
+        non_null = rng.random(n) >= (self.nulls / self.rows if self.rows else 1.0)
+        count = int(non_null.sum())
+        if count == 0:
+            return result
+        if self.values is not None and self.heavy_hitters.floor > 0:
+            sampled = self.values.sample(count, rng)  # Sketch items are observed values, so integers stay whole
+            result[non_null] = sampled.astype(np.int64) if isinstance(self.min, int) else sampled
+        elif self.heavy_hitters.counts:
+            values = list(self.heavy_hitters.counts)
+            weights = np.asarray([self.heavy_hitters.counts[value] for value in values], dtype=np.float64)
+            cumulative = np.cumsum(weights)
+            picks = np.searchsorted(cumulative, rng.random(count) * cumulative[-1], side="right")
+            result[non_null] = np.asarray(values, dtype=object)[picks]
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "kind": self.kind,
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "min": self.min,
+            "max": self.max,
+            "hll": self.hll.to_dict(),
+            "heavy_hitters": self.heavy_hitters.to_dict(),
+        }
+        if self.values is not None:
+            data["values"] = self.values.to_dict()
+        if self.lengths is not None:
+            data["lengths"] = self.lengths.to_dict()
+            data["length_total"] = self.length_total
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ColumnSketch":
+        sketch = cls(data["kind"])
+        sketch.rows, sketch.nulls = data["rows"], data["nulls"]
+        sketch.min, sketch.max = data["min"], data["max"]
+        sketch.hll = HyperLogLog.from_dict(data["hll"])
+        sketch.heavy_hitters = SpaceSaving.from_dict(data["heavy_hitters"])
+        if "values" in data:
+            sketch.values = KLLSketch.from_dict(data["values"])
+        if "lengths" in data:
+            sketch.lengths = KLLSketch.from_dict(data["lengths"])
+            sketch.length_total = data["length_total"]
+        return sketch
+
+
+def merge_column_sketches(sketches: List[Optional[ColumnSketch]]) -> Optional[ColumnSketch]:
+    """Merges sketches of the same column into the first one (None entries are skipped)."""
+    merged = None
+    for sketch in sketches:
+        if sketch is not None:
+            merged = sketch if merged is None else merged.merge(sketch)
+    return merged
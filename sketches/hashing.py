@@ -0,0 +1,49 @@
+"""
+Value Hashing
+Stable 64-bit hashes of column values for the sketches. Python's hash() is salted per process, so
+sketches built in different processes or runs could not be merged with it.
+"""
+
+import datetime
+import decimal
+import hashlib
+from typing import Any, Sequence
+
+import numpy as np
+
+_NUMBER_TYPES = (int, float, decimal.Decimal, np.integer, np.floating)
+
+
+def splitmix64(x: np.ndarray) -> np.ndarray:
+    """Vectorized SplitMix64 finalizer: a fast, well-mixed bijection on uint64."""
+    x = x.astype(np.uint64, copy=True)
+    with np.errstate(over="ignore"):
+        x += np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _canonical_bytes(value: Any) -> bytes:
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat().encode("utf-8")
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return str(value).encode("utf-8")
+
+
+def hash_values(values: Sequence[Any]) -> np.ndarray:
+    """
+    Hashes non-null values to uint64. Numbers hash by their float64 value, so 1, 1.0 and
+    Decimal('1.00') collide on purpose; everything else hashes by its canonical text.
+    """
+    if len(values) == 0:
+        return np.empty(0, dtype=np.uint64)
+    if all(isinstance(value, _NUMBER_TYPES) and not isinstance(value, bool) for value in values):
+        numbers = np.asarray(values, dtype=np.float64) + 0.0  # -0.0 becomes 0.0
+        return splitmix64(numbers.view(np.uint64))
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(_canonical_bytes(value), digest_size=8).digest(), "little") for value in values),
+        dtype=np.uint64,
+        count=len(values),
+    )
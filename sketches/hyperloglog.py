@@ -0,0 +1,69 @@
+"""
+HyperLogLog
+Distinct-count sketch with 2^precision one-byte registers (about 1.04 / sqrt(2^precision) relative
+standard error, 0.8% at the default precision 14). Sketches of the same precision merge by taking
+the register-wise maximum, so partitions and runs can be combined without re-reading data.
+"""
+
+import base64
+import math
+import zlib
+from typing import Any, Dict
+
+import numpy as np
+
+
+def _leading_zeros(x: np.ndarray) -> np.ndarray:
+    """Number of leading zero bits of each uint64 (binary search, vectorized)."""
+    x = x.copy()
+    zeros = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = (x >> np.uint64(64 - shift)) == 0
+        zeros[empty] += shift
+        x[empty] <<= np.uint64(shift)
+    return zeros
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        # A sentinel bit below the remaining 64 - p bits caps the rank at 64 - p + 1
+        remaining = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        ranks = _leading_zeros(remaining) + 1
+        np.maximum.at(self.registers, index, ranks)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            return m * math.log(m / empty)  # Linear counting is more accurate for small cardinalities
+        return raw
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(zlib.compress(self.registers.tobytes())).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(data["precision"])
+        sketch.registers = np.frombuffer(zlib.decompress(base64.b64decode(data["registers"])), dtype=np.uint8).copy()
+        return sketch
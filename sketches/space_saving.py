@@ -0,0 +1,66 @@
+"""
+Space-Saving Heavy Hitters
+Keeps at most `capacity` counters. An unseen value evicts the smallest counter and inherits its count
+as error, so every reported count overestimates the true count by at most its error and every value
+more frequent than rows / capacity is guaranteed to be kept. Sketches merge by adding counters.
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+
+class SpaceSaving:
+    def __init__(self, capacity: int = 100):
+        self.capacity = max(1, capacity)
+        self.counts: Dict[Any, int] = {}
+        self.errors: Dict[Any, int] = {}
+        self.floor = 0  # Upper bound on the count of any value not in the counters
+
+    def update(self, values: Iterable[Any]):
+        batch = SpaceSaving(self.capacity)
+        batch.counts = dict(Counter(values))
+        batch.errors = dict.fromkeys(batch.counts, 0)
+        self.merge(batch)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Adds the other sketch's counters. A value missing from one side may have had up to that side's
+        floor occurrences there, which is added to both its count and its error.
+        """
+        counts: Dict[Any, int] = {}
+        errors: Dict[Any, int] = {}
+        for value in self.counts.keys() | other.counts.keys():
+            mine = value in self.counts
+            theirs = value in other.counts
+            counts[value] = (self.counts[value] if mine else self.floor) + (other.counts[value] if theirs else other.floor)
+            errors[value] = (self.errors[value] if mine else self.floor) + (other.errors[value] if theirs else other.floor)
+        floor = self.floor + other.floor
+        if len(counts) > self.capacity:
+            ranked = sorted(counts, key=lambda value: (-counts[value], str(value)))
+            kept = ranked[:self.capacity]
+            floor = max(floor, counts[ranked[self.capacity]])  # Largest evicted count
+            counts = {value: counts[value] for value in kept}
+            errors = {value: errors[value] for value in kept}
+        self.counts, self.errors, self.floor = counts, errors, floor
+        return self
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """The k most frequent values, ties broken by value text so output is stable across runs."""
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], str(item[0])))[:k]
+        return [{"value": value, "count": count, "error": self.errors[value]} for value, count in ranked]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "floor": self.floor,
+            "items": [[value, count, self.errors[value]] for value, count in self.counts.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SpaceSaving":
+        sketch = cls(data["capacity"])
+        sketch.floor = data["floor"]
+        for value, count, error in data["items"]:
+            sketch.counts[value] = count
+            sketch.errors[value] = error
+        return sketch
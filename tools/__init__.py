@@ -3,19 +3,103 @@ Tools package for CrewAI database analysis workflow.
 Contains all the tools organized by functionality.
 """
 
-from .database_tools import (
-    GetSchemaInfoTool, 
-    GetForeignKeysTool
+import importlib
+from typing import TYPE_CHECKING
+
+from .data_model import (
+    ColumnModel,
+    TableModel,
+    ForeignKeyModel,
+    DataModel,
+    build_data_model
 )
-from .data_analysis_tools import (
-    AnalyzeActualDataDistributionTool
+from .compact_encoding import (
+    ENCODING_COMPACT,
+    ENCODING_JSON,
+    COMPACT_FORMAT_PROMPT,
+    encode_data_model,
+    decode_data_model,
+    load_schema_data,
+    estimate_tokens,
+    fk_clusters,
+    split_data_model,
+    merge_data_models
 )
 
+# The CrewAI tools (crewai, pyodbc) and the validator (numpy) are imported on first access (PEP 562),
+# so `import tools` and its plain submodules stay cheap for the non-agent commands
+_LAZY_EXPORTS = {
+    'GetSchemaInfoTool': 'database_tools',
+    'GetForeignKeysTool': 'database_tools',
+    'fetch_schema_info': 'database_tools',
+    'fetch_foreign_keys': 'database_tools',
+    'AnalyzeActualDataDistributionTool': 'data_analysis_tools',
+    'ProfileColumnDistributionTool': 'data_analysis_tools',
+    'AnalyzeRelationshipCardinalityTool': 'data_analysis_tools',
+    'ValidateSyntheticDataTool': 'data_analysis_tools',
+    'ValidationSettings': 'fidelity_validator',
+    'validate_fidelity': 'fidelity_validator',
+    'format_fidelity_report': 'fidelity_validator',
+}
+
+if TYPE_CHECKING:
+    from .database_tools import GetSchemaInfoTool, GetForeignKeysTool, fetch_schema_info, fetch_foreign_keys
+    from .data_analysis_tools import (
+        AnalyzeActualDataDistributionTool,
+        ProfileColumnDistributionTool,
+        AnalyzeRelationshipCardinalityTool,
+        ValidateSyntheticDataTool
+    )
+    from .fidelity_validator import ValidationSettings, validate_fidelity, format_fidelity_report
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
 __all__ = [
     # Database schema tools
     'GetSchemaInfoTool',
     'GetForeignKeysTool',
+    'fetch_schema_info',
+    'fetch_foreign_keys',
     
     # Data analysis tools
-    'AnalyzeActualDataDistributionTool'
+    'AnalyzeActualDataDistributionTool',
+    'ProfileColumnDistributionTool',
+    'AnalyzeRelationshipCardinalityTool',
+    'ValidateSyntheticDataTool',
+
+    # Data model builder
+    'ColumnModel',
+    'TableModel',
+    'ForeignKeyModel',
+    'DataModel',
+    'build_data_model',
+
+    # Fidelity validation
+    'ValidationSettings',
+    'validate_fidelity',
+    'format_fidelity_report',
+
+    # Compact encoding
+    'ENCODING_COMPACT',
+    'ENCODING_JSON',
+    'COMPACT_FORMAT_PROMPT',
+    'encode_data_model',
+    'decode_data_model',
+    'load_schema_data',
+    'estimate_tokens',
+    'fk_clusters',
+    'split_data_model',
+    'merge_data_models'
 ]
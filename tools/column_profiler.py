@@ -0,0 +1,297 @@
+"""
+Column Profiler
+Builds and runs the aggregate queries behind column-level distribution profiles.
+
+Every table is profiled with a fixed number of queries, independent of its column count:
+1) one aggregate scan for null counts, distinct counts, min/max and string lengths of all columns,
+2) one scan that unpivots all numeric, date and string-length values and buckets them with NTILE
+   into equi-depth histograms,
+3) one scan that unpivots all categorical columns and keeps the top-k values per column.
+Tables above the scan budget are read through TABLESAMPLE ... REPEATABLE so all three queries
+see the same sample.
+"""
+
+import datetime
+import decimal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import pooled_connection, quote_identifier, quote_table_name
+from tracing import get_tracer
+
+NUMERIC_TYPES = {"tinyint", "smallint", "int", "bigint", "decimal", "numeric", "float", "real", "money", "smallmoney"}
+DATE_TYPES = {"date", "datetime", "datetime2", "smalldatetime", "datetimeoffset"}
+STRING_TYPES = {"char", "varchar", "nchar", "nvarchar"}
+BOOLEAN_TYPES = {"bit"}
+# text, ntext, image, xml, binary, geography, ... only get null counts
+COMPARABLE_TYPES = NUMERIC_TYPES | DATE_TYPES | STRING_TYPES | BOOLEAN_TYPES | {"time", "uniqueidentifier"}
+
+# PROFILE_METHOD values: server-side aggregate queries, mergeable sketches built from streamed rows,
+# or exact profiles computed from the local columnar extracts
+METHOD_AGGREGATE = "aggregate"
+METHOD_SKETCH = "sketch"
+METHOD_EXTRACT = "extract"
+
+# Histogram values are floats: numbers as-is, dates as days since this epoch
+DATE_EPOCH = datetime.datetime(1900, 1, 1)
+
+
+@dataclass
+class ProfileSettings:
+    max_scan_rows: int = 1_000_000  # Tables above this many rows are profiled on a sample of this size
+    histogram_buckets: int = 10
+    top_k: int = 10
+    categorical_max_distinct: int = 1000  # Columns with at most this many distinct values get top-k
+    query_timeout_seconds: int = 300  # Per-query budget, 0 means no timeout
+    sample_seed: int = 42
+    method: str = METHOD_AGGREGATE
+    hll_precision: int = 14
+    kll_k: int = 200
+    heavy_hitters: int = 100  # Space-saving counters per column (sketch method)
+
+    @classmethod
+    def from_config(cls) -> "ProfileSettings":
+        return cls(
+            max_scan_rows=Config.PROFILE_MAX_SCAN_ROWS,
+            histogram_buckets=Config.PROFILE_HISTOGRAM_BUCKETS,
+            top_k=Config.PROFILE_TOP_K,
+            categorical_max_distinct=Config.PROFILE_CATEGORICAL_MAX_DISTINCT,
+            query_timeout_seconds=Config.PROFILE_QUERY_TIMEOUT_SECONDS,
+            sample_seed=Config.PROFILE_SAMPLE_SEED,
+            method=Config.PROFILE_METHOD,
+            hll_precision=Config.SKETCH_HLL_PRECISION,
+            kll_k=Config.SKETCH_KLL_K,
+            heavy_hitters=Config.SKETCH_HEAVY_HITTERS,
+        )
+
+
+def _base_type(data_type: str) -> str:
+    return (data_type or "").lower().split("(", 1)[0].strip()
+
+
+def _table_source(table_name: str, row_count: Optional[int], settings: ProfileSettings) -> str:
+    source = quote_table_name(table_name)
+    if row_count is not None and row_count > settings.max_scan_rows:
+        source += f" TABLESAMPLE ({int(settings.max_scan_rows)} ROWS) REPEATABLE ({int(settings.sample_seed)})"
+    return source
+
+
+def _histogram_value_expression(column: str, base_type: str) -> str:
+    if base_type in NUMERIC_TYPES:
+        return f"CAST({column} AS FLOAT)"
+    if base_type == "date":
+        return f"CAST(DATEDIFF(DAY, '19000101', {column}) AS FLOAT)"
+    return f"DATEDIFF_BIG(SECOND, '19000101', {column}) / 86400.0"
+
+
+def build_scalar_query(table_source: str, columns: List[Dict[str, Any]]):
+    """Returns the single-scan aggregate query and the (column index, statistic) for every output column."""
+    expressions = ["COUNT_BIG(*)"]
+    layout = [(None, "row_count")]
+    for index, column in enumerate(columns):
+        name = quote_identifier(column["column_name"])
+        base_type = _base_type(column["data_type"])
+        expressions.append(f"COUNT_BIG({name})")
+        layout.append((index, "non_null_count"))
+        if base_type not in COMPARABLE_TYPES:
+            continue
+        value = f"CAST({name} AS TINYINT)" if base_type in BOOLEAN_TYPES else name
+        expressions.append(f"COUNT_BIG(DISTINCT {value})")
+        layout.append((index, "distinct_count"))
+        if base_type != "uniqueidentifier":
+            expressions += [f"MIN({value})", f"MAX({value})"]
+            layout += [(index, "min"), (index, "max")]
+        if base_type in STRING_TYPES:
+            expressions += [f"MIN(LEN({name}))", f"MAX(LEN({name}))", f"AVG(CAST(LEN({name}) AS FLOAT))"]
+            layout += [(index, "min_length"), (index, "max_length"), (index, "avg_length")]
+
+    query = "SELECT " + ",\n       ".join(expressions) + f"\nFROM {table_source}"
+    return query, layout
+
+
+def build_histogram_query(table_source: str, columns: List[Dict[str, Any]], buckets: int) -> Optional[str]:
+    """
+    Equi-depth histograms for all numeric and date columns plus string lengths in one scan.
+    Series id i is the value of column i, series id -(i + 1) is the length of string column i.
+    """
+    values = []
+    for index, column in enumerate(columns):
+        name = quote_identifier(column["column_name"])
+        base_type = _base_type(column["data_type"])
+        if base_type in NUMERIC_TYPES or base_type in DATE_TYPES:
+            values.append(f"({index}, {_histogram_value_expression(name, base_type)})")
+        elif base_type in STRING_TYPES:
+            values.append(f"({-(index + 1)}, CAST(LEN({name}) AS FLOAT))")
+    if not values:
+        return None
+
+    return f"""
+        WITH series AS (
+            SELECT v.series_id, v.val
+            FROM {table_source}
+            CROSS APPLY (VALUES {", ".join(values)}) AS v(series_id, val)
+            WHERE v.val IS NOT NULL
+        ),
+        bucketed AS (
+            SELECT series_id, val, NTILE({int(buckets)}) OVER (PARTITION BY series_id ORDER BY val) AS bucket
+            FROM series
+        )
+        SELECT series_id, bucket, MIN(val) AS lower_bound, MAX(val) AS upper_bound, COUNT_BIG(*) AS frequency
+        FROM bucketed
+        GROUP BY series_id, bucket
+        ORDER BY series_id, bucket
+    """
+
+
+def build_top_values_query(table_source: str, columns: List[Dict[str, Any]], indexes: List[int], top_k: int) -> Optional[str]:
+    """Top-k most frequent values of the given categorical columns in one scan."""
+    if not indexes:
+        return None
+    values = ", ".join(
+        f"({index}, CAST({quote_identifier(columns[index]['column_name'])} AS NVARCHAR(400)))"
+        for index in indexes
+    )
+    return f"""
+        WITH series AS (
+            SELECT v.column_index, v.val
+            FROM {table_source}
+            CROSS APPLY (VALUES {values}) AS v(column_index, val)
+            WHERE v.val IS NOT NULL
+        ),
+        frequencies AS (
+            SELECT column_index, val, COUNT_BIG(*) AS frequency
+            FROM series
+            GROUP BY column_index, val
+        ),
+        ranked AS (
+            SELECT column_index, val, frequency,
+                   ROW_NUMBER() OVER (PARTITION BY column_index ORDER BY frequency DESC, val) AS value_rank
+            FROM frequencies
+        )
+        SELECT column_index, val, frequency
+        FROM ranked
+        WHERE value_rank <= {int(top_k)}
+        ORDER BY column_index, value_rank
+    """
+
+
+def to_json_value(value: Any) -> Any:
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return value
+
+
+def _histogram_bound(value: float, base_type: str) -> Any:
+    if base_type in DATE_TYPES:
+        moment = DATE_EPOCH + datetime.timedelta(days=value)
+        return moment.date().isoformat() if base_type == "date" else moment.isoformat()
+    return value
+
+
+def profile_table(conn, table_name: str, columns: List[Dict[str, Any]], row_count: Optional[int], settings: ProfileSettings) -> Dict[str, Any]:
+    """Profiles one table and returns per-column profiles (in column order) plus table-level metadata."""
+    started = time.monotonic()
+    table_source = _table_source(table_name, row_count, settings)
+    base_types = [_base_type(column["data_type"]) for column in columns]
+    profiles: List[Dict[str, Any]] = [{} for _ in columns]
+
+    previous_timeout = getattr(conn, "timeout", 0)
+    conn.timeout = settings.query_timeout_seconds
+    cursor = conn.cursor()
+    try:
+        # 1) Scalar statistics for all columns
+        query, layout = build_scalar_query(table_source, columns)
+        cursor.execute(query)
+        row = cursor.fetchone()
+        scanned_rows = int(row[0])
+        for (index, statistic), value in zip(layout, row):
+            if index is not None:
+                profiles[index][statistic] = to_json_value(value)
+        for profile in profiles:
+            non_null = profile.pop("non_null_count")
+            profile["null_count"] = scanned_rows - non_null
+            profile["null_fraction"] = round((scanned_rows - non_null) / scanned_rows, 6) if scanned_rows else 0.0
+
+        # 2) Equi-depth histograms
+        query = build_histogram_query(table_source, columns, settings.histogram_buckets)
+        if query:
+            cursor.execute(query)
+            for series_id, _, lower_bound, upper_bound, frequency in cursor.fetchall():
+                if series_id >= 0:
+                    base_type = base_types[series_id]
+                    profiles[series_id].setdefault("histogram", []).append({
+                        "lower": _histogram_bound(lower_bound, base_type),
+                        "upper": _histogram_bound(upper_bound, base_type),
+                        "count": int(frequency),
+                    })
+                else:
+                    profiles[-series_id - 1].setdefault("length_histogram", []).append({
+                        "lower": int(lower_bound),
+                        "upper": int(upper_bound),
+                        "count": int(frequency),
+                    })
+
+        # 3) Top-k values of categorical columns
+        categorical = [
+            index for index, profile in enumerate(profiles)
+            if base_types[index] in BOOLEAN_TYPES
+            or (base_types[index] in COMPARABLE_TYPES
+                and 0 < profile.get("distinct_count", 0) <= settings.categorical_max_distinct)
+        ]
+        query = build_top_values_query(table_source, columns, categorical, settings.top_k)
+        if query:
+            cursor.execute(query)
+            for column_index, value, frequency in cursor.fetchall():
+                profiles[column_index].setdefault("top_values", []).append({
+                    "value": value,
+                    "count": int(frequency),
+                })
+    finally:
+        cursor.close()
+        conn.timeout = previous_timeout
+
+    return {
+        "columns": profiles,
+        "metadata": {
+            "scanned_rows": scanned_rows,
+            "sampled": row_count is not None and row_count > settings.max_scan_rows,
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+        },
+    }
+
+
+def profile_tables(tables: List[Dict[str, Any]], row_counts: Dict[str, Optional[int]],
+                   settings: Optional[ProfileSettings] = None, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Profiles tables concurrently, each on a connection borrowed from the shared pool.
+    With settings.method "sketch" the tables are profiled by tools.sketch_profiler instead,
+    with "extract" from the local columnar extracts of tools.extract_cache.
+    """
+    settings = settings or ProfileSettings.from_config()
+    if settings.method == METHOD_SKETCH:
+        from tools.sketch_profiler import profile_tables_sketched  # The sketch profiler builds on this module
+        return profile_tables_sketched(tables, row_counts, settings)
+    if settings.method == METHOD_EXTRACT:
+        from tools.extract_cache import profile_tables_extracted  # Needs pyarrow, so only imported when used
+        return profile_tables_extracted(tables, row_counts, settings)
+    max_workers = max(1, min(max_workers or Config.PROFILE_WORKERS, len(tables) or 1))
+
+    def run(table_info: Dict[str, Any]):
+        table_name = table_info["table_name"]
+        try:
+            with pooled_connection() as conn:
+                return profile_table(conn, table_name, table_info.get("columns", []), row_counts.get(table_name), settings)
+        except Exception as e:
+            return {"error": f"Failed to profile {table_name}: {str(e)}"}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip((t["table_name"] for t in tables), executor.map(get_tracer().bind(run), tables)))
@@ -0,0 +1,377 @@
+"""
+Compact Data Model Encoding
+Token-lean encoding of the data model and its profiles for LLM context, and FK-connected splitting
+of large data models into parts that fit a token budget.
+
+The encoding is lossless and still plain JSON:
+- data types are interned into a "ty" list and columns become [name, type index, nullable 0/1(, profile)]
+- foreign keys become [constraint, parent_table, parent_column, referenced_table, referenced_column]
+- every other key is abbreviated (see ABBREVIATIONS) and lists of same-shaped objects become
+  {"k": [keys], "r": [[values], ...]}, so keys are written once per list instead of once per item
+"""
+
+import json
+import math
+from typing import Any, Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+ENCODING_COMPACT = "compact"
+ENCODING_JSON = "json"
+COMPACT_FORMAT = "c1"
+
+ABBREVIATIONS = {
+    # Data model
+    "database_name": "db",
+    "table_name": "n",
+    "part": "pa",
+    # Row counts
+    "row_count": "rc",
+    "row_count_source": "rs",
+    "row_count_error": "re",
+    "row_count_mode": "rm",
+    "analysis_metadata": "am",
+    "analysis_timestamp": "at",
+    "total_tables": "tt",
+    # Column profiles
+    "null_count": "nc",
+    "null_fraction": "nf",
+    "distinct_count": "dc",
+    "min": "lo",
+    "max": "hi",
+    "histogram": "h",
+    "top_values": "tv",
+    "value": "v",
+    "count": "ct",
+    "lower": "l",
+    "upper": "u",
+    "min_length": "ln",
+    "max_length": "lx",
+    "avg_length": "la",
+    "length_histogram": "lh",
+    "profile_metadata": "pm",
+    "profile_error": "pe",
+    "profile_timestamp": "ps",
+    "scanned_rows": "sr",
+    "sampled": "sm",
+    "elapsed_seconds": "es",
+    "incremental": "ic",
+    "rescanned": "sc",
+    "reason": "rn",
+    "profiled_at": "pd",
+    # Relationship profiles
+    "relationship_profiles": "rp",
+    "relationship_timestamp": "rt",
+    "constraint_name": "cn",
+    "parent_table": "pt",
+    "referenced_table": "rf",
+    "parent_columns": "pc",
+    "referenced_columns": "rfc",
+    "referenced_keys": "rk",
+    "zero_degree_keys": "zk",
+    "zero_degree_fraction": "zf",
+    "linked_child_rows": "lr",
+    "mean_degree": "md",
+    "max_degree": "xd",
+    "orphan_keys": "ok",
+    "orphan_child_rows": "or",
+    "null_key_child_rows": "nr",
+    "degree_histogram": "dh",
+    "degree_from": "df",
+    "degree_to": "dt",
+    "observed_min": "on",
+    "observed_max": "ox",
+    "keys": "ks",
+    "child_rows": "cr",
+}
+EXPANSIONS = {short: key for key, short in ABBREVIATIONS.items()}
+
+# Keys with a dedicated layout
+FORMAT_KEY = "fmt"
+TYPES_KEY = "ty"
+TABLES_KEY = "t"
+COLUMNS_KEY = "c"
+FOREIGN_KEYS_KEY = "fk"
+TABULAR_KEYS, TABULAR_ROWS = "k", "r"
+
+FOREIGN_KEY_FIELDS = ["constraint_name", "parent_table", "parent_column", "referenced_table", "referenced_column"]
+
+# Legend for agent prompts
+COMPACT_FORMAT_PROMPT = (
+    f'Compact data model format "{COMPACT_FORMAT}": "db" is the database name, "ty" the list of data types, '
+    '"t" the tables as {"n": "schema.table", "c": [[column_name, index into ty, is_nullable 0/1], ...]}, '
+    '"fk" the foreign keys as [constraint_name, parent_table, parent_column, referenced_table, referenced_column]. '
+)
+
+
+def _pack(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {ABBREVIATIONS.get(key, key): _pack(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if len(value) > 1 and all(isinstance(item, dict) for item in value):
+            keys = list(value[0].keys())
+            if all(list(item.keys()) == keys for item in value):
+                return {
+                    TABULAR_KEYS: [ABBREVIATIONS.get(key, key) for key in keys],
+                    TABULAR_ROWS: [[_pack(item[key]) for key in keys] for item in value],
+                }
+        return [_pack(item) for item in value]
+    return value
+
+
+def _unpack(value: Any) -> Any:
+    if isinstance(value, dict):
+        if set(value.keys()) == {TABULAR_KEYS, TABULAR_ROWS}:
+            keys = [EXPANSIONS.get(key, key) for key in value[TABULAR_KEYS]]
+            return [dict(zip(keys, (_unpack(item) for item in row))) for row in value[TABULAR_ROWS]]
+        return {EXPANSIONS.get(key, key): _unpack(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_unpack(item) for item in value]
+    return value
+
+
+def is_compact(data: Any) -> bool:
+    return isinstance(data, dict) and data.get(FORMAT_KEY) == COMPACT_FORMAT
+
+
+def encode_data_model(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Encodes a data model (optionally enriched with row counts and profiles) into the compact format."""
+    if is_compact(data):
+        return data
+    types: List[str] = []
+    type_index: Dict[str, int] = {}
+
+    def intern(data_type: str) -> int:
+        if data_type not in type_index:
+            type_index[data_type] = len(types)
+            types.append(data_type)
+        return type_index[data_type]
+
+    encoded: Dict[str, Any] = {FORMAT_KEY: COMPACT_FORMAT}
+    tables = []
+    for table in data.get("tables", []):
+        columns = []
+        for column in table.get("columns", []):
+            row = [column["column_name"], intern(column["data_type"]), int(bool(column.get("is_nullable")))]
+            if "profile" in column:
+                row.append(_pack(column["profile"]))
+            columns.append(row)
+        entry = {ABBREVIATIONS["table_name"]: table["table_name"], COLUMNS_KEY: columns}
+        entry.update(_pack({key: value for key, value in table.items() if key not in ("table_name", "columns")}))
+        tables.append(entry)
+
+    for key, value in data.items():
+        if key == "tables":
+            encoded[TYPES_KEY] = types
+            encoded[TABLES_KEY] = tables
+        elif key == "foreign_keys":
+            encoded[FOREIGN_KEYS_KEY] = [[fk[field] for field in FOREIGN_KEY_FIELDS] for fk in value]
+        else:
+            encoded[ABBREVIATIONS.get(key, key)] = _pack(value)
+    return encoded
+
+
+def decode_data_model(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of encode_data_model; data models that are not compact are returned unchanged."""
+    if not is_compact(data):
+        return data
+    types = data.get(TYPES_KEY, [])
+    decoded: Dict[str, Any] = {}
+    for key, value in data.items():
+        if key in (FORMAT_KEY, TYPES_KEY):
+            continue
+        if key == TABLES_KEY:
+            tables = []
+            for entry in value:
+                columns = []
+                for row in entry.get(COLUMNS_KEY, []):
+                    column = {"column_name": row[0], "data_type": types[row[1]], "is_nullable": bool(row[2])}
+                    if len(row) > 3:
+                        column["profile"] = _unpack(row[3])
+                    columns.append(column)
+                table = {"table_name": entry[ABBREVIATIONS["table_name"]], "columns": columns}
+                table.update(_unpack({k: v for k, v in entry.items() if k not in (ABBREVIATIONS["table_name"], COLUMNS_KEY)}))
+                tables.append(table)
+            decoded["tables"] = tables
+        elif key == FOREIGN_KEYS_KEY:
+            decoded["foreign_keys"] = [dict(zip(FOREIGN_KEY_FIELDS, row)) for row in value]
+        else:
+            decoded[EXPANSIONS.get(key, key)] = _unpack(value)
+    return decoded
+
+
+def load_schema_data(schema_data: Any) -> Dict[str, Any]:
+    """Parses tool input (JSON string or dict, compact or not) into the full data model."""
+    data = json.loads(schema_data) if isinstance(schema_data, str) else schema_data
+    return decode_data_model(data)
+
+
+def encode_output(data: Any, encoding: Optional[str] = None) -> Any:
+    """Encodes a tool result for the LLM according to SCHEMA_ENCODING; error results pass through."""
+    encoding = encoding or Config.SCHEMA_ENCODING
+    if encoding != ENCODING_COMPACT or not isinstance(data, dict) or "error" in data:
+        return data
+    return encode_data_model(data)
+
+
+def to_prompt_json(data: Dict[str, Any]) -> str:
+    """Minified JSON, the form the data model takes in prompts."""
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+_encoder = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Counts tokens with tiktoken when it is installed (it ships with litellm), else about 4 characters per token."""
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoder = False
+    if _encoder:
+        return len(_encoder.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+# ============================================================================
+# FK-connected splitting
+# ============================================================================
+
+def fk_clusters(data: Dict[str, Any]) -> List[List[str]]:
+    """Groups the tables into connected components of the foreign key graph, in table order."""
+    table_names = [table["table_name"] for table in data.get("tables", [])]
+    parent = {name: name for name in table_names}
+
+    def find(name: str) -> str:
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    for fk in data.get("foreign_keys", []):
+        if fk["parent_table"] in parent and fk["referenced_table"] in parent:
+            parent[find(fk["parent_table"])] = find(fk["referenced_table"])
+
+    clusters: Dict[str, List[str]] = {}
+    for name in table_names:
+        clusters.setdefault(find(name), []).append(name)
+    return list(clusters.values())
+
+
+def _split_cluster(cluster: List[str], costs: Dict[str, int], capacity: int,
+                   neighbours: Dict[str, List[str]]) -> List[List[str]]:
+    """Splits an oversized cluster in breadth-first FK order, so each piece stays mostly connected."""
+    pieces, piece, piece_cost = [], [], 0
+    members, visited = set(cluster), set()
+    for start in cluster:
+        if start in visited:
+            continue
+        visited.add(start)
+        queue = [start]
+        while queue:
+            name = queue.pop(0)
+            if piece and piece_cost + costs[name] > capacity:
+                pieces.append(piece)
+                piece, piece_cost = [], 0
+            piece.append(name)
+            piece_cost += costs[name]
+            for neighbour in neighbours.get(name, []):
+                if neighbour in members and neighbour not in visited:
+                    visited.add(neighbour)
+                    queue.append(neighbour)
+    if piece:
+        pieces.append(piece)
+    return pieces
+
+
+def split_data_model(data: Dict[str, Any], token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Splits a data model into parts whose compact encoding fits `token_budget` tokens.
+
+    FK-connected clusters are kept whole where possible and packed first-fit decreasing; a cluster
+    larger than the budget is cut in breadth-first FK order, and a single table larger than the
+    budget becomes a part of its own. Each foreign key and relationship profile goes to the part
+    holding its parent table. Every part carries "part": [index, count] (1-based).
+    """
+    data = decode_data_model(data)
+    token_budget = token_budget or Config.SCHEMA_TOKEN_BUDGET
+    if estimate_tokens(to_prompt_json(encode_data_model(data))) <= token_budget:
+        return [data]
+
+    tables = {table["table_name"]: table for table in data.get("tables", [])}
+    owned: Dict[str, Dict[str, list]] = {name: {"foreign_keys": [], "relationship_profiles": []} for name in tables}
+    for key in ("foreign_keys", "relationship_profiles"):
+        for item in data.get(key, []):
+            if item["parent_table"] in owned:
+                owned[item["parent_table"]][key].append(item)
+    # A table carries the cost of the foreign keys and relationship profiles that go with it
+    envelope = estimate_tokens(to_prompt_json(encode_data_model({"tables": [], "foreign_keys": [], "relationship_profiles": []})))
+    costs = {
+        name: max(1, estimate_tokens(to_prompt_json(encode_data_model({"tables": [table], **owned[name]}))) - envelope)
+        for name, table in tables.items()
+    }
+    skeleton = {key: value for key, value in data.items() if key not in ("tables", "foreign_keys", "relationship_profiles")}
+    overhead = estimate_tokens(to_prompt_json(encode_data_model({**skeleton, "tables": [], "part": [0, 0]})))
+    capacity = max(1, token_budget - overhead)
+
+    neighbours: Dict[str, List[str]] = {}
+    for fk in data.get("foreign_keys", []):
+        neighbours.setdefault(fk["parent_table"], []).append(fk["referenced_table"])
+        neighbours.setdefault(fk["referenced_table"], []).append(fk["parent_table"])
+
+    pieces = []
+    for cluster in fk_clusters(data):
+        if sum(costs[name] for name in cluster) > capacity:
+            pieces.extend(_split_cluster(cluster, costs, capacity, neighbours))
+        else:
+            pieces.append(cluster)
+
+    bins: List[List[str]] = []
+    bin_costs: List[int] = []
+    for piece in sorted(pieces, key=lambda names: -sum(costs[name] for name in names)):
+        piece_cost = sum(costs[name] for name in piece)
+        target = next((index for index, used in enumerate(bin_costs) if used + piece_cost <= capacity), None)
+        if target is None:
+            bins.append(list(piece))
+            bin_costs.append(piece_cost)
+        else:
+            bins[target].extend(piece)
+            bin_costs[target] += piece_cost
+
+    # Keep the original table order inside each part
+    order = {name: index for index, name in enumerate(tables)}
+    parts = []
+    for index, names in enumerate(bins):
+        members = set(names)
+        part = dict(skeleton)
+        part["tables"] = [tables[name] for name in sorted(names, key=order.get)]
+        if "foreign_keys" in data:
+            part["foreign_keys"] = [fk for fk in data["foreign_keys"] if fk["parent_table"] in members]
+        if "relationship_profiles" in data:
+            part["relationship_profiles"] = [p for p in data["relationship_profiles"] if p["parent_table"] in members]
+        part["part"] = [index + 1, len(bins)]
+        parts.append(part)
+    return parts
+
+
+def merge_data_models(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reassembles the (possibly compact) outputs produced for the parts of split_data_model."""
+    merged: Dict[str, Any] = {}
+    for part in (decode_data_model(part) for part in parts):
+        for key, value in part.items():
+            if key == "part":
+                continue
+            if isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+            elif isinstance(value, dict):
+                merged.setdefault(key, {}).update(value)
+            else:
+                merged.setdefault(key, value)
+    if "total_tables" in merged.get("analysis_metadata", {}):
+        merged["analysis_metadata"]["total_tables"] = len(merged.get("tables", []))
+    return merged
@@ -0,0 +1,193 @@
+"""
+Data Analysis
+The analysis steps behind the data analysis tools (row counts, column profiles, relationship fan-out)
+as plain functions on a data model dict, so they run without CrewAI, e.g. from cli.py.
+"""
+
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import database_errors, fetch_foreign_keys, pooled_connection, quote_table_name
+from tracing import get_tracer
+from .column_profiler import profile_tables
+from .incremental_profiler import profile_relationships_incremental, profile_tables_incremental
+from .data_model import build_data_model
+from .relationship_profiler import group_foreign_keys, profile_relationships
+
+ROW_COUNT_ESTIMATED = "estimated"
+ROW_COUNT_EXACT = "exact"
+
+# Row counts for every heap (index_id 0) or clustered index (index_id 1) in one set-based query.
+# sys.dm_db_partition_stats needs VIEW DATABASE STATE, sys.partitions only needs metadata visibility.
+PARTITION_STATS_ROW_COUNTS_QUERY = """
+    SELECT s.name AS schema_name, t.name AS table_name, SUM(ps.row_count) AS row_count
+    FROM sys.dm_db_partition_stats ps
+    INNER JOIN sys.tables t ON ps.object_id = t.object_id
+    INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+    WHERE ps.index_id IN (0, 1)
+    GROUP BY s.name, t.name
+"""
+
+PARTITIONS_ROW_COUNTS_QUERY = """
+    SELECT s.name AS schema_name, t.name AS table_name, SUM(p.rows) AS row_count
+    FROM sys.partitions p
+    INNER JOIN sys.tables t ON p.object_id = t.object_id
+    INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+    WHERE p.index_id IN (0, 1)
+    GROUP BY s.name, t.name
+"""
+
+
+def fetch_estimated_row_counts(cursor) -> Dict[str, int]:
+    """
+    Fetches row counts for all tables from catalog metadata in a single query.
+
+    Counts are maintained by SQL Server for every heap/clustered index, so no table is scanned.
+    They are exact after a checkpoint but may lag behind in-flight transactions, hence "estimated".
+    """
+    try:
+        cursor.execute(PARTITION_STATS_ROW_COUNTS_QUERY)
+    except database_errors():
+        cursor.execute(PARTITIONS_ROW_COUNTS_QUERY)
+
+    row_counts: Dict[str, int] = {}
+    table_name_owners: Dict[str, List[str]] = {}
+    for schema, table, row_count in cursor.fetchall():
+        row_counts[f"{schema}.{table}"] = int(row_count)
+        table_name_owners.setdefault(table, []).append(f"{schema}.{table}")
+
+    # Also resolve bare table names when they are unique across schemas
+    for table, qualified_names in table_name_owners.items():
+        if len(qualified_names) == 1 and table not in row_counts:
+            row_counts[table] = row_counts[qualified_names[0]]
+    return row_counts
+
+
+def fetch_exact_row_counts(table_names: List[str], max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Runs SELECT COUNT_BIG(*) for each table in parallel on connections borrowed from the shared pool.
+
+    At most `max_workers` counts run at once, so the pool is never asked for more connections than that.
+    """
+    max_workers = max(1, min(max_workers or Config.ROW_COUNT_WORKERS, len(table_names) or 1))
+
+    def count_rows(table_name: str):
+        try:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(f"SELECT COUNT_BIG(*) FROM {quote_table_name(table_name)}")
+                    return int(cursor.fetchone()[0])
+                finally:
+                    cursor.close()
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(table_names, executor.map(get_tracer().bind(count_rows), table_names)))
+
+
+def add_row_counts(data: Dict[str, Any], exact_counts: bool = False) -> Dict[str, Any]:
+    """Adds row_count and row_count_source (or row_count_error) to every table of the data model."""
+    exact_counts = exact_counts or Config.ROW_COUNT_MODE == ROW_COUNT_EXACT
+
+    tables = [table_info for table_info in data.get("tables", []) if table_info.get("table_name")]
+    estimated_counts: Dict[str, int] = {}
+
+    if not exact_counts:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                estimated_counts = fetch_estimated_row_counts(cursor)
+            finally:
+                cursor.close()
+
+    # Tables missing from catalog metadata (e.g. views) fall back to exact counts
+    exact_table_names = [
+        table_info["table_name"] for table_info in tables
+        if table_info["table_name"] not in estimated_counts
+    ]
+    exact_row_counts = fetch_exact_row_counts(exact_table_names) if exact_table_names else {}
+
+    table_row_counts = {}
+    for table_info in tables:
+        table_name = table_info["table_name"]
+        if table_name in estimated_counts:
+            row_count, source = estimated_counts[table_name], ROW_COUNT_ESTIMATED
+        else:
+            row_count, source = exact_row_counts[table_name], ROW_COUNT_EXACT
+
+        table_row_counts[table_name] = row_count
+        if isinstance(row_count, int):
+            table_info["row_count"] = row_count  # <-- enrich table entry
+            table_info["row_count_source"] = source
+        else:
+            table_info["row_count"] = None
+            table_info["row_count_error"] = row_count
+
+    # Add metadata
+    data["analysis_metadata"] = {
+        "total_tables": len(table_row_counts),
+        "row_count_mode": ROW_COUNT_EXACT if exact_counts else ROW_COUNT_ESTIMATED,
+        "analysis_timestamp": datetime.datetime.now().isoformat()
+    }
+    return data
+
+
+def add_column_profiles(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Adds a profile to every column (profile_error to a failed table) and profile_metadata to every table."""
+    tables = [table_info for table_info in data.get("tables", []) if table_info.get("table_name")]
+
+    # Row counts decide which tables are sampled; reuse them when the input already has them
+    row_counts = {table_info["table_name"]: table_info.get("row_count") for table_info in tables}
+    if any(row_count is None for row_count in row_counts.values()):
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                estimated_counts = fetch_estimated_row_counts(cursor)
+            finally:
+                cursor.close()
+        for table_name, row_count in row_counts.items():
+            if row_count is None:
+                row_counts[table_name] = estimated_counts.get(table_name)
+
+    if Config.PROFILE_INCREMENTAL:
+        table_profiles = profile_tables_incremental(tables, row_counts)
+    else:
+        table_profiles = profile_tables(tables, row_counts)
+
+    for table_info in tables:
+        table_profile = table_profiles[table_info["table_name"]]
+        if "error" in table_profile:
+            table_info["profile_error"] = table_profile["error"]
+            continue
+        for column, column_profile in zip(table_info.get("columns", []), table_profile["columns"]):
+            column["profile"] = column_profile
+        table_info["profile_metadata"] = table_profile["metadata"]
+
+    data.setdefault("analysis_metadata", {})["profile_timestamp"] = datetime.datetime.now().isoformat()
+    return data
+
+
+def add_relationship_profiles(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Adds relationship_profiles, one fan-out profile per foreign key constraint (read from the database if missing)."""
+    foreign_keys = data.get("foreign_keys")
+    if not foreign_keys:
+        data_model = build_data_model({"tables": data.get("tables", [])}, fetch_foreign_keys())
+        foreign_keys = data_model.to_dict()["foreign_keys"]
+
+    relationships = group_foreign_keys(foreign_keys)
+    if Config.PROFILE_INCREMENTAL:
+        profiles = profile_relationships_incremental(relationships)
+    else:
+        profiles = profile_relationships(relationships)
+
+    data["relationship_profiles"] = [
+        {**relationship, **profile} for relationship, profile in zip(relationships, profiles)
+    ]
+    data.setdefault("analysis_metadata", {})["relationship_timestamp"] = datetime.datetime.now().isoformat()
+    return data
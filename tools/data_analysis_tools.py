@@ -3,72 +3,154 @@ Data Analysis Tools
 Tools for analyzing database data distribution and patterns.
 """
 
-import datetime
 from typing import Dict, Any
 from crewai.tools import tool
-import json
-import pyodbc
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
+from db import fetch_foreign_keys
+from tracing import SPAN_TOOL, traced
+from .compact_encoding import encode_output, load_schema_data
+from .data_analysis import (  # Re-exported, the analysis steps used to live here
+    ROW_COUNT_ESTIMATED,
+    ROW_COUNT_EXACT,
+    add_column_profiles,
+    add_relationship_profiles,
+    add_row_counts,
+    fetch_estimated_row_counts,
+    fetch_exact_row_counts,
+)
+from .data_model import build_data_model
+from .fidelity_validator import validate_fidelity
 
 @tool("Analyze Table Row Counts")
-def AnalyzeActualDataDistributionTool(schema_data: str) -> Dict[str, Any]:
+@traced(SPAN_TOOL, "Analyze Table Row Counts")
+def AnalyzeActualDataDistributionTool(schema_data: str, exact_counts: bool = False) -> Dict[str, Any]:
     """
     Analyzes ACTUAL data distribution by querying the database for real row counts of all tables.
-    
+
     IMPORTANT: This tool MUST be used to get actual row counts from the database.
-    It queries the actual database to count rows for each table, providing real data volume
-    information that is critical for understanding database size and capacity.
-    
+    By default it reads the row counts of all tables from SQL Server catalog metadata in a single
+    query (fast, estimated). Set exact_counts to true to run COUNT queries against every table
+    in parallel instead (slow on large databases, exact).
+
     Args:
-        schema_data: JSON string containing the database schema information
-        
+        schema_data: JSON string containing the database schema information (full or compact data model)
+        exact_counts: When true, count rows with COUNT queries instead of catalog metadata
+
     Returns:
         A dictionary containing table row count analysis including:
-        - table_row_counts: Actual row counts for each table
+        - row_count and row_count_source ("estimated" or "exact") for each table
         - total_tables_analyzed: Number of tables analyzed
         - analysis_timestamp: When the analysis was performed
+        The result uses the compact data model format when SCHEMA_ENCODING is "compact".
     """
     try:
-        # Parse the schema data
-        data = json.loads(schema_data) if isinstance(schema_data, str) else schema_data
-        
-        conn = None
-        cursor = None
-        
-        try:
-            conn = pyodbc.connect(Config.get_connection_string())
-            cursor = conn.cursor()
-            
-            table_row_counts = {}
-            for table_info in data.get("tables", []):
-                table_name = table_info.get("table_name")
-                if table_name:
-                    try:
-                        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                        row_count = cursor.fetchone()[0]
-                        table_row_counts[table_name] = row_count
-                        table_info["row_count"] = row_count  # <-- enrich table entry
-                    except Exception as e:
-                        table_row_counts[table_name] = f"Error: {str(e)}"
-                        table_info["row_count"] = None
-
-            # Add metadata
-            data["analysis_metadata"] = {
-                "total_tables": len(table_row_counts),
-                "analysis_timestamp": datetime.datetime.now().isoformat()
-            }
-
-            return data 
-            
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-                
+        # Parse the schema data (full or compact data model)
+        return encode_output(add_row_counts(load_schema_data(schema_data), exact_counts))
+
     except Exception as e:
         return {"error": f"Failed to analyze table row counts: {str(e)}"}
 
+
+@tool("Profile Column Distributions")
+@traced(SPAN_TOOL, "Profile Column Distributions")
+def ProfileColumnDistributionTool(schema_data: str) -> Dict[str, Any]:
+    """
+    Profiles the ACTUAL value distribution of every column of every table in the database.
+
+    IMPORTANT: Use this tool after AnalyzeActualDataDistributionTool, passing its JSON output,
+    so row counts are known and large tables are profiled on a sample.
+    Each table is profiled with a fixed number of aggregate queries, and tables are profiled in parallel.
+    Tables that have not changed since their stored profile are not scanned again.
+    With PROFILE_METHOD "sketch" the profiles are estimated from mergeable sketches of streamed rows instead,
+    with PROFILE_METHOD "extract" they are computed from local Arrow extracts that are refreshed only when a table changed.
+
+    Args:
+        schema_data: JSON string containing the database schema information, full or compact (optionally with row counts)
+
+    Returns:
+        The same data model where every tables[].columns[] entry has a "profile" with:
+        - null_count, null_fraction, distinct_count, min, max
+        - histogram: equi-depth buckets for numeric and date columns
+        - top_values: most frequent values for categorical columns
+        - min_length, max_length, avg_length, length_histogram: for string columns
+        and every table has a "profile_metadata" with scanned_rows, sampled and elapsed_seconds
+        (plus "incremental": rescanned, reason, profiled_at when PROFILE_INCREMENTAL is on,
+        method, chunks, pages, reused_rows with PROFILE_METHOD "sketch",
+        and method, refreshed, reason, extracted_at with PROFILE_METHOD "extract").
+        The result uses the compact data model format when SCHEMA_ENCODING is "compact".
+    """
+    try:
+        return encode_output(add_column_profiles(load_schema_data(schema_data)))
+
+    except Exception as e:
+        return {"error": f"Failed to profile column distributions: {str(e)}"}
+
+
+@tool("Analyze Relationship Cardinality")
+@traced(SPAN_TOOL, "Analyze Relationship Cardinality")
+def AnalyzeRelationshipCardinalityTool(schema_data: str) -> Dict[str, Any]:
+    """
+    Analyzes the ACTUAL fan-out of every foreign key relationship: how many child rows each referenced key has.
+
+    IMPORTANT: Use this tool to understand how data is distributed across relationships
+    (e.g. how many movies have no reviews and how many reviews the most reviewed movies have).
+    Each relationship is measured with one grouped query on the server; only a compact histogram is returned.
+
+    Args:
+        schema_data: JSON string containing the database schema information including foreign_keys, full or compact
+
+    Returns:
+        The same data model with a "relationship_profiles" list, one entry per foreign key constraint with:
+        - referenced_keys, zero_degree_keys, zero_degree_fraction: referenced rows without any child rows
+        - linked_child_rows, mean_degree, max_degree
+        - orphan_keys, orphan_child_rows: child rows pointing at keys that do not exist
+        - null_key_child_rows: child rows with a NULL foreign key
+        - degree_histogram: log2 buckets of child rows per referenced key
+        - incremental: rescanned, reason, profiled_at when PROFILE_INCREMENTAL is on
+        The result uses the compact data model format when SCHEMA_ENCODING is "compact".
+    """
+    try:
+        return encode_output(add_relationship_profiles(load_schema_data(schema_data)))
+
+    except Exception as e:
+        return {"error": f"Failed to analyze relationship cardinality: {str(e)}"}
+
+
+@tool("Validate Synthetic Data Fidelity")
+@traced(SPAN_TOOL, "Validate Synthetic Data Fidelity")
+def ValidateSyntheticDataTool(schema_data: str, synthetic_database: str = "") -> Dict[str, Any]:
+    """
+    Checks how closely a synthetic database reproduces the distributions of the source database.
+
+    IMPORTANT: Use this tool after synthetic data has been generated, passing the data model of the source.
+    Every table and foreign key is aggregated on the server in both databases at the same time; only
+    compact histograms are compared, so no rows are exported.
+
+    Args:
+        schema_data: JSON string containing the database schema information including foreign_keys, full or compact
+        synthetic_database: Name of the synthetic database (defaults to VALIDATION_SYNTHETIC_DB)
+
+    Returns:
+        A pass/fail report with:
+        - passed, checks, failed_checks, errors
+        - tables: source_rows, synthetic_rows, row_ratio and per-column checks (null_fraction,
+          ks for numbers and dates, chi_square for categorical values, length_ks for free text)
+        - relationships: degree_ks by referenced keys and by child rows, with mean degree and
+          zero_degree_fraction on both sides
+        - timings: aggregate, histogram, distance and total seconds
+    """
+    try:
+        synthetic_database = synthetic_database or Config.VALIDATION_SYNTHETIC_DB
+        if not synthetic_database:
+            return {"error": "Failed to validate synthetic data: no synthetic database given (set VALIDATION_SYNTHETIC_DB)"}
+
+        data = load_schema_data(schema_data)
+        if not data.get("foreign_keys"):
+            data["foreign_keys"] = build_data_model({"tables": data.get("tables", [])}, fetch_foreign_keys()).to_dict()["foreign_keys"]
+        return validate_fidelity(data, synthetic_database)
+
+    except Exception as e:
+        return {"error": f"Failed to validate synthetic data: {str(e)}"}
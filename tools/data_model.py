@@ -0,0 +1,119 @@
+"""
+Data Model Builder
+Deterministic, LLM-free construction of the JSON data model produced by the schema analysis agent.
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List
+
+
+@dataclass
+class ColumnModel:
+    column_name: str
+    data_type: str
+    is_nullable: bool
+
+
+@dataclass
+class TableModel:
+    table_name: str  # format: 'schema.table'
+    columns: List[ColumnModel] = field(default_factory=list)
+
+
+@dataclass
+class ForeignKeyModel:
+    constraint_name: str
+    parent_table: str  # format: 'schema.table'
+    parent_column: str
+    referenced_table: str  # format: 'schema.table'
+    referenced_column: str
+
+
+@dataclass
+class DataModel:
+    database_name: str
+    tables: List[TableModel] = field(default_factory=list)
+    foreign_keys: List[ForeignKeyModel] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DataModel":
+        return cls(
+            database_name=data.get("database_name"),
+            tables=[
+                TableModel(
+                    table_name=table["table_name"],
+                    columns=[
+                        ColumnModel(
+                            column_name=column["column_name"],
+                            data_type=column["data_type"],
+                            is_nullable=bool(column["is_nullable"]),
+                        )
+                        for column in table.get("columns", [])
+                    ],
+                )
+                for table in data.get("tables", [])
+            ],
+            foreign_keys=[
+                ForeignKeyModel(
+                    constraint_name=fk["constraint_name"],
+                    parent_table=fk["parent_table"],
+                    parent_column=fk["parent_column"],
+                    referenced_table=fk["referenced_table"],
+                    referenced_column=fk["referenced_column"],
+                )
+                for fk in data.get("foreign_keys", [])
+            ],
+        )
+
+
+def _resolve_table_name(schema: str, table: str, bare_name_map: Dict[str, List[str]]) -> str:
+    """Resolves a foreign key table to the 'schema.table' form used by GetSchemaInfoTool."""
+    if schema:
+        return f"{schema}.{table}"
+    candidates = bare_name_map.get(table, [])
+    return candidates[0] if len(candidates) == 1 else table
+
+
+def build_data_model(schema_info: Dict[str, Any], foreign_keys: List[Dict[str, str]]) -> DataModel:
+    """
+    Merges the outputs of GetSchemaInfoTool and GetForeignKeysTool into the data model
+    the schema analysis agent is instructed to produce.
+
+    Raises:
+        ValueError: if either input is an error result from the tools.
+    """
+    if "error" in schema_info:
+        raise ValueError(schema_info["error"])
+    fk_errors = [fk["error"] for fk in foreign_keys if "error" in fk]
+    if fk_errors:
+        raise ValueError(fk_errors[0])
+
+    tables = DataModel.from_dict({"tables": schema_info.get("tables", [])}).tables
+
+    bare_name_map: Dict[str, List[str]] = {}
+    for table in tables:
+        bare_name_map.setdefault(table.table_name.split(".", 1)[-1], []).append(table.table_name)
+
+    data_model_fks = [
+        ForeignKeyModel(
+            constraint_name=fk["constraint_name"],
+            parent_table=_resolve_table_name(fk.get("parent_schema"), fk["parent_table"], bare_name_map),
+            parent_column=fk["parent_column"],
+            referenced_table=_resolve_table_name(fk.get("referenced_schema"), fk["referenced_table"], bare_name_map),
+            referenced_column=fk["referenced_column"],
+        )
+        for fk in foreign_keys
+    ]
+
+    return DataModel(
+        database_name=schema_info.get("database_name"),
+        tables=tables,
+        foreign_keys=data_model_fks,
+    )
@@ -0,0 +1,515 @@
+"""
+Extract Cache
+Keeps a local, memory-mappable columnar copy of every analyzed table, so repeated profiling and
+sampling read local disk instead of the production server.
+
+Tables are streamed with keyset pagination (SELECT TOP (page) ... WHERE key > ? ORDER BY key) and
+fetched EXTRACT_ARRAYSIZE rows per round trip; every fetch becomes one Arrow record batch appended
+to an uncompressed Arrow IPC file, so memory stays flat and the file can be memory-mapped. Tables
+above EXTRACT_MAX_ROWS are extracted from a TABLESAMPLE ... REPEATABLE of that size.
+
+A manifest keeps the change marker of every extract (see tools.incremental_profiler); an extract is
+refreshed when its table was written to at all since (usage stats, change tracking or row count), its
+columns or sample size changed, or it is older than EXTRACT_MAX_AGE_HOURS. Without usage stats or change
+tracking, an in-place UPDATE that keeps the row count is only picked up by the age limit. Column profiles (PROFILE_METHOD=extract) and foreign key fan-out are then
+computed with pyarrow.compute and NumPy over the memory-mapped columns, without copying them.
+"""
+
+import datetime
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import sys
+import os
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import JsonStore, fetch_primary_key, pooled_connection, quote_identifier, quote_table_name, store_name
+from tools.column_profiler import (
+    BOOLEAN_TYPES,
+    COMPARABLE_TYPES,
+    DATE_EPOCH,
+    DATE_TYPES,
+    NUMERIC_TYPES,
+    STRING_TYPES,
+    ProfileSettings,
+    _base_type,
+    _histogram_bound,
+    to_json_value,
+)
+from tools.incremental_profiler import columns_signature, fetch_change_markers, table_change_reason
+from tools.relationship_profiler import KEY_KIND_NULL, KEY_KIND_ORPHAN, KEY_KIND_REFERENCED, summarize_fan_out
+from tracing import get_tracer
+
+# SQL Server type -> Arrow type of the extracted column; types not listed only keep whether the value is NULL
+ARROW_TYPES = {
+    "tinyint": pa.uint8(),
+    "smallint": pa.int16(),
+    "int": pa.int32(),
+    "bigint": pa.int64(),
+    "real": pa.float32(),
+    "float": pa.float64(),
+    "decimal": pa.float64(),
+    "numeric": pa.float64(),
+    "money": pa.float64(),
+    "smallmoney": pa.float64(),
+    "bit": pa.bool_(),
+    "date": pa.date32(),
+    "datetime": pa.timestamp("us"),
+    "datetime2": pa.timestamp("us"),
+    "smalldatetime": pa.timestamp("us"),
+    "datetimeoffset": pa.timestamp("us", tz="UTC"),  # Selected as UTC DATETIME2, see _select_expression
+    "time": pa.time64("us"),
+    "char": pa.string(),
+    "varchar": pa.string(),
+    "nchar": pa.string(),
+    "nvarchar": pa.string(),
+    "text": pa.string(),
+    "ntext": pa.string(),
+    "uniqueidentifier": pa.string(),
+    "binary": pa.binary(),
+    "varbinary": pa.binary(),
+    "image": pa.binary(),
+}
+DECIMAL_TYPES = {"decimal", "numeric", "money", "smallmoney"}
+PRESENCE_TYPE = pa.int8()  # 1 for a non-NULL value of a type without an Arrow mapping
+
+# Days from DATE_EPOCH (the histogram origin of the other profilers) to the Unix epoch of Arrow dates
+EPOCH_OFFSET_DAYS = (datetime.datetime(1970, 1, 1) - DATE_EPOCH).days
+
+
+@dataclass
+class ExtractSettings:
+    max_rows: int = 1_000_000  # Larger tables are extracted from a sample of this size; 0 = always a full copy
+    page_rows: int = 100_000  # Rows per keyset page
+    arraysize: int = 10_000  # Rows per fetch round trip and per record batch
+    workers: int = 4  # Tables extracted concurrently
+    max_age_hours: float = 168  # Older extracts are refreshed; 0 = never
+    sample_seed: int = 42
+    query_timeout_seconds: int = 0
+
+    @classmethod
+    def from_config(cls) -> "ExtractSettings":
+        return cls(
+            max_rows=Config.EXTRACT_MAX_ROWS,
+            page_rows=Config.EXTRACT_PAGE_ROWS,
+            arraysize=Config.EXTRACT_ARRAYSIZE,
+            workers=Config.EXTRACT_WORKERS,
+            max_age_hours=Config.EXTRACT_MAX_AGE_HOURS,
+            sample_seed=Config.PROFILE_SAMPLE_SEED,
+            query_timeout_seconds=Config.PROFILE_QUERY_TIMEOUT_SECONDS,
+        )
+
+
+def arrow_type(data_type: str) -> pa.DataType:
+    return ARROW_TYPES.get(_base_type(data_type), PRESENCE_TYPE)
+
+
+def _select_expression(column: Dict[str, Any]) -> str:
+    name = quote_identifier(column["column_name"])
+    base_type = _base_type(column["data_type"])
+    if base_type == "datetimeoffset":
+        return f"CAST(SWITCHOFFSET({name}, '+00:00') AS DATETIME2)"  # pyodbc has no datetimeoffset type
+    if base_type in ARROW_TYPES:
+        return name
+    return f"CASE WHEN {name} IS NULL THEN NULL ELSE 1 END"  # xml, geography, sql_variant, ...: skip the payload
+
+
+def _to_arrow(values: List[Any], data_type: str) -> pa.Array:
+    """Converts one fetched column to Arrow; decimals become floats and ISO strings (the stand-in) are parsed."""
+    base_type = _base_type(data_type)
+    target = arrow_type(data_type)
+    if base_type in DECIMAL_TYPES:
+        values = [None if value is None else float(value) for value in values]
+    elif pa.types.is_temporal(target):
+        parse = {"date": datetime.date, "time": datetime.time}.get(base_type, datetime.datetime).fromisoformat
+        values = [parse(value) if isinstance(value, str) else value for value in values]
+        if base_type == "date":
+            values = [value.date() if isinstance(value, datetime.datetime) else value for value in values]
+    return pa.array(values, type=target)
+
+
+def _schema(columns: List[Dict[str, Any]]) -> pa.Schema:
+    return pa.schema([pa.field(column["column_name"], arrow_type(column["data_type"])) for column in columns])
+
+
+def _record_batch(rows, columns: List[Dict[str, Any]], schema: pa.Schema, offset: int) -> pa.RecordBatch:
+    arrays = [
+        _to_arrow([row[index + offset] for row in rows], column["data_type"])
+        for index, column in enumerate(columns)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def extract_table(table_info: Dict[str, Any], row_count: Optional[int], path: str, settings: ExtractSettings) -> Dict[str, Any]:
+    """Streams one table into an Arrow IPC file at path (written atomically) and returns its manifest entry."""
+    started = time.monotonic()
+    table_name = table_info["table_name"]
+    columns = table_info.get("columns", [])
+    schema = _schema(columns)
+    sampled = bool(settings.max_rows) and row_count is not None and row_count > settings.max_rows
+    source = quote_table_name(table_name)
+    if sampled:
+        source += f" TABLESAMPLE ({int(settings.max_rows)} ROWS) REPEATABLE ({int(settings.sample_seed)})"
+    select_list = ", ".join(_select_expression(column) for column in columns)
+    key_columns = fetch_primary_key(table_name)
+    key = quote_identifier(key_columns[0]["column_name"]) if len(key_columns) == 1 else None
+
+    rows_written = pages = batches = 0
+    tmp_path = f"{path}.tmp"
+    with pooled_connection() as conn:
+        previous_timeout = getattr(conn, "timeout", 0)
+        conn.timeout = settings.query_timeout_seconds
+        cursor = conn.cursor()
+        cursor.arraysize = settings.arraysize
+        try:
+            with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                if key is None:
+                    # Heap or composite key: one plain streamed scan
+                    cursor.execute(f"SELECT {select_list} FROM {source}")
+                    pages = 1
+                    while True:
+                        rows = cursor.fetchmany()
+                        if not rows:
+                            break
+                        writer.write_batch(_record_batch(rows, columns, schema, 0))
+                        rows_written += len(rows)
+                        batches += 1
+                else:
+                    first_page = f"SELECT TOP ({int(settings.page_rows)}) {key}, {select_list} FROM {source} ORDER BY {key}"
+                    next_page = f"SELECT TOP ({int(settings.page_rows)}) {key}, {select_list} FROM {source} WHERE {key} > ? ORDER BY {key}"
+                    last_key = None
+                    while True:
+                        if last_key is None:
+                            cursor.execute(first_page)
+                        else:
+                            cursor.execute(next_page, last_key)
+                        page_rows = 0
+                        while True:
+                            rows = cursor.fetchmany()
+                            if not rows:
+                                break
+                            writer.write_batch(_record_batch(rows, columns, schema, 1))
+                            page_rows += len(rows)
+                            batches += 1
+                            last_key = rows[-1][0]
+                        rows_written += page_rows
+                        pages += 1
+                        if page_rows < settings.page_rows:
+                            break
+            os.replace(tmp_path, path)
+        finally:
+            cursor.close()
+            conn.timeout = previous_timeout
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    return {
+        "file": os.path.basename(path),
+        "rows": rows_written,
+        "sampled": sampled,
+        "key": key_columns[0]["column_name"] if key else None,
+        "pages": pages,
+        "batches": batches,
+        "bytes": os.path.getsize(path),
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+class ExtractCache:
+    """The Arrow IPC extracts and their manifest for one server/database, under EXTRACT_CACHE_DIR."""
+
+    def __init__(self, cache_dir: Optional[str] = None, settings: Optional[ExtractSettings] = None):
+        self.cache_dir = cache_dir or Config.EXTRACT_CACHE_DIR
+        self.settings = settings or ExtractSettings.from_config()
+        self._manifest = JsonStore(lambda: os.path.join(self.directory(), "manifest.json"))
+
+    def directory(self) -> str:
+        return os.path.join(self.cache_dir, store_name())
+
+    def table_path(self, table_name: str) -> str:
+        return os.path.join(self.directory(), re.sub(r"[^A-Za-z0-9_.-]", "_", table_name) + ".arrow")
+
+    def load(self) -> Dict[str, Any]:
+        return self._manifest.load()
+
+    def update(self, entries: Dict[str, Any]):
+        """Replaces the given tables' manifest entries and writes the manifest atomically; other tables are kept."""
+        self._manifest.update("tables", entries)
+
+    def _sample_signature(self) -> Dict[str, Any]:
+        return {"max_rows": self.settings.max_rows, "sample_seed": self.settings.sample_seed}
+
+    def refresh(self, tables: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Brings the extracts of the given tables up to date and returns their manifest entries, each with
+        "refreshed" and "reason" (None when the stored extract was reused).
+        """
+        stored = self.load().get("tables", {})
+        now = datetime.datetime.now()
+        reasons: Dict[str, Optional[str]] = {}
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                markers = fetch_change_markers(cursor)  # Read before extracting, so changes during the extract count next time
+                for table_info in tables:
+                    table_name = table_info["table_name"]
+                    entry = stored.get(table_name)
+                    if entry is None:
+                        reasons[table_name] = "new"
+                    elif not os.path.exists(self.table_path(table_name)):
+                        reasons[table_name] = "missing_file"
+                    elif entry.get("columns_signature") != columns_signature(table_info.get("columns", [])):
+                        reasons[table_name] = "schema_changed"
+                    elif entry.get("sample") != self._sample_signature():
+                        reasons[table_name] = "settings_changed"
+                    elif self.settings.max_age_hours > 0 and \
+                            (now - datetime.datetime.fromisoformat(entry["extracted_at"])).total_seconds() > self.settings.max_age_hours * 3600:
+                        reasons[table_name] = "max_age"
+                    else:
+                        # Any change at all invalidates the copy, including an in-place UPDATE seen only in the usage stats
+                        reasons[table_name] = table_change_reason(cursor, table_name, entry["marker"], markers.get(table_name), 0.0, strict=True)
+            finally:
+                cursor.close()
+
+        to_extract = [table_info for table_info in tables if reasons[table_info["table_name"]]]
+        os.makedirs(self.directory(), exist_ok=True)
+        extracted_at = now.isoformat()
+        results, updates = {}, {}
+        if to_extract:
+            def run(table_info: Dict[str, Any]):
+                table_name = table_info["table_name"]
+                try:
+                    row_count = (markers.get(table_name) or {}).get("row_count")
+                    return extract_table(table_info, row_count, self.table_path(table_name), self.settings)
+                except Exception as e:
+                    return {"error": f"Failed to extract {table_name}: {str(e)}"}
+
+            with ThreadPoolExecutor(max_workers=max(1, min(self.settings.workers, len(to_extract)))) as executor:
+                extracted = list(executor.map(get_tracer().bind(run), to_extract))
+            for table_info, entry in zip(to_extract, extracted):
+                table_name = table_info["table_name"]
+                if "error" in entry:
+                    results[table_name] = entry
+                    continue
+                updates[table_name] = {
+                    **entry,
+                    "marker": markers.get(table_name, {}),
+                    "columns_signature": columns_signature(table_info.get("columns", [])),
+                    "sample": self._sample_signature(),
+                    "extracted_at": extracted_at,
+                }
+        if updates:
+            self.update(updates)
+
+        for table_info in tables:
+            table_name = table_info["table_name"]
+            if table_name in results:
+                continue
+            entry = updates.get(table_name) or stored[table_name]
+            results[table_name] = {**entry, "refreshed": table_name in updates, "reason": reasons[table_name]}
+        return results
+
+    def read_table(self, table_name: str) -> pa.Table:
+        """Memory-maps a table's extract; columns are views on the mapped file, nothing is read up front."""
+        with pa.memory_map(self.table_path(table_name), "r") as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def column(self, table_name: str, column_name: str) -> pa.ChunkedArray:
+        return self.read_table(table_name).column(column_name)
+
+
+# ============================================================================
+# Profiles from extracts
+# ============================================================================
+
+def _histogram_values(column: pa.ChunkedArray, base_type: str) -> np.ndarray:
+    """Non-null values as float64 on the same scale as the server-side histograms (dates: days since DATE_EPOCH)."""
+    values = column.drop_null()
+    if pa.types.is_date32(values.type):
+        return pc.cast(values, pa.int32()).to_numpy().astype(np.float64) + EPOCH_OFFSET_DAYS
+    if pa.types.is_timestamp(values.type):
+        return pc.cast(values, pa.int64()).to_numpy() / 86_400_000_000 + EPOCH_OFFSET_DAYS
+    return pc.cast(values, pa.float64()).to_numpy()
+
+
+def _equi_depth(values: np.ndarray, buckets: int):
+    """(lower, upper, count) per bucket of the sorted values, split like NTILE(buckets)."""
+    if len(values) == 0:
+        return []
+    ordered = np.sort(values)
+    return [(part[0], part[-1], len(part)) for part in np.array_split(ordered, min(buckets, len(ordered)))]
+
+
+def _top_value_text(value: Any) -> Any:
+    # Same text as the CAST(... AS NVARCHAR(400)) of the aggregate profiler
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(to_json_value(value))
+
+
+def profile_column(column: pa.ChunkedArray, data_type: str, settings: ProfileSettings) -> Dict[str, Any]:
+    """One column profile with the same fields as the aggregate profiler, computed from an extracted column."""
+    base_type = _base_type(data_type)
+    rows = len(column)
+    profile: Dict[str, Any] = {
+        "null_count": column.null_count,
+        "null_fraction": round(column.null_count / rows, 6) if rows else 0.0,
+    }
+    if base_type not in COMPARABLE_TYPES or column.type == PRESENCE_TYPE:
+        return profile  # Only whether values are NULL was extracted
+
+    profile["distinct_count"] = pc.count_distinct(column).as_py()
+    if base_type != "uniqueidentifier":
+        extremes = pc.min_max(column)
+        low, high = extremes["min"].as_py(), extremes["max"].as_py()
+        if base_type in BOOLEAN_TYPES:
+            low, high = (None if value is None else int(value) for value in (low, high))
+        profile["min"], profile["max"] = to_json_value(low), to_json_value(high)
+
+    if base_type in STRING_TYPES:
+        lengths = pc.utf8_length(column).drop_null().to_numpy()
+        profile["min_length"] = int(lengths.min()) if len(lengths) else None
+        profile["max_length"] = int(lengths.max()) if len(lengths) else None
+        profile["avg_length"] = float(lengths.mean()) if len(lengths) else None
+        profile["length_histogram"] = [
+            {"lower": int(lower), "upper": int(upper), "count": count}
+            for lower, upper, count in _equi_depth(lengths, settings.histogram_buckets)
+        ]
+    elif base_type in NUMERIC_TYPES or base_type in DATE_TYPES:
+        profile["histogram"] = [
+            {"lower": _histogram_bound(lower, base_type), "upper": _histogram_bound(upper, base_type), "count": count}
+            for lower, upper, count in _equi_depth(_histogram_values(column, base_type), settings.histogram_buckets)
+        ]
+
+    if base_type in BOOLEAN_TYPES or 0 < profile["distinct_count"] <= settings.categorical_max_distinct:
+        counts = pc.value_counts(column.drop_null())
+        values = [_top_value_text(value) for value in counts.field("values").to_pylist()]
+        frequencies = counts.field("counts").to_numpy()
+        order = sorted(range(len(values)), key=lambda i: (-frequencies[i], values[i]))[:settings.top_k]
+        profile["top_values"] = [{"value": values[i], "count": int(frequencies[i])} for i in order]
+    return profile
+
+
+def profile_tables_extracted(tables: List[Dict[str, Any]], row_counts: Dict[str, Optional[int]],
+                             settings: Optional[ProfileSettings] = None, cache: Optional[ExtractCache] = None,
+                             max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Same result shape as profile_tables, computed from the local extracts (refreshed first where stale).
+
+    Every table's metadata adds method "extract", refreshed, reason, extracted_at and extract_seconds.
+    row_counts is not needed (the extract decides sampling) and only kept for the common signature.
+    """
+    settings = settings or ProfileSettings.from_config()
+    cache = cache or ExtractCache()
+    max_workers = max(1, min(max_workers or Config.PROFILE_WORKERS, len(tables) or 1))
+    entries = cache.refresh(tables)
+
+    def run(table_info: Dict[str, Any]):
+        table_name = table_info["table_name"]
+        entry = entries[table_name]
+        if "error" in entry:
+            return entry
+        try:
+            started = time.monotonic()
+            table = cache.read_table(table_name)
+            columns = table_info.get("columns", [])
+            return {
+                "columns": [profile_column(table.column(column["column_name"]), column["data_type"], settings) for column in columns],
+                "metadata": {
+                    "scanned_rows": table.num_rows,
+                    "sampled": entry["sampled"],
+                    "elapsed_seconds": round(time.monotonic() - started, 3),
+                    "method": "extract",
+                    "refreshed": entry["refreshed"],
+                    "reason": entry["reason"],
+                    "extracted_at": entry["extracted_at"],
+                    "extract_seconds": entry["seconds"] if entry["refreshed"] else 0.0,
+                },
+            }
+        except Exception as e:
+            return {"error": f"Failed to profile {table_name}: {str(e)}"}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip((t["table_name"] for t in tables), executor.map(get_tracer().bind(run), tables)))
+
+
+def _key_values(column: pa.ChunkedArray) -> np.ndarray:
+    return column.drop_null().to_numpy(zero_copy_only=False)
+
+
+def fan_out_from_extract(child: pa.ChunkedArray, referenced: pa.ChunkedArray) -> Dict[str, Any]:
+    """
+    The fan-out profile of a single-column foreign key from its extracted child and referenced columns:
+    the same (key_kind, bucket, ...) rows as the server-side query, computed with NumPy.
+    """
+    referenced_keys = np.unique(_key_values(referenced))
+    child_keys, degrees = np.unique(_key_values(child), return_counts=True)
+    present = np.isin(child_keys, referenced_keys)
+    referenced_degrees = np.zeros(len(referenced_keys), dtype=np.int64)
+    referenced_degrees[np.searchsorted(referenced_keys, child_keys[present])] = degrees[present]
+
+    rows = []
+    for key_kind, kind_degrees in ((KEY_KIND_REFERENCED, referenced_degrees), (KEY_KIND_ORPHAN, degrees[~present])):
+        if len(kind_degrees) == 0:
+            continue
+        buckets = np.where(kind_degrees == 0, 0, np.floor(np.log2(np.maximum(kind_degrees, 1)) + 1e-9).astype(np.int64) + 1)
+        for bucket in np.unique(buckets):
+            in_bucket = kind_degrees[buckets == bucket]
+            rows.append((key_kind, int(bucket), len(in_bucket), int(in_bucket.sum()), int(in_bucket.min()), int(in_bucket.max())))
+    if child.null_count:
+        rows.append((KEY_KIND_NULL, 0, 1, child.null_count, child.null_count, child.null_count))
+    return summarize_fan_out(rows)
+
+
+def profile_relationships_extracted(relationships: List[Dict[str, Any]], cache: Optional[ExtractCache] = None,
+                                    max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Same result as profile_relationships. Single-column foreign keys whose two tables have a current,
+    complete (not sampled) extract are measured locally, the others with the server-side query.
+    """
+    from tools.relationship_profiler import profile_relationships  # That module dispatches here
+
+    cache = cache or ExtractCache()
+    stored = cache.load().get("tables", {})
+    involved = sorted({name for r in relationships for name in (r["parent_table"], r["referenced_table"]) if name in stored})
+    current = set()
+    if involved:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                markers = fetch_change_markers(cursor)
+                current = {
+                    name for name in involved
+                    if not stored[name]["sampled"] and os.path.exists(cache.table_path(name))
+                    and table_change_reason(cursor, name, stored[name]["marker"], markers.get(name), 0.0, strict=True) is None
+                }
+            finally:
+                cursor.close()
+
+    local = [
+        index for index, r in enumerate(relationships)
+        if len(r["parent_columns"]) == 1 and r["parent_table"] in current and r["referenced_table"] in current
+    ]
+    remote = sorted(set(range(len(relationships))) - set(local))
+    results: List[Optional[Dict[str, Any]]] = [None] * len(relationships)
+    for index, profile in zip(remote, profile_relationships([relationships[i] for i in remote], max_workers, use_extracts=False) if remote else []):
+        results[index] = profile
+    for index in local:
+        relationship = relationships[index]
+        started = time.monotonic()
+        try:
+            profile = fan_out_from_extract(
+                cache.column(relationship["parent_table"], relationship["parent_columns"][0]),
+                cache.column(relationship["referenced_table"], relationship["referenced_columns"][0]),
+            )
+            profile["elapsed_seconds"] = round(time.monotonic() - started, 3)
+            profile["method"] = "extract"
+        except Exception as e:
+            profile = {"error": f"Failed to profile {relationship['constraint_name']}: {str(e)}"}
+        results[index] = profile
+    return results
@@ -0,0 +1,552 @@
+"""
+Fidelity Validator
+Compares a synthetic database with its source, table by table and foreign key by foreign key,
+without exporting rows.
+
+Every comparison is pushed down to the server, in two rounds of queries that run concurrently
+on both databases:
+1) one aggregate scan per table for row and null counts, distinct counts of string columns and
+   the value range of every numeric, date and string-length series, plus one grouped query per
+   foreign key for its exact degree distribution (referenced keys per child row count),
+2) one scan per table that buckets every series into fixed-width bins shared by both databases,
+   and one scan that returns the value frequencies of categorical columns.
+Only these compact histograms come back; the distances between them (binned Kolmogorov-Smirnov,
+chi-square distance, degree distribution KS) are computed with vectorized NumPy.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import pooled_connection, quote_identifier, quote_table_name
+from db.catalog import PRIMARY_KEY_QUERY
+from tracing import get_tracer
+from .column_profiler import (
+    BOOLEAN_TYPES,
+    DATE_TYPES,
+    NUMERIC_TYPES,
+    STRING_TYPES,
+    _base_type,
+    _histogram_value_expression,
+    build_top_values_query
+)
+from .relationship_profiler import group_foreign_keys
+
+# How a column is compared
+KIND_SERIES = "series"  # Numeric and date values: KS distance of binned values
+KIND_CATEGORICAL = "categorical"  # Booleans and low-cardinality strings: chi-square distance of value frequencies
+KIND_TEXT = "text"  # High-cardinality strings: KS distance of binned lengths
+KIND_KEY = "key"  # Primary and foreign key columns: covered by the degree checks
+KIND_OTHER = "other"  # Everything else: null fraction only
+
+METRIC_KS = "ks"
+METRIC_LENGTH_KS = "length_ks"
+METRIC_CHI_SQUARE = "chi_square"
+METRIC_NULL_FRACTION = "null_fraction"
+METRIC_DEGREE_KS = "degree_ks"
+
+SIDE_SOURCE = "source"
+SIDE_SYNTHETIC = "synthetic"
+
+
+@dataclass
+class ValidationSettings:
+    bins: int = 50
+    max_categories: int = 1000  # Strings with more distinct values (in the source), or mostly unique ones, are compared by length
+    ks_threshold: float = 0.1
+    chi_square_threshold: float = 0.05
+    degree_threshold: float = 0.1
+    null_fraction_threshold: float = 0.05
+    workers: int = 8
+    query_timeout_seconds: int = 300  # Per-query budget, 0 means no timeout
+
+    @classmethod
+    def from_config(cls) -> "ValidationSettings":
+        return cls(
+            bins=Config.VALIDATION_BINS,
+            max_categories=Config.VALIDATION_MAX_CATEGORIES,
+            ks_threshold=Config.VALIDATION_KS_THRESHOLD,
+            chi_square_threshold=Config.VALIDATION_CHI_SQUARE_THRESHOLD,
+            degree_threshold=Config.VALIDATION_DEGREE_THRESHOLD,
+            null_fraction_threshold=Config.VALIDATION_NULL_FRACTION_THRESHOLD,
+            workers=Config.VALIDATION_WORKERS,
+            query_timeout_seconds=Config.VALIDATION_QUERY_TIMEOUT_SECONDS,
+        )
+
+
+# ============================================================================
+# Distances (vectorized over rows: one row per series, column or relationship)
+# ============================================================================
+
+def _normalize(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    totals = counts.sum(axis=1)
+    shares = np.divide(counts, totals[:, None], out=np.zeros(counts.shape, dtype=np.float64), where=totals[:, None] > 0)
+    return shares, totals
+
+
+def ks_distance(source: np.ndarray, synthetic: np.ndarray) -> np.ndarray:
+    """
+    Kolmogorov-Smirnov distance per row of two (rows, bins) count matrices with shared, ordered bins:
+    the largest gap between the two cumulative distributions. 1.0 when only one side has values.
+    """
+    source_shares, source_totals = _normalize(source)
+    synthetic_shares, synthetic_totals = _normalize(synthetic)
+    distances = np.abs(np.cumsum(source_shares, axis=1) - np.cumsum(synthetic_shares, axis=1)).max(axis=1, initial=0.0)
+    distances[(source_totals > 0) != (synthetic_totals > 0)] = 1.0
+    return distances
+
+
+def chi_square_distance(source: np.ndarray, synthetic: np.ndarray) -> np.ndarray:
+    """
+    Chi-square distance per row of two (rows, categories) count matrices: 0.5 * sum((p - q)^2 / (p + q))
+    over the category shares, 0 for identical and 1 for disjoint distributions.
+    """
+    source_shares, source_totals = _normalize(source)
+    synthetic_shares, synthetic_totals = _normalize(synthetic)
+    total_shares = source_shares + synthetic_shares
+    terms = np.divide((source_shares - synthetic_shares) ** 2, total_shares,
+                      out=np.zeros(total_shares.shape, dtype=np.float64), where=total_shares > 0)
+    distances = 0.5 * terms.sum(axis=1)
+    distances[(source_totals > 0) != (synthetic_totals > 0)] = 1.0
+    return distances
+
+
+def degree_distances(source: Dict[int, int], synthetic: Dict[int, int]) -> Tuple[float, float]:
+    """
+    KS distances of two degree distributions ({degree: referenced keys}) on their combined support:
+    over referenced keys (how many keys have how many children, including none) and over child rows
+    (how concentrated the child rows are on high-degree keys).
+    """
+    source_degrees = np.fromiter(source.keys(), dtype=np.int64, count=len(source))
+    synthetic_degrees = np.fromiter(synthetic.keys(), dtype=np.int64, count=len(synthetic))
+    degrees = np.union1d(source_degrees, synthetic_degrees)
+    counts = np.zeros((2, len(degrees)), dtype=np.float64)
+    counts[0, np.searchsorted(degrees, source_degrees)] = np.fromiter(source.values(), dtype=np.float64, count=len(source))
+    counts[1, np.searchsorted(degrees, synthetic_degrees)] = np.fromiter(synthetic.values(), dtype=np.float64, count=len(synthetic))
+    keys, rows = ks_distance(
+        np.vstack([counts[0], counts[0] * degrees]),
+        np.vstack([counts[1], counts[1] * degrees]),
+    )
+    return float(keys), float(rows)
+
+
+# ============================================================================
+# Pushed-down queries
+# ============================================================================
+
+def _series_expression(column: Dict[str, Any], kind: str) -> str:
+    name = quote_identifier(column["column_name"])
+    if kind == KIND_SERIES:
+        return _histogram_value_expression(name, _base_type(column["data_type"]))
+    return f"CAST(LEN({name}) AS FLOAT)"
+
+
+def _series_columns(columns: List[Dict[str, Any]], kinds: List[str]) -> List[int]:
+    """Columns with a binned series: numeric and date values, and string lengths unless categorical."""
+    return [index for index, kind in enumerate(kinds) if kind in (KIND_SERIES, KIND_TEXT)]
+
+
+def build_stats_query(table_name: str, columns: List[Dict[str, Any]], kinds: List[str]):
+    """Returns the single-scan aggregate query and the (column index, statistic) for every output column."""
+    expressions = ["COUNT_BIG(*)"]
+    layout = [(None, "rows")]
+    for index, column in enumerate(columns):
+        name = quote_identifier(column["column_name"])
+        expressions.append(f"COUNT_BIG({name})")
+        layout.append((index, "non_null"))
+        if kinds[index] == KIND_TEXT:
+            expressions.append(f"COUNT_BIG(DISTINCT {name})")
+            layout.append((index, "distinct"))
+    for index in _series_columns(columns, kinds):
+        series = _series_expression(columns[index], kinds[index])
+        expressions += [f"MIN({series})", f"MAX({series})"]
+        layout += [(index, "low"), (index, "high")]
+
+    query = "SELECT " + ",\n       ".join(expressions) + f"\nFROM {quote_table_name(table_name)}"
+    return query, layout
+
+
+def build_binned_histogram_query(table_name: str, columns: List[Dict[str, Any]], kinds: List[str],
+                                 edges: Dict[int, Tuple[float, float]]) -> Optional[str]:
+    """
+    Fixed-width histograms of all series in one scan. edges maps a column index to the (low, width)
+    shared by both databases, so bin b covers [low + b * width, low + (b + 1) * width).
+    """
+    values = [
+        f"({index}, {_series_expression(columns[index], kinds[index])}, CAST({low!r} AS FLOAT), CAST({width!r} AS FLOAT))"
+        for index, (low, width) in edges.items()
+    ]
+    if not values:
+        return None
+
+    return f"""
+        WITH series AS (
+            SELECT v.series_id, v.val, v.low, v.width
+            FROM {quote_table_name(table_name)}
+            CROSS APPLY (VALUES {", ".join(values)}) AS v(series_id, val, low, width)
+            WHERE v.val IS NOT NULL
+        ),
+        binned AS (
+            SELECT series_id, CAST(FLOOR((val - low) / width) AS INT) AS bin
+            FROM series
+        )
+        SELECT series_id, bin, COUNT_BIG(*) AS frequency
+        FROM binned
+        GROUP BY series_id, bin
+    """
+
+
+def build_degree_query(relationship: Dict[str, Any]) -> str:
+    """
+    Exact degree distribution of one foreign key: for every child row count (0 included), how many
+    referenced keys have it. Child rows with a NULL or orphaned key are not counted.
+    """
+    child_columns = [quote_identifier(c) for c in relationship["parent_columns"]]
+    referenced_columns = [quote_identifier(c) for c in relationship["referenced_columns"]]
+    aliases = [f"k{i}" for i in range(len(child_columns))]
+
+    return f"""
+        WITH child_degrees AS (
+            SELECT {", ".join(f"{c} AS {a}" for c, a in zip(child_columns, aliases))}, COUNT_BIG(*) AS degree
+            FROM {quote_table_name(relationship["parent_table"])}
+            WHERE {" AND ".join(f"{c} IS NOT NULL" for c in child_columns)}
+            GROUP BY {", ".join(child_columns)}
+        ),
+        referenced_keys AS (
+            SELECT {", ".join(f"{c} AS {a}" for c, a in zip(referenced_columns, aliases))}
+            FROM {quote_table_name(relationship["referenced_table"])}
+            WHERE {" AND ".join(f"{c} IS NOT NULL" for c in referenced_columns)}
+        )
+        SELECT COALESCE(c.degree, 0) AS degree, COUNT_BIG(*) AS key_count
+        FROM referenced_keys r
+        LEFT JOIN child_degrees c ON {" AND ".join(f"r.{a} = c.{a}" for a in aliases)}
+        GROUP BY COALESCE(c.degree, 0)
+    """
+
+
+# ============================================================================
+# Validation
+# ============================================================================
+
+def _column_kind(column: Dict[str, Any], key_columns: set) -> str:
+    base_type = _base_type(column["data_type"])
+    if column["column_name"] in key_columns:
+        return KIND_KEY
+    if base_type in NUMERIC_TYPES or base_type in DATE_TYPES:
+        return KIND_SERIES
+    if base_type in BOOLEAN_TYPES:
+        return KIND_CATEGORICAL
+    if base_type in STRING_TYPES:
+        return KIND_TEXT  # Becomes categorical when the source has few distinct values
+    return KIND_OTHER
+
+
+def _check(metric: str, value: float, threshold: float) -> Dict[str, Any]:
+    return {"metric": metric, "value": round(float(value), 6), "threshold": threshold, "passed": bool(value <= threshold)}
+
+
+class _QueryRunner:
+    """Runs timed queries against either database on a shared thread pool."""
+
+    def __init__(self, databases: Dict[str, Optional[str]], executor: ThreadPoolExecutor, timeout_seconds: int):
+        self._databases = databases
+        self._executor = executor
+        self._timeout_seconds = timeout_seconds
+        self._bind = get_tracer().bind
+
+    def submit(self, side: str, query: str, fetch: Callable = lambda cursor: cursor.fetchall(), params: tuple = ()):
+        return self._executor.submit(self._bind(self._run), side, query, fetch, params)
+
+    def _run(self, side: str, query: str, fetch: Callable, params: tuple):
+        started = time.monotonic()
+        with pooled_connection(self._databases[side]) as conn:
+            previous_timeout = getattr(conn, "timeout", 0)
+            conn.timeout = self._timeout_seconds
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, *params)
+                result = fetch(cursor)
+            finally:
+                cursor.close()
+                conn.timeout = previous_timeout
+        return result, time.monotonic() - started
+
+
+def _both(runner: _QueryRunner, query: str, fetch: Callable = lambda cursor: cursor.fetchall()) -> Dict[str, Any]:
+    return {side: runner.submit(side, query, fetch) for side in (SIDE_SOURCE, SIDE_SYNTHETIC)}
+
+
+def validate_fidelity(data_model: Dict[str, Any], synthetic_database: str, source_database: Optional[str] = None,
+                      settings: Optional[ValidationSettings] = None) -> Dict[str, Any]:
+    """
+    Compares every table and foreign key of the data model between the source database (the configured
+    one unless given) and the synthetic database, and returns a pass/fail report with timings.
+    """
+    settings = settings or ValidationSettings.from_config()
+    started = time.monotonic()
+    tables = [table for table in data_model.get("tables", []) if table.get("table_name")]
+    relationships = group_foreign_keys(data_model.get("foreign_keys", []))
+    databases = {SIDE_SOURCE: source_database, SIDE_SYNTHETIC: synthetic_database}
+
+    key_columns: Dict[str, set] = {}
+    for relationship in relationships:
+        key_columns.setdefault(relationship["parent_table"], set()).update(relationship["parent_columns"])
+        key_columns.setdefault(relationship["referenced_table"], set()).update(relationship["referenced_columns"])
+
+    table_reports = {table["table_name"]: {"table_name": table["table_name"], "seconds": {SIDE_SOURCE: 0.0, SIDE_SYNTHETIC: 0.0}} for table in tables}
+    with ThreadPoolExecutor(max_workers=max(1, settings.workers)) as executor:
+        runner = _QueryRunner(databases, executor, settings.query_timeout_seconds)
+
+        # Round 1: table statistics and degree distributions on both databases, plus source primary keys
+        primary_keys = {
+            table["table_name"]: runner.submit(SIDE_SOURCE, PRIMARY_KEY_QUERY, params=(quote_table_name(table["table_name"]),))
+            for table in tables
+        }
+        degree_futures = [_both(runner, build_degree_query(relationship)) for relationship in relationships]
+        kinds: Dict[str, List[str]] = {}
+        stats_futures = {}
+        for table in tables:
+            table_name, columns = table["table_name"], table.get("columns", [])
+            try:
+                table_keys = key_columns.get(table_name, set()) | {row[0] for row in primary_keys[table_name].result()[0]}
+            except Exception:
+                table_keys = key_columns.get(table_name, set())  # No primary key lookup (e.g. missing permissions)
+            kinds[table_name] = [_column_kind(column, table_keys) for column in columns]
+            query, layout = build_stats_query(table_name, columns, kinds[table_name])
+            stats_futures[table_name] = (layout, _both(runner, query, lambda cursor: cursor.fetchone()))
+
+        stats: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for table_name, (layout, futures) in stats_futures.items():
+            try:
+                stats[table_name] = {}
+                for side, future in futures.items():
+                    row, seconds = future.result()
+                    table_reports[table_name]["seconds"][side] += seconds
+                    column_stats = [{} for _ in kinds[table_name]]
+                    table_reports[table_name][f"{side}_rows"] = int(row[0])
+                    for (index, statistic), value in zip(layout, row):
+                        if index is not None:
+                            column_stats[index][statistic] = value
+                    stats[table_name][side] = column_stats
+            except Exception as e:
+                table_reports[table_name]["error"] = f"Failed to aggregate {table_name}: {str(e)}"
+                stats.pop(table_name, None)
+        stats_seconds = time.monotonic() - started
+
+        # Round 2: histograms on edges shared by both databases, and categorical frequencies
+        histogram_futures = {}
+        for table in tables:
+            table_name, columns = table["table_name"], table.get("columns", [])
+            if table_name not in stats:
+                continue
+            table_kinds = kinds[table_name]
+            source_stats, synthetic_stats = stats[table_name][SIDE_SOURCE], stats[table_name][SIDE_SYNTHETIC]
+            for index, kind in enumerate(table_kinds):
+                if kind != KIND_TEXT:
+                    continue
+                # Values must repeat (twice on average) for their frequencies to be a distribution worth matching
+                distinct = int(source_stats[index]["distinct"])
+                if 0 < distinct <= settings.max_categories and distinct * 2 <= int(source_stats[index]["non_null"]):
+                    table_kinds[index] = KIND_CATEGORICAL
+
+            edges = {}
+            for index in _series_columns(columns, table_kinds):
+                bounds = [float(s[index][b]) for s in (source_stats, synthetic_stats) for b in ("low", "high") if s[index][b] is not None]
+                if bounds:
+                    low, high = min(bounds), max(bounds)
+                    edges[index] = (low, (high - low) / settings.bins if high > low else 1.0)
+            categorical = [index for index, kind in enumerate(table_kinds) if kind == KIND_CATEGORICAL]
+            queries = [
+                build_binned_histogram_query(table_name, columns, table_kinds, edges),
+                build_top_values_query(quote_table_name(table_name), columns, categorical, settings.max_categories),
+            ]
+            histogram_futures[table_name] = [_both(runner, query) if query else None for query in queries]
+
+        histograms: Dict[str, Dict[str, Any]] = {}
+        for table_name, (binned_futures, category_futures) in histogram_futures.items():
+            try:
+                histograms[table_name] = {SIDE_SOURCE: ([], []), SIDE_SYNTHETIC: ([], [])}
+                for position, futures in enumerate((binned_futures, category_futures)):
+                    for side, future in (futures or {}).items():
+                        rows, seconds = future.result()
+                        table_reports[table_name]["seconds"][side] += seconds
+                        histograms[table_name][side][position].extend(rows)
+            except Exception as e:
+                table_reports[table_name]["error"] = f"Failed to build histograms of {table_name}: {str(e)}"
+                histograms.pop(table_name, None)
+
+        degrees = []
+        for relationship, futures in zip(relationships, degree_futures):
+            try:
+                sides = {side: future.result() for side, future in futures.items()}
+                degrees.append({
+                    side: ({int(degree): int(keys) for degree, keys in rows}, seconds)
+                    for side, (rows, seconds) in sides.items()
+                })
+            except Exception as e:
+                degrees.append({"error": f"Failed to measure the degrees of {relationship['constraint_name']}: {str(e)}"})
+        query_seconds = time.monotonic() - started
+
+    # Distances, vectorized across all series and all categorical columns of all tables
+    compare_started = time.monotonic()
+    series_keys, category_keys = [], []
+    for table_name in histograms:
+        kinds_of = kinds[table_name]
+        series_keys += [(table_name, index) for index, kind in enumerate(kinds_of) if kind in (KIND_SERIES, KIND_TEXT)]
+        category_keys += [(table_name, index) for index, kind in enumerate(kinds_of) if kind == KIND_CATEGORICAL]
+
+    series_rows = {key: row for row, key in enumerate(series_keys)}
+    binned = np.zeros((2, len(series_keys), settings.bins), dtype=np.float64)
+    for table_name, sides in histograms.items():
+        for side_index, side in enumerate((SIDE_SOURCE, SIDE_SYNTHETIC)):
+            rows = sides[side][0]
+            if rows:
+                series, bins, counts = (np.asarray(values) for values in zip(*rows))
+                targets = np.fromiter((series_rows[(table_name, int(s))] for s in series), dtype=np.int64, count=len(series))
+                np.add.at(binned[side_index], (targets, np.clip(bins.astype(np.int64), 0, settings.bins - 1)), counts.astype(np.float64))
+    series_distances = dict(zip(series_keys, ks_distance(binned[0], binned[1]))) if series_keys else {}
+
+    # Categories are numbered per column; the last slot holds non-null values outside the returned frequencies
+    category_rows = {key: row for row, key in enumerate(category_keys)}
+    category_ids: Dict[Tuple[str, int], Dict[Any, int]] = {key: {} for key in category_keys}
+    entries = []
+    for table_name, sides in histograms.items():
+        for side_index, side in enumerate((SIDE_SOURCE, SIDE_SYNTHETIC)):
+            for column_index, value, frequency in sides[side][1]:
+                ids = category_ids[(table_name, int(column_index))]
+                entries.append((side_index, category_rows[(table_name, int(column_index))], ids.setdefault(value, len(ids)), int(frequency)))
+    width = max((len(ids) for ids in category_ids.values()), default=0) + 1
+    categories = np.zeros((2, len(category_keys), width), dtype=np.float64)
+    if entries:
+        sides_, rows_, slots, counts = (np.asarray(values) for values in zip(*entries))
+        np.add.at(categories, (sides_, rows_, slots), counts.astype(np.float64))
+    for (table_name, index), row in category_rows.items():
+        for side_index, side in enumerate((SIDE_SOURCE, SIDE_SYNTHETIC)):
+            non_null = int(stats[table_name][side][index]["non_null"])
+            categories[side_index, row, -1] = max(0, non_null - categories[side_index, row, :-1].sum())
+    category_distances = dict(zip(category_keys, chi_square_distance(categories[0], categories[1]))) if category_keys else {}
+
+    # Report
+    report_tables = []
+    for table in tables:
+        table_name = table["table_name"]
+        table_report = table_reports[table_name]
+        table_report["seconds"] = {side: round(seconds, 3) for side, seconds in table_report["seconds"].items()}
+        if "error" not in table_report:
+            source_rows, synthetic_rows = table_report[f"{SIDE_SOURCE}_rows"], table_report[f"{SIDE_SYNTHETIC}_rows"]
+            table_report["row_ratio"] = round(synthetic_rows / source_rows, 6) if source_rows else None
+            column_reports = []
+            for index, column in enumerate(table.get("columns", [])):
+                kind = kinds[table_name][index]
+                checks = []
+                null_fractions = []
+                for side, rows in ((SIDE_SOURCE, source_rows), (SIDE_SYNTHETIC, synthetic_rows)):
+                    non_null = int(stats[table_name][side][index]["non_null"])
+                    null_fractions.append((rows - non_null) / rows if rows else 0.0)
+                checks.append(_check(METRIC_NULL_FRACTION, abs(null_fractions[0] - null_fractions[1]), settings.null_fraction_threshold))
+                if (table_name, index) in series_distances:
+                    checks.append(_check(METRIC_KS if kind == KIND_SERIES else METRIC_LENGTH_KS,
+                                         series_distances[(table_name, index)], settings.ks_threshold))
+                if (table_name, index) in category_distances:
+                    checks.append(_check(METRIC_CHI_SQUARE, category_distances[(table_name, index)], settings.chi_square_threshold))
+                column_reports.append({
+                    "column_name": column["column_name"],
+                    "kind": kind,
+                    "checks": checks,
+                    "passed": all(check["passed"] for check in checks),
+                })
+            table_report["columns"] = column_reports
+        table_report["passed"] = "error" not in table_report and all(column["passed"] for column in table_report["columns"])
+        report_tables.append(table_report)
+
+    report_relationships = []
+    for relationship, measured in zip(relationships, degrees):
+        entry = {
+            "constraint_name": relationship["constraint_name"],
+            "parent_table": relationship["parent_table"],
+            "referenced_table": relationship["referenced_table"],
+        }
+        if "error" in measured:
+            entry.update(error=measured["error"], passed=False)
+        else:
+            for side, (distribution, seconds) in measured.items():
+                keys = sum(distribution.values())
+                child_rows = sum(degree * count for degree, count in distribution.items())
+                entry[side] = {
+                    "referenced_keys": keys,
+                    "zero_degree_fraction": round(distribution.get(0, 0) / keys, 6) if keys else 0.0,
+                    "mean_degree": round(child_rows / keys, 6) if keys else 0.0,
+                    "max_degree": max(distribution, default=0),
+                    "seconds": round(seconds, 3),
+                }
+            keys_distance, rows_distance = degree_distances(measured[SIDE_SOURCE][0], measured[SIDE_SYNTHETIC][0])
+            entry["checks"] = [
+                {**_check(METRIC_DEGREE_KS, keys_distance, settings.degree_threshold), "weight": "keys"},
+                {**_check(METRIC_DEGREE_KS, rows_distance, settings.degree_threshold), "weight": "child_rows"},
+            ]
+            entry["passed"] = all(check["passed"] for check in entry["checks"])
+        report_relationships.append(entry)
+
+    checks = [check for table in report_tables for column in table.get("columns", []) for check in column["checks"]]
+    checks += [check for relationship in report_relationships for check in relationship.get("checks", [])]
+    errors = sum(1 for entry in report_tables + report_relationships if "error" in entry)
+    return {
+        "source_database": source_database or Config.DB_NAME,
+        "synthetic_database": synthetic_database,
+        "passed": errors == 0 and all(check["passed"] for check in checks),
+        "checks": len(checks),
+        "failed_checks": sum(1 for check in checks if not check["passed"]),
+        "errors": errors,
+        "tables": report_tables,
+        "relationships": report_relationships,
+        "timings": {
+            "aggregate_seconds": round(stats_seconds, 3),
+            "histogram_seconds": round(query_seconds - stats_seconds, 3),
+            "compare_seconds": round(time.monotonic() - compare_started, 3),
+            "total_seconds": round(time.monotonic() - started, 3),
+        },
+    }
+
+
+def format_fidelity_report(report: Dict[str, Any]) -> str:
+    """Renders a validation report as one line per check, failures first within each table."""
+    lines = [f"{'':2} {'check':<48} {'metric':<14} {'value':>10} {'limit':>8}"]
+    for table in report["tables"]:
+        if "error" in table:
+            lines.append(f"❌ {table['table_name']:<48} {table['error']}")
+            continue
+        lines.append(
+            f"{'✅' if table['passed'] else '❌'} {table['table_name']:<48} rows {table['source_rows']:,} -> {table['synthetic_rows']:,} "
+            f"({table['seconds'][SIDE_SOURCE]:.2f}s / {table['seconds'][SIDE_SYNTHETIC]:.2f}s)"
+        )
+        results = [(column["column_name"], check) for column in table["columns"] for check in column["checks"]]
+        for column_name, check in sorted(results, key=lambda result: result[1]["passed"]):
+            lines.append(
+                f"{'  ' if check['passed'] else '❌'}   {column_name:<46} {check['metric']:<14} {check['value']:>10.4f} {check['threshold']:>8g}"
+            )
+    for relationship in report["relationships"]:
+        name = f"{relationship['parent_table']} -> {relationship['referenced_table']}"
+        if "error" in relationship:
+            lines.append(f"❌ {name:<48} {relationship['error']}")
+            continue
+        source, synthetic = relationship[SIDE_SOURCE], relationship[SIDE_SYNTHETIC]
+        lines.append(
+            f"{'✅' if relationship['passed'] else '❌'} {name:<48} mean degree {source['mean_degree']:.2f} -> {synthetic['mean_degree']:.2f}, "
+            f"no children {source['zero_degree_fraction']:.1%} -> {synthetic['zero_degree_fraction']:.1%} "
+            f"({source['seconds']:.2f}s / {synthetic['seconds']:.2f}s)"
+        )
+        for check in relationship["checks"]:
+            lines.append(
+                f"{'  ' if check['passed'] else '❌'}   {'by ' + check['weight']:<46} {check['metric']:<14} {check['value']:>10.4f} {check['threshold']:>8g}"
+            )
+    timings = report["timings"]
+    lines.append(
+        f"{report['checks'] - report['failed_checks']}/{report['checks']} checks passed, {report['errors']} errors in {timings['total_seconds']:.2f}s "
+        f"(aggregates {timings['aggregate_seconds']:.2f}s, histograms {timings['histogram_seconds']:.2f}s, distances {timings['compare_seconds']:.3f}s)"
+    )
+    return "\n".join(lines)
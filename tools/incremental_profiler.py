@@ -0,0 +1,290 @@
+"""
+Incremental Profiler
+Keeps the last column and relationship profiles per table on disk together with a change marker,
+and re-scans only the tables that changed since, so repeated runs cost what the churn costs.
+
+A table's change marker is read for all tables in one catalog query:
+- row_count from sys.dm_db_partition_stats (partition row-count delta)
+- last_user_update from sys.dm_db_index_usage_stats (no write since the stored profile = unchanged)
+- the change tracking version, for tables with change tracking enabled (exact changed-row counts)
+A stored profile is reused unless the table is new, its columns or the profile settings changed,
+the profile is older than PROFILE_MAX_AGE_HOURS, or its churn reached PROFILE_CHANGE_THRESHOLD:
+changed rows from CHANGETABLE when change tracking covers the interval, else the row-count delta.
+In-place updates of tables without change tracking are only picked up by the age limit.
+"""
+
+import datetime
+import hashlib
+import json
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import JsonStore, database_errors, pooled_connection, quote_table_name, store_name
+from .column_profiler import ProfileSettings, profile_tables
+from .relationship_profiler import profile_relationships
+
+# One row per user table; usage stats and change tracking columns are NULL where unavailable
+CHANGE_MARKERS_QUERY = """
+    SELECT
+        s.name AS schema_name,
+        t.name AS table_name,
+        (SELECT SUM(ps.row_count) FROM sys.dm_db_partition_stats ps
+          WHERE ps.object_id = t.object_id AND ps.index_id IN (0, 1)) AS row_count,
+        (SELECT MAX(us.last_user_update) FROM sys.dm_db_index_usage_stats us
+          WHERE us.database_id = DB_ID() AND us.object_id = t.object_id) AS last_user_update,
+        CASE WHEN ctt.object_id IS NULL THEN NULL
+             ELSE CHANGE_TRACKING_MIN_VALID_VERSION(t.object_id) END AS ct_min_valid_version
+    FROM sys.tables t
+    INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+    LEFT JOIN sys.change_tracking_tables ctt ON ctt.object_id = t.object_id
+"""
+
+# Without VIEW DATABASE STATE: row counts only
+CHANGE_MARKERS_FALLBACK_QUERY = """
+    SELECT s.name AS schema_name, t.name AS table_name, SUM(p.rows) AS row_count,
+           NULL AS last_user_update, NULL AS ct_min_valid_version
+    FROM sys.partitions p
+    INNER JOIN sys.tables t ON p.object_id = t.object_id
+    INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+    WHERE p.index_id IN (0, 1)
+    GROUP BY s.name, t.name
+"""
+
+CHANGE_TRACKING_VERSION_QUERY = "SELECT CHANGE_TRACKING_CURRENT_VERSION()"
+
+
+def fetch_change_markers(cursor) -> Dict[str, Dict[str, Any]]:
+    """Returns {'schema.table': marker} for every user table; markers are JSON-serializable."""
+    try:
+        cursor.execute(CHANGE_MARKERS_QUERY)
+    except database_errors():
+        cursor.execute(CHANGE_MARKERS_FALLBACK_QUERY)
+    rows = cursor.fetchall()
+
+    current_version = None
+    if any(row[4] is not None for row in rows):
+        cursor.execute(CHANGE_TRACKING_VERSION_QUERY)
+        current_version = cursor.fetchone()[0]
+
+    markers = {}
+    for schema, table, row_count, last_user_update, ct_min_valid_version in rows:
+        markers[f"{schema}.{table}"] = {
+            "row_count": int(row_count) if row_count is not None else None,
+            "last_user_update": last_user_update.isoformat() if last_user_update is not None else None,
+            "ct_version": int(current_version) if ct_min_valid_version is not None and current_version is not None else None,
+            "ct_min_valid_version": int(ct_min_valid_version) if ct_min_valid_version is not None else None,
+        }
+    return markers
+
+
+def count_tracked_changes(cursor, table_name: str, since_version: int) -> int:
+    """Distinct rows changed since `since_version`, from the change tracking side table."""
+    cursor.execute(f"SELECT COUNT_BIG(*) FROM CHANGETABLE(CHANGES {quote_table_name(table_name)}, ?) AS ct", since_version)
+    return int(cursor.fetchone()[0])
+
+
+def only_appended(cursor, table_name: str, stored: Dict[str, Any], current: Optional[Dict[str, Any]]) -> bool:
+    """
+    True when nothing but INSERTs can have touched the table since the stored marker: no write at all per
+    the usage stats, or change tracking covering the interval reports no UPDATE or DELETE. Without either
+    signal an in-place update cannot be ruled out, so the answer is False.
+    """
+    if current is None:
+        return False
+    stored_update, current_update = stored.get("last_user_update"), current.get("last_user_update")
+    if stored_update and current_update and \
+            datetime.datetime.fromisoformat(current_update) <= datetime.datetime.fromisoformat(stored_update):
+        return True
+    since_version = stored.get("ct_version")
+    if since_version is not None and current.get("ct_min_valid_version") is not None \
+            and since_version >= current["ct_min_valid_version"]:
+        cursor.execute(
+            f"SELECT COUNT_BIG(*) FROM CHANGETABLE(CHANGES {quote_table_name(table_name)}, ?) AS ct "
+            "WHERE ct.SYS_CHANGE_OPERATION <> 'I'",
+            since_version,
+        )
+        return int(cursor.fetchone()[0]) == 0
+    return False
+
+
+def table_change_reason(cursor, table_name: str, stored: Dict[str, Any], current: Optional[Dict[str, Any]],
+                        threshold: float, strict: bool = False) -> Optional[str]:
+    """
+    Compares a stored marker with the current one; returns why the table counts as changed, or None.
+    With strict, any write per the usage stats counts, even one that keeps the row count (an in-place UPDATE).
+    """
+    if current is None:
+        return "no_marker"  # Not a user table (e.g. a view), so changes cannot be detected
+    stored_update, current_update = stored.get("last_user_update"), current.get("last_user_update")
+    if stored_update and current_update:
+        if datetime.datetime.fromisoformat(current_update) <= datetime.datetime.fromisoformat(stored_update):
+            return None  # No write since the profile (usage stats reset on restart, then this check is skipped)
+        if strict:
+            return "last_user_update"
+
+    baseline = max(stored.get("row_count") or 0, 1)
+    since_version = stored.get("ct_version")
+    if since_version is not None and current.get("ct_min_valid_version") is not None \
+            and since_version >= current["ct_min_valid_version"]:
+        changed_rows = count_tracked_changes(cursor, table_name, since_version)
+        return "change_tracking" if changed_rows / baseline >= threshold and changed_rows else None
+
+    delta = abs((current.get("row_count") or 0) - (stored.get("row_count") or 0))
+    return "row_count_delta" if delta / baseline >= threshold and delta else None
+
+
+def columns_signature(columns: List[Dict[str, Any]]) -> str:
+    canonical = json.dumps([[c.get("column_name"), c.get("data_type")] for c in columns])
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def settings_signature(settings: ProfileSettings) -> str:
+    # The timeout does not change what a profile contains
+    canonical = json.dumps({k: v for k, v in asdict(settings).items() if k != "query_timeout_seconds"}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class ProfileStore(JsonStore):
+    """Stores the last profile and change marker of every table and relationship of one server/database."""
+
+    def __init__(self, store_dir: Optional[str] = None):
+        self.store_dir = store_dir or Config.PROFILE_STORE_DIR
+        super().__init__(lambda: os.path.join(self.store_dir, f"{store_name()}.json"), ("tables", "relationships"))
+
+
+def _is_stale(entry: Dict[str, Any], now: datetime.datetime, max_age_hours: float) -> bool:
+    if max_age_hours <= 0:
+        return False
+    profiled_at = datetime.datetime.fromisoformat(entry["profiled_at"])
+    return (now - profiled_at).total_seconds() > max_age_hours * 3600
+
+
+def profile_tables_incremental(tables: List[Dict[str, Any]], row_counts: Dict[str, Optional[int]],
+                               settings: Optional[ProfileSettings] = None, store: Optional[ProfileStore] = None,
+                               threshold: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Same result as profile_tables, but tables whose stored profile is still valid are not scanned.
+
+    Each table's metadata gets an "incremental" entry with rescanned, reason and profiled_at.
+    """
+    settings = settings or ProfileSettings.from_config()
+    store = store or ProfileStore()
+    threshold = Config.PROFILE_CHANGE_THRESHOLD if threshold is None else threshold
+    settings_key = settings_signature(settings)
+    stored_tables = store.load().get("tables", {})
+    now = datetime.datetime.now()
+
+    reasons: Dict[str, Optional[str]] = {}
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            markers = fetch_change_markers(cursor)  # Read before scanning, so changes during the scan count next time
+            for table_info in tables:
+                table_name = table_info["table_name"]
+                entry = stored_tables.get(table_name)
+                if entry is None:
+                    reasons[table_name] = "new"
+                elif entry.get("columns_signature") != columns_signature(table_info.get("columns", [])):
+                    reasons[table_name] = "schema_changed"
+                elif entry.get("settings_signature") != settings_key:
+                    reasons[table_name] = "settings_changed"
+                elif _is_stale(entry, now, Config.PROFILE_MAX_AGE_HOURS):
+                    reasons[table_name] = "max_age"
+                else:
+                    reasons[table_name] = table_change_reason(cursor, table_name, entry["marker"], markers.get(table_name), threshold)
+        finally:
+            cursor.close()
+
+    to_scan = [table_info for table_info in tables if reasons[table_info["table_name"]]]
+    scanned = profile_tables(to_scan, row_counts, settings) if to_scan else {}
+
+    profiled_at = now.isoformat()
+    results, updates = {}, {}
+    for table_info in tables:
+        table_name = table_info["table_name"]
+        reason = reasons[table_name]
+        if reason is None:
+            entry = stored_tables[table_name]
+            profile = entry["profile"]
+            profile["metadata"]["incremental"] = {"rescanned": False, "reason": None, "profiled_at": entry["profiled_at"]}
+        else:
+            profile = scanned[table_name]
+            if "error" not in profile:
+                updates[table_name] = {
+                    "profile": json.loads(json.dumps(profile, default=str)),
+                    "marker": markers.get(table_name, {}),
+                    "columns_signature": columns_signature(table_info.get("columns", [])),
+                    "settings_signature": settings_key,
+                    "profiled_at": profiled_at,
+                }
+                profile["metadata"]["incremental"] = {"rescanned": True, "reason": reason, "profiled_at": profiled_at}
+        results[table_name] = profile
+
+    if updates:
+        store.update("tables", updates)
+    return results
+
+
+def _relationship_key(relationship: Dict[str, Any]) -> str:
+    return f"{relationship['parent_table']}|{relationship['constraint_name']}"
+
+
+def profile_relationships_incremental(relationships: List[Dict[str, Any]], store: Optional[ProfileStore] = None,
+                                      threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Same result as profile_relationships, re-running the fan-out query only for relationships whose
+    parent or referenced table changed since the stored profile. Each profile gets an "incremental" entry.
+    """
+    store = store or ProfileStore()
+    threshold = Config.PROFILE_CHANGE_THRESHOLD if threshold is None else threshold
+    stored = store.load().get("relationships", {})
+    now = datetime.datetime.now()
+
+    reasons: List[Optional[str]] = []
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            markers = fetch_change_markers(cursor)
+            for relationship in relationships:
+                entry = stored.get(_relationship_key(relationship))
+                if entry is None:
+                    reasons.append("new")
+                elif entry.get("columns") != [relationship["parent_columns"], relationship["referenced_columns"]]:
+                    reasons.append("schema_changed")
+                elif _is_stale(entry, now, Config.PROFILE_MAX_AGE_HOURS):
+                    reasons.append("max_age")
+                else:
+                    reasons.append(next(filter(None, (
+                        table_change_reason(cursor, relationship[side], entry["markers"][side], markers.get(relationship[side]), threshold)
+                        for side in ("parent_table", "referenced_table")
+                    )), None))
+        finally:
+            cursor.close()
+
+    to_scan = [relationship for relationship, reason in zip(relationships, reasons) if reason]
+    scanned = iter(profile_relationships(to_scan) if to_scan else [])
+
+    profiled_at = now.isoformat()
+    results, updates = [], {}
+    for relationship, reason in zip(relationships, reasons):
+        if reason is None:
+            entry = stored[_relationship_key(relationship)]
+            profile = {**entry["profile"], "incremental": {"rescanned": False, "reason": None, "profiled_at": entry["profiled_at"]}}
+        else:
+            profile = next(scanned)
+            if "error" not in profile:
+                updates[_relationship_key(relationship)] = {
+                    "profile": profile,
+                    "columns": [relationship["parent_columns"], relationship["referenced_columns"]],
+                    "markers": {side: markers.get(relationship[side], {}) for side in ("parent_table", "referenced_table")},
+                    "profiled_at": profiled_at,
+                }
+                profile = {**profile, "incremental": {"rescanned": True, "reason": reason, "profiled_at": profiled_at}}
+        results.append(profile)
+
+    if updates:
+        store.update("relationships", updates)
+    return results
@@ -0,0 +1,180 @@
+"""
+Relationship Profiler
+Measures the fan-out (child rows per referenced key) of every foreign key with one grouped query
+per relationship. Degrees are bucketed on the server into log2 buckets, so only a handful of
+rows come back to Python regardless of table size.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import pooled_connection, quote_identifier, quote_table_name
+from tracing import get_tracer
+
+KEY_KIND_REFERENCED = "referenced"  # A referenced key, with its degree (possibly 0)
+KEY_KIND_ORPHAN = "orphan"  # A foreign key value with no matching referenced key
+KEY_KIND_NULL = "null"  # Child rows whose foreign key is NULL
+
+
+def group_foreign_keys(foreign_keys: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Groups the per-column rows of GetForeignKeysTool into one entry per constraint."""
+    grouped: Dict[tuple, Dict[str, Any]] = {}
+    for fk in foreign_keys:
+        key = (fk["parent_table"], fk["constraint_name"])
+        entry = grouped.setdefault(key, {
+            "constraint_name": fk["constraint_name"],
+            "parent_table": fk["parent_table"],
+            "referenced_table": fk["referenced_table"],
+            "parent_columns": [],
+            "referenced_columns": [],
+        })
+        entry["parent_columns"].append(fk["parent_column"])
+        entry["referenced_columns"].append(fk["referenced_column"])
+    return list(grouped.values())
+
+
+def degree_bucket_bounds(bucket: int) -> tuple:
+    """Bucket 0 holds degree 0, bucket n >= 1 holds degrees in [2^(n-1), 2^n - 1]."""
+    if bucket == 0:
+        return 0, 0
+    return 2 ** (bucket - 1), 2 ** bucket - 1
+
+
+def build_fan_out_query(relationship: Dict[str, Any]) -> str:
+    """
+    Builds the grouped query for one foreign key.
+
+    The child table is aggregated to (key, degree), full outer joined to the referenced keys and
+    then aggregated again by key kind and log2 degree bucket.
+    """
+    child_columns = [quote_identifier(c) for c in relationship["parent_columns"]]
+    referenced_columns = [quote_identifier(c) for c in relationship["referenced_columns"]]
+    aliases = [f"k{i}" for i in range(len(child_columns))]
+
+    child_select = ", ".join(f"{c} AS {a}" for c, a in zip(child_columns, aliases))
+    child_group = ", ".join(child_columns)
+    referenced_select = ", ".join(f"{c} AS {a}" for c, a in zip(referenced_columns, aliases))
+    referenced_not_null = " AND ".join(f"{c} IS NOT NULL" for c in referenced_columns)
+    join_condition = " AND ".join(f"r.{a} = c.{a}" for a in aliases)
+    child_has_null = " OR ".join(f"c.{a} IS NULL" for a in aliases)
+
+    return f"""
+        WITH child_degrees AS (
+            SELECT {child_select}, COUNT_BIG(*) AS degree
+            FROM {quote_table_name(relationship["parent_table"])}
+            GROUP BY {child_group}
+        ),
+        referenced_keys AS (
+            SELECT {referenced_select}, 1 AS present
+            FROM {quote_table_name(relationship["referenced_table"])}
+            WHERE {referenced_not_null}
+        ),
+        joined AS (
+            SELECT
+                CASE
+                    WHEN r.present IS NOT NULL THEN '{KEY_KIND_REFERENCED}'
+                    WHEN {child_has_null} THEN '{KEY_KIND_NULL}'
+                    ELSE '{KEY_KIND_ORPHAN}'
+                END AS key_kind,
+                COALESCE(c.degree, 0) AS degree
+            FROM referenced_keys r
+            FULL OUTER JOIN child_degrees c ON {join_condition}
+        )
+        SELECT j.key_kind, b.bucket,
+               COUNT_BIG(*) AS key_count,
+               SUM(j.degree) AS child_rows,
+               MIN(j.degree) AS min_degree,
+               MAX(j.degree) AS max_degree
+        FROM joined j
+        CROSS APPLY (
+            SELECT CASE WHEN j.degree = 0 THEN 0 ELSE CAST(FLOOR(LOG(j.degree, 2) + 1e-9) AS INT) + 1 END AS bucket
+        ) b
+        GROUP BY j.key_kind, b.bucket
+        ORDER BY j.key_kind, b.bucket
+    """
+
+
+def summarize_fan_out(rows) -> Dict[str, Any]:
+    """Turns the grouped (key_kind, bucket, ...) rows into a compact fan-out profile."""
+    histogram = []
+    referenced_keys = zero_degree_keys = linked_rows = max_degree = 0
+    orphan_keys = orphan_rows = null_rows = 0
+
+    for key_kind, bucket, key_count, child_rows, min_degree, bucket_max_degree in rows:
+        key_count, child_rows = int(key_count), int(child_rows)
+        if key_kind == KEY_KIND_REFERENCED:
+            referenced_keys += key_count
+            linked_rows += child_rows
+            max_degree = max(max_degree, int(bucket_max_degree))
+            if bucket == 0:
+                zero_degree_keys += key_count
+            lower, upper = degree_bucket_bounds(int(bucket))
+            histogram.append({
+                "degree_from": lower,
+                "degree_to": upper,
+                "observed_min": int(min_degree),
+                "observed_max": int(bucket_max_degree),
+                "keys": key_count,
+                "child_rows": child_rows,
+            })
+        elif key_kind == KEY_KIND_ORPHAN:
+            orphan_keys += key_count
+            orphan_rows += child_rows
+        else:
+            null_rows += child_rows
+
+    return {
+        "referenced_keys": referenced_keys,
+        "zero_degree_keys": zero_degree_keys,
+        "zero_degree_fraction": round(zero_degree_keys / referenced_keys, 6) if referenced_keys else 0.0,
+        "linked_child_rows": linked_rows,
+        "mean_degree": round(linked_rows / referenced_keys, 6) if referenced_keys else 0.0,
+        "max_degree": max_degree,
+        "orphan_keys": orphan_keys,
+        "orphan_child_rows": orphan_rows,
+        "null_key_child_rows": null_rows,
+        "degree_histogram": histogram,
+    }
+
+
+def profile_relationship(conn, relationship: Dict[str, Any], query_timeout_seconds: int = 0) -> Dict[str, Any]:
+    started = time.monotonic()
+    previous_timeout = getattr(conn, "timeout", 0)
+    conn.timeout = query_timeout_seconds
+    cursor = conn.cursor()
+    try:
+        cursor.execute(build_fan_out_query(relationship))
+        profile = summarize_fan_out(cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.timeout = previous_timeout
+    profile["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    return profile
+
+
+def profile_relationships(relationships: List[Dict[str, Any]], max_workers: Optional[int] = None,
+                          use_extracts: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """
+    Profiles every relationship concurrently, each on a connection borrowed from the shared pool.
+    With PROFILE_METHOD "extract" (or use_extracts) relationships between extracted tables are measured locally.
+    """
+    if use_extracts is None:
+        use_extracts = Config.PROFILE_METHOD == "extract"
+    if use_extracts:
+        from tools.extract_cache import profile_relationships_extracted  # Needs pyarrow, so only imported when used
+        return profile_relationships_extracted(relationships, max_workers=max_workers)
+    max_workers = max(1, min(max_workers or Config.PROFILE_WORKERS, len(relationships) or 1))
+
+    def run(relationship: Dict[str, Any]):
+        try:
+            with pooled_connection() as conn:
+                return profile_relationship(conn, relationship, Config.PROFILE_QUERY_TIMEOUT_SECONDS)
+        except Exception as e:
+            return {"error": f"Failed to profile {relationship['constraint_name']}: {str(e)}"}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(get_tracer().bind(run), relationships))
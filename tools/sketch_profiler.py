@@ -0,0 +1,409 @@
+"""
+Sketch Profiler
+Builds column profiles from mergeable sketches instead of server-side aggregate queries.
+
+Rows are streamed to the client with keyset pagination (SELECT TOP (page) ... WHERE key > ? ORDER BY key),
+so every page is a seek on the primary key and the server never sorts, spools or counts distinct values.
+Tables with an integer primary key are split into key ranges, and all ranges of all tables are read
+concurrently; each range builds its own column sketches (HyperLogLog, KLL, space-saving, see sketches/)
+and the range sketches are merged per table. The merged sketches are stored next to the schema snapshot:
+a table that was only appended to (per its change marker) is re-profiled by reading only the keys above
+the stored high-water mark, and the synthetic generator can sample from the stored sketches without
+touching the database.
+"""
+
+import datetime
+import decimal
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from db import JsonStore, fetch_primary_key, pooled_connection, quote_identifier, store_name
+from sketches import (
+    KIND_BOOLEAN,
+    KIND_DATE,
+    KIND_NUMERIC,
+    KIND_OTHER,
+    KIND_STRING,
+    ColumnSketch,
+    merge_column_sketches,
+)
+from tools.column_profiler import (
+    BOOLEAN_TYPES,
+    COMPARABLE_TYPES,
+    DATE_EPOCH,
+    DATE_TYPES,
+    NUMERIC_TYPES,
+    STRING_TYPES,
+    ProfileSettings,
+    _base_type,
+    _histogram_bound,
+    _table_source,
+    to_json_value,
+)
+from tools.incremental_profiler import _is_stale, columns_signature, fetch_change_markers, only_appended, settings_signature
+from tracing import get_tracer
+
+# Primary keys of these types are split into key ranges and support append-only re-profiling
+INTEGER_KEY_TYPES = {"tinyint", "smallint", "int", "bigint"}
+
+
+def column_kind(data_type: str) -> str:
+    base_type = _base_type(data_type)
+    if base_type in NUMERIC_TYPES:
+        return KIND_NUMERIC
+    if base_type in DATE_TYPES:
+        return KIND_DATE
+    if base_type in STRING_TYPES:
+        return KIND_STRING
+    if base_type in BOOLEAN_TYPES:
+        return KIND_BOOLEAN
+    return KIND_OTHER
+
+
+def days_since_epoch(value: Any) -> float:
+    """Dates and datetimes (or their ISO text) as fractional days since DATE_EPOCH, like the histogram queries."""
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    return (value.replace(tzinfo=None) - DATE_EPOCH).total_seconds() / 86400.0
+
+
+def _prepare_values(values: List[Any], kind: str) -> Tuple[List[Any], Any]:
+    """Converts non-null fetched values to the JSON-ready values and float values a ColumnSketch takes."""
+    if kind == KIND_NUMERIC:
+        values = [float(value) if isinstance(value, decimal.Decimal) else value for value in values]
+        return values, None
+    if kind == KIND_DATE:
+        return [value if isinstance(value, str) else to_json_value(value) for value in values], [days_since_epoch(value) for value in values]
+    if kind == KIND_BOOLEAN:
+        return [int(value) for value in values], None
+    if kind == KIND_STRING:
+        return values, None
+    return [to_json_value(value) for value in values], None
+
+
+class SketchStore:
+    """Stores the merged column sketches of every profiled table next to the schema snapshot of one server/database."""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or Config.SCHEMA_CACHE_DIR
+        self._store = JsonStore(lambda: os.path.join(self.cache_dir, f"{store_name()}.sketches.json"))
+
+    def load(self) -> Dict[str, Any]:
+        return self._store.load()
+
+    def table_sketches(self, table_name: str) -> Optional[Dict[str, ColumnSketch]]:
+        """The stored sketches of one table by column name, e.g. for the synthetic generator."""
+        entry = self.load().get("tables", {}).get(table_name)
+        if entry is None:
+            return None
+        return {name: ColumnSketch.from_dict(sketch) for name, sketch in entry["columns"].items()}
+
+    def update(self, entries: Dict[str, Any]):
+        """Replaces the given tables' entries and writes the store atomically; other tables are kept."""
+        self._store.update("tables", entries)
+
+
+@dataclass
+class TablePlan:
+    """How one table is read: its key, the key ranges to stream and the stored sketches the ranges are merged into."""
+    table_name: str
+    columns: List[Dict[str, Any]]
+    source: str
+    sampled: bool
+    key: Optional[str] = None
+    integer_key: bool = False
+    ranges: List[Tuple[Any, Any]] = field(default_factory=lambda: [(None, None)])
+    high_water: Optional[int] = None
+    base: Optional[List[ColumnSketch]] = None  # Stored sketches extended by an append-only re-profile
+    reused_rows: int = 0
+
+
+def _new_sketches(columns: List[Dict[str, Any]], settings: ProfileSettings) -> List[ColumnSketch]:
+    return [
+        ColumnSketch(column_kind(column["data_type"]), settings.hll_precision, settings.kll_k, settings.heavy_hitters)
+        for column in columns
+    ]
+
+
+def _select_list(columns: List[Dict[str, Any]]) -> str:
+    expressions = []
+    for column in columns:
+        name = quote_identifier(column["column_name"])
+        if _base_type(column["data_type"]) in COMPARABLE_TYPES:
+            expressions.append(name)
+        else:
+            expressions.append(f"CASE WHEN {name} IS NULL THEN NULL ELSE 1 END")  # Only nulls are profiled, skip the payload
+    return ", ".join(expressions)
+
+
+def plan_table(table_info: Dict[str, Any], row_count: Optional[int], settings: ProfileSettings,
+               stored: Optional[Dict[str, Any]], workers: int, page_rows: int,
+               marker: Optional[Dict[str, Any]] = None) -> TablePlan:
+    """
+    Finds the table's key and splits an integer key into ranges. Stored sketches are reused only when the
+    change marker (see tools.incremental_profiler) proves rows were only appended since, and they are not
+    older than PROFILE_MAX_AGE_HOURS; otherwise the whole table is streamed.
+    """
+    table_name = table_info["table_name"]
+    columns = table_info.get("columns", [])
+    plan = TablePlan(
+        table_name=table_name,
+        columns=columns,
+        source=_table_source(table_name, row_count, settings),
+        sampled=row_count is not None and row_count > settings.max_scan_rows,
+    )
+    key_columns = fetch_primary_key(table_name)
+    if len(key_columns) != 1:
+        return plan  # Heap or composite key: one plain streamed scan
+    plan.key = key_columns[0]["column_name"]
+    plan.integer_key = _base_type(key_columns[0]["data_type"]) in INTEGER_KEY_TYPES
+    if not plan.integer_key:
+        return plan
+
+    key = quote_identifier(plan.key)
+    appendable = (
+        stored is not None and not plan.sampled and not stored.get("sampled")
+        and stored.get("key") == plan.key and stored.get("high_water") is not None
+        and stored.get("columns_signature") == columns_signature(columns)
+        and stored.get("settings_signature") == settings_signature(settings)
+        and stored.get("marker") is not None
+        and not _is_stale(stored, datetime.datetime.now(), Config.PROFILE_MAX_AGE_HOURS)
+    )
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # An UPDATE or DELETE below the high-water mark would leave the stored sketches wrong
+            appendable = appendable and only_appended(cursor, table_name, stored["marker"], marker)
+            if appendable:
+                cursor.execute(
+                    f"SELECT COUNT_BIG(*), MIN({key}), MAX({key}), COUNT_BIG(CASE WHEN {key} > ? THEN 1 END) FROM {plan.source}",
+                    stored["high_water"],
+                )
+            else:
+                cursor.execute(f"SELECT COUNT_BIG(*), MIN({key}), MAX({key}), 0 FROM {plan.source}")
+            total_rows, low, high, new_rows = cursor.fetchone()
+        finally:
+            cursor.close()
+
+    if total_rows == 0:
+        plan.ranges = []
+        return plan
+    rows_to_read = total_rows
+    lower = int(low) - 1
+    if appendable and stored["rows"] + new_rows == total_rows:
+        # Only inserts since, and none below the high-water mark, so the stored sketches still cover those rows
+        plan.base = [ColumnSketch.from_dict(stored["columns"][column["column_name"]]) for column in columns]
+        plan.reused_rows = stored["rows"]
+        rows_to_read = new_rows
+        lower = stored["high_water"]
+    plan.high_water = int(high)
+    if rows_to_read == 0 or plan.high_water <= lower:
+        plan.ranges = []
+        return plan
+    chunks = max(1, min(workers, math.ceil(rows_to_read / page_rows), plan.high_water - lower))
+    width = math.ceil((plan.high_water - lower) / chunks)
+    plan.ranges = [(start, min(start + width, plan.high_water)) for start in range(lower, plan.high_water, width)]
+    return plan
+
+
+def stream_range(plan: TablePlan, lower: Any, upper: Any, settings: ProfileSettings, page_rows: int) -> Tuple[List[ColumnSketch], int]:
+    """Streams one key range (lower exclusive, upper inclusive; None = open) page by page into fresh column sketches."""
+    sketches = _new_sketches(plan.columns, settings)
+    kinds = [sketch.kind for sketch in sketches]
+    select_list = _select_list(plan.columns)
+    pages = 0
+
+    def add_rows(rows, offset: int):
+        for index, (sketch, kind) in enumerate(zip(sketches, kinds)):
+            values = [row[index + offset] for row in rows]
+            non_null = [value for value in values if value is not None]
+            json_values, numbers = _prepare_values(non_null, kind)
+            sketch.update(json_values, len(values) - len(non_null), numbers)
+
+    with pooled_connection() as conn:
+        previous_timeout = getattr(conn, "timeout", 0)
+        conn.timeout = settings.query_timeout_seconds
+        cursor = conn.cursor()
+        try:
+            if plan.key is None:
+                cursor.execute(f"SELECT {select_list} FROM {plan.source}")
+                while True:
+                    rows = cursor.fetchmany(page_rows)
+                    if not rows:
+                        break
+                    add_rows(rows, 0)
+                    pages += 1
+                return sketches, pages
+
+            key = quote_identifier(plan.key)
+            page_query = f"SELECT TOP ({int(page_rows)}) {key}, {select_list} FROM {plan.source} WHERE {key} > ?"
+            if upper is not None:
+                page_query += f" AND {key} <= ?"
+            page_query += f" ORDER BY {key}"
+            bounds = (upper,) if upper is not None else ()
+            last_key = lower
+            while True:
+                if last_key is None:
+                    cursor.execute(page_query.replace(f" WHERE {key} > ?", " WHERE 1 = 1", 1), *bounds)
+                else:
+                    cursor.execute(page_query, last_key, *bounds)
+                rows = cursor.fetchall()
+                if rows:
+                    add_rows(rows, 1)
+                    pages += 1
+                    last_key = rows[-1][0]
+                if len(rows) < page_rows:
+                    break
+        finally:
+            cursor.close()
+            conn.timeout = previous_timeout
+    return sketches, pages
+
+
+def _equi_depth_buckets(sketch, total: int, buckets: int) -> List[Tuple[float, float, int]]:
+    """Equi-depth buckets (lower, upper, count) from a KLL sketch, like NTILE over the sorted values."""
+    buckets = min(buckets, total)
+    if buckets <= 0:
+        return []
+    edges = sketch.quantiles([i / buckets for i in range(buckets + 1)])
+    counts = [total // buckets + (1 if i < total % buckets else 0) for i in range(buckets)]
+    return [(edges[i], edges[i + 1], counts[i]) for i in range(buckets)]
+
+
+def profile_from_sketch(sketch: ColumnSketch, data_type: str, settings: ProfileSettings) -> Dict[str, Any]:
+    """Renders a merged column sketch as the column profile of tools.column_profiler (counts are estimates)."""
+    base_type = _base_type(data_type)
+    non_null = sketch.rows - sketch.nulls
+    profile: Dict[str, Any] = {
+        "null_count": sketch.nulls,
+        "null_fraction": round(sketch.nulls / sketch.rows, 6) if sketch.rows else 0.0,
+    }
+    if base_type not in COMPARABLE_TYPES:
+        return profile
+
+    profile["distinct_count"] = sketch.distinct_count()
+    if base_type != "uniqueidentifier":
+        profile["min"], profile["max"] = sketch.min, sketch.max
+    if sketch.values is not None:
+        profile["histogram"] = [
+            {"lower": _histogram_bound(lower, base_type), "upper": _histogram_bound(upper, base_type), "count": count}
+            for lower, upper, count in _equi_depth_buckets(sketch.values, non_null, settings.histogram_buckets)
+        ]
+    if sketch.lengths is not None and non_null:
+        profile["min_length"], profile["max_length"] = int(sketch.lengths.min), int(sketch.lengths.max)
+        profile["avg_length"] = sketch.length_total / non_null
+        profile["length_histogram"] = [
+            {"lower": int(lower), "upper": int(upper), "count": count}
+            for lower, upper, count in _equi_depth_buckets(sketch.lengths, non_null, settings.histogram_buckets)
+        ]
+    if base_type in BOOLEAN_TYPES or 0 < profile["distinct_count"] <= settings.categorical_max_distinct:
+        profile["top_values"] = [
+            {"value": str(item["value"]), "count": item["count"], **({"error": item["error"]} if item["error"] else {})}
+            for item in sketch.heavy_hitters.top(settings.top_k)
+        ]
+    return profile
+
+
+def profile_tables_sketched(tables: List[Dict[str, Any]], row_counts: Dict[str, Optional[int]],
+                            settings: Optional[ProfileSettings] = None, store: Optional[SketchStore] = None,
+                            workers: Optional[int] = None, page_rows: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Same result shape as profile_tables, built from sketches of keyset-paginated row streams.
+
+    Every table's metadata adds method "sketch", chunks, pages and reused_rows (rows covered by stored sketches).
+    The merged sketches are written to the SketchStore.
+    """
+    settings = settings or ProfileSettings.from_config()
+    store = store or SketchStore()
+    workers = max(1, workers or Config.SKETCH_WORKERS)
+    page_rows = max(1, page_rows or Config.SKETCH_PAGE_ROWS)
+    stored_tables = store.load().get("tables", {})
+    tracer = get_tracer()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            markers = fetch_change_markers(cursor)  # Read before streaming, so changes during the scan count next time
+        finally:
+            cursor.close()
+    started = {table_info["table_name"]: time.monotonic() for table_info in tables}
+    results: Dict[str, Any] = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # 1) Keys and key ranges of all tables
+        plan_futures = {
+            table_info["table_name"]: executor.submit(
+                tracer.bind(plan_table), table_info, row_counts.get(table_info["table_name"]), settings,
+                stored_tables.get(table_info["table_name"]), workers, page_rows, markers.get(table_info["table_name"]),
+            )
+            for table_info in tables
+        }
+        plans: Dict[str, TablePlan] = {}
+        for table_name, future in plan_futures.items():
+            try:
+                plans[table_name] = future.result()
+            except Exception as e:
+                results[table_name] = {"error": f"Failed to profile {table_name}: {str(e)}"}
+
+        # 2) Every range of every table on the same workers, so one wide table does not serialize the run
+        stream_futures = {
+            table_name: [
+                executor.submit(tracer.bind(stream_range), plan, lower, upper, settings, page_rows)
+                for lower, upper in plan.ranges
+            ]
+            for table_name, plan in plans.items()
+        }
+
+        # 3) Merge the range sketches per table
+        profiled_at = datetime.datetime.now().isoformat()
+        updates = {}
+        for table_name, futures in stream_futures.items():
+            plan = plans[table_name]
+            try:
+                streamed = [future.result() for future in futures]
+            except Exception as e:
+                results[table_name] = {"error": f"Failed to profile {table_name}: {str(e)}"}
+                continue
+            column_sets = ([plan.base] if plan.base else []) + [sketches for sketches, _ in streamed]
+            merged = [
+                merge_column_sketches([sketches[index] for sketches in column_sets]) or _new_sketches([column], settings)[0]
+                for index, column in enumerate(plan.columns)
+            ]
+            scanned_rows = merged[0].rows if merged else 0
+            results[table_name] = {
+                "columns": [
+                    profile_from_sketch(sketch, column["data_type"], settings)
+                    for sketch, column in zip(merged, plan.columns)
+                ],
+                "metadata": {
+                    "scanned_rows": scanned_rows,
+                    "sampled": plan.sampled,
+                    "elapsed_seconds": round(time.monotonic() - started[table_name], 3),
+                    "method": "sketch",
+                    "chunks": len(plan.ranges),
+                    "pages": sum(pages for _, pages in streamed),
+                    "reused_rows": plan.reused_rows,
+                },
+            }
+            updates[table_name] = {
+                "columns": {column["column_name"]: sketch.to_dict() for column, sketch in zip(plan.columns, merged)},
+                "rows": scanned_rows,
+                "key": plan.key,
+                "high_water": plan.high_water,
+                "sampled": plan.sampled,
+                "columns_signature": columns_signature(plan.columns),
+                "settings_signature": settings_signature(settings),
+                "marker": markers.get(table_name),
+                "profiled_at": profiled_at,
+            }
+
+    if updates:
+        store.update(updates)
+    return {table_info["table_name"]: results[table_info["table_name"]] for table_info in tables}
@@ -0,0 +1,50 @@
+"""
+Tracing package for span-based profiling of tasks, agents, LLM calls, tools and SQL.
+"""
+
+from .tracer import (
+    SPAN_TASK,
+    SPAN_AGENT,
+    SPAN_LLM,
+    SPAN_TOOL,
+    SPAN_SQL,
+    SPAN_PHASE,
+    Span,
+    Tracer,
+    get_tracer,
+    traced,
+    format_hot_spots
+)
+from .sql import (
+    TracedConnection,
+    TracedCursor,
+    trace_connection
+)
+from .integrations import (
+    install_llm_tracing,
+    install_crewai_tracing
+)
+
+__all__ = [
+    # Tracer
+    'SPAN_TASK',
+    'SPAN_AGENT',
+    'SPAN_LLM',
+    'SPAN_TOOL',
+    'SPAN_SQL',
+    'SPAN_PHASE',
+    'Span',
+    'Tracer',
+    'get_tracer',
+    'traced',
+    'format_hot_spots',
+
+    # SQL
+    'TracedConnection',
+    'TracedCursor',
+    'trace_connection',
+
+    # Framework integrations
+    'install_llm_tracing',
+    'install_crewai_tracing'
+]
@@ -0,0 +1,109 @@
+"""
+Framework Integrations
+Hooks that turn CrewAI task/agent events and litellm completions into spans.
+"""
+
+from typing import Any, Dict
+
+from .tracer import SPAN_AGENT, SPAN_LLM, SPAN_TASK, get_tracer
+
+_llm_installed = False
+_crewai_installed = False
+
+
+def _usage_attributes(response: Any) -> Dict[str, int]:
+    usage = getattr(response, "usage", None)
+    if usage is None and isinstance(response, dict):
+        usage = response.get("usage")
+    if usage is None:
+        return {}
+    attributes = {}
+    for name in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        if isinstance(value, int):
+            attributes[name] = value
+    return attributes
+
+
+def install_llm_tracing():
+    """Records an llm span with latency and token counts around every litellm.completion call."""
+    global _llm_installed
+    if _llm_installed:
+        return
+    import litellm
+
+    traced_completion = litellm.completion
+
+    def completion(*args, **kwargs):
+        tracer = get_tracer()
+        model = kwargs.get("model", args[0] if args else "unknown")
+        with tracer.span(SPAN_LLM, str(model), messages=len(kwargs.get("messages") or [])) as span:
+            response = traced_completion(*args, **kwargs)
+            if span is not None and not kwargs.get("stream"):
+                span.attributes.update(_usage_attributes(response))
+            return response
+
+    litellm.completion = completion
+    _llm_installed = True
+
+
+def install_crewai_tracing() -> bool:
+    """
+    Opens a task span per CrewAI task and an agent span per agent execution (the agent's turn on
+    its task) from the CrewAI event bus. Returns False if this CrewAI version has no event bus.
+    """
+    global _crewai_installed
+    if _crewai_installed:
+        return True
+    try:
+        from crewai.utilities.events import (
+            AgentExecutionCompletedEvent,
+            AgentExecutionErrorEvent,
+            AgentExecutionStartedEvent,
+            TaskCompletedEvent,
+            TaskFailedEvent,
+            TaskStartedEvent,
+            crewai_event_bus,
+        )
+    except ImportError:
+        return False
+
+    tracer = get_tracer()
+    open_spans = {}  # (kind, id of the task or agent) -> span
+
+    def start(kind: str, owner: Any, name: str):
+        open_spans[(kind, id(owner))] = tracer.start_span(kind, name)
+
+    def end(kind: str, owner: Any, **attributes):
+        tracer.end_span(open_spans.pop((kind, id(owner)), None), **attributes)
+
+    def task_name(task: Any) -> str:
+        name = getattr(task, "name", None) or getattr(task, "description", None) or "task"
+        return name if len(name) <= 80 else name[:77] + "..."
+
+    @crewai_event_bus.on(TaskStartedEvent)
+    def on_task_started(source, event):
+        start(SPAN_TASK, event.task or source, task_name(event.task or source))
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def on_task_completed(source, event):
+        end(SPAN_TASK, event.task or source)
+
+    @crewai_event_bus.on(TaskFailedEvent)
+    def on_task_failed(source, event):
+        end(SPAN_TASK, event.task or source, error=event.error)
+
+    @crewai_event_bus.on(AgentExecutionStartedEvent)
+    def on_agent_started(source, event):
+        start(SPAN_AGENT, event.agent, event.agent.role)
+
+    @crewai_event_bus.on(AgentExecutionCompletedEvent)
+    def on_agent_completed(source, event):
+        end(SPAN_AGENT, event.agent)
+
+    @crewai_event_bus.on(AgentExecutionErrorEvent)
+    def on_agent_error(source, event):
+        end(SPAN_AGENT, event.agent, error=event.error)
+
+    _crewai_installed = True
+    return True
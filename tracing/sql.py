@@ -0,0 +1,103 @@
+"""
+SQL Tracing
+Connection and cursor proxies that record a span per executed statement with its duration,
+the affected or fetched row count and the time spent fetching.
+"""
+
+import re
+import time
+from typing import Any, Optional
+
+from .tracer import SPAN_SQL, Span, get_tracer
+
+SQL_NAME_CHARS = 120  # Statement text kept as the span name (hot spots group by it)
+
+
+def statement_name(sql: str) -> str:
+    name = re.sub(r"\s+", " ", sql).strip()
+    return name if len(name) <= SQL_NAME_CHARS else name[:SQL_NAME_CHARS - 3] + "..."
+
+
+class TracedCursor:
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_span", None)
+
+    def _run(self, method: str, sql: str, *args, **attributes):
+        tracer = get_tracer()
+        span = tracer.start_span(SPAN_SQL, statement_name(sql), **attributes)
+        try:
+            getattr(self._cursor, method)(sql, *args)
+        except BaseException as e:
+            if span is not None:
+                span.attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            tracer.end_span(span)
+        rowcount = getattr(self._cursor, "rowcount", -1)
+        if span is not None and rowcount is not None and rowcount >= 0:
+            span.attributes["rows"] = rowcount
+        object.__setattr__(self, "_span", span)
+        return self
+
+    def execute(self, sql: str, *params):
+        return self._run("execute", sql, *params)
+
+    def executemany(self, sql: str, seq_of_params):
+        seq_of_params = seq_of_params if isinstance(seq_of_params, list) else list(seq_of_params)
+        return self._run("executemany", sql, seq_of_params, batch_rows=len(seq_of_params))
+
+    def _fetch(self, method: str, *args):
+        started = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        span: Optional[Span] = self._span
+        if span is not None:
+            fetched = (1 if result is not None else 0) if method == "fetchone" else len(result)
+            span.attributes["rows"] = span.attributes.get("rows", 0) + fetched
+            span.attributes["fetch_seconds"] = round(
+                span.attributes.get("fetch_seconds", 0.0) + time.perf_counter() - started, 6
+            )
+        return result
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+    def fetchmany(self, *args):
+        return self._fetch("fetchmany", *args)
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._cursor, name, value)
+
+
+class TracedConnection:
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+
+    def cursor(self) -> TracedCursor:
+        return TracedCursor(self._conn.cursor())
+
+    def execute(self, sql: str, *params) -> TracedCursor:
+        return self.cursor().execute(sql, *params)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._conn, name, value)
+
+
+def trace_connection(conn):
+    """Wraps the connection in a tracing proxy while the tracer is enabled; otherwise returns it unchanged."""
+    return TracedConnection(conn) if get_tracer().enabled else conn
@@ -0,0 +1,223 @@
+"""
+Tracer
+In-process span recorder for tasks, agent turns, LLM calls, tool invocations and SQL statements.
+Disabled by default; when disabled every call is a cheap no-op.
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+SPAN_TASK = "task"
+SPAN_AGENT = "agent"
+SPAN_LLM = "llm"
+SPAN_TOOL = "tool"
+SPAN_SQL = "sql"
+SPAN_PHASE = "phase"
+
+# Numeric attributes summed per hot spot
+SUMMED_ATTRIBUTES = ["rows", "prompt_tokens", "completion_tokens", "total_tokens"]
+
+
+@dataclass
+class Span:
+    span_id: int
+    parent_id: Optional[int]
+    kind: str
+    name: str
+    start: float  # Seconds since the tracer was enabled
+    thread: str
+    duration: Optional[float] = None  # None while the span is open
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    parent: Optional["Span"] = field(default=None, repr=False, compare=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration": round(self.duration, 6) if self.duration is not None else None,
+            "thread": self.thread,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self._spans: List[Span] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._started_at = time.time()
+        self._current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+    def enable(self):
+        with self._lock:
+            self._spans = []
+            self._origin = time.perf_counter()
+            self._started_at = time.time()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get() if self.enabled else None
+
+    def start_span(self, kind: str, name: str, **attributes) -> Optional[Span]:
+        """Opens a span as a child of the current span and makes it current."""
+        if not self.enabled:
+            return None
+        parent = self._current.get()
+        span = Span(
+            span_id=next(self._ids),
+            parent_id=parent.span_id if parent else None,
+            kind=kind,
+            name=name,
+            start=time.perf_counter() - self._origin,
+            thread=threading.current_thread().name,
+            attributes=attributes,
+            parent=parent,
+        )
+        with self._lock:
+            self._spans.append(span)
+        self._current.set(span)
+        return span
+
+    def end_span(self, span: Optional[Span], **attributes):
+        """Closes the span and makes its parent current again."""
+        if span is None or span.duration is not None:
+            return
+        span.duration = time.perf_counter() - self._origin - span.start
+        span.attributes.update(attributes)
+        self._current.set(span.parent)
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes):
+        span = self.start_span(kind, name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            if span is not None:
+                span.attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.end_span(span)
+
+    def bind(self, func: Callable) -> Callable:
+        """
+        Returns func running under the span that is current now; pass it to a thread pool so spans
+        opened in worker threads (e.g. SQL) nest under the calling tool.
+        """
+        parent = self.current_span()
+        if parent is None:
+            return func
+
+        def run(*args, **kwargs):
+            def with_parent():
+                self._current.set(parent)
+                return func(*args, **kwargs)
+            return contextvars.copy_context().run(with_parent)
+        return run
+
+    def annotate(self, **attributes):
+        """Adds attributes to the current span, if any."""
+        span = self.current_span()
+        if span is not None:
+            span.attributes.update(attributes)
+
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def to_dict(self) -> Dict[str, Any]:
+        spans = self.spans()
+        return {
+            "started_at": self._started_at,
+            "total_seconds": round(time.perf_counter() - self._origin, 6),
+            "span_count": len(spans),
+            "spans": [span.to_dict() for span in spans],
+        }
+
+    def save(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+    def hot_spots(self, top_n: int = 15) -> List[Dict[str, Any]]:
+        """
+        Aggregates closed spans by (kind, name), sorted by self time (duration minus child spans),
+        so a tool waiting on its SQL does not hide the SQL itself.
+        """
+        spans = [span for span in self.spans() if span.duration is not None]
+        child_seconds: Dict[int, float] = {}
+        for span in spans:
+            if span.parent_id is not None:
+                child_seconds[span.parent_id] = child_seconds.get(span.parent_id, 0.0) + span.duration
+
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for span in spans:
+            group = groups.setdefault((span.kind, span.name), {
+                "kind": span.kind, "name": span.name, "count": 0,
+                "total_seconds": 0.0, "self_seconds": 0.0, "max_seconds": 0.0,
+            })
+            group["count"] += 1
+            group["total_seconds"] += span.duration
+            group["self_seconds"] += max(0.0, span.duration - child_seconds.get(span.span_id, 0.0))
+            group["max_seconds"] = max(group["max_seconds"], span.duration)
+            for attribute in SUMMED_ATTRIBUTES:
+                value = span.attributes.get(attribute)
+                if isinstance(value, (int, float)) and value >= 0:
+                    group[attribute] = group.get(attribute, 0) + value
+
+        ranked = sorted(groups.values(), key=lambda g: g["self_seconds"], reverse=True)[:top_n]
+        for group in ranked:
+            for key in ("total_seconds", "self_seconds", "max_seconds"):
+                group[key] = round(group[key], 6)
+        return ranked
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide tracer."""
+    return _tracer
+
+
+def traced(kind: str, name: Optional[str] = None) -> Callable:
+    """Decorator recording a span per call; keeps the signature and docstring (CrewAI @tool reads both)."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return func(*args, **kwargs)
+            with _tracer.span(kind, span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def format_hot_spots(hot_spots: List[Dict[str, Any]]) -> str:
+    lines = [f"{'kind':<7} {'name':<60} {'count':>6} {'self s':>9} {'total s':>9} {'rows':>10} {'tokens':>9}"]
+    for spot in hot_spots:
+        name = spot["name"] if len(spot["name"]) <= 60 else spot["name"][:57] + "..."
+        lines.append(
+            f"{spot['kind']:<7} {name:<60} {spot['count']:>6} {spot['self_seconds']:>9.3f} "
+            f"{spot['total_seconds']:>9.3f} {spot.get('rows', 0):>10,} {spot.get('total_tokens', 0):>9,}"
+        )
+    return "\n".join(lines)